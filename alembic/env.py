@@ -95,6 +95,8 @@ def run_migrations_online() -> None:
         poolclass=pool.NullPool,
     )
 
+    # Toda la migración (incluida la reflexión de autogenerate) usa esta única
+    # conexión; NullPool solo evita dejar conexiones abiertas al terminar.
     with connectable.connect() as connection:
         context.configure(
             connection=connection, target_metadata=target_metadata
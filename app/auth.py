@@ -1,25 +1,83 @@
 from datetime import datetime, timedelta
-from typing import Optional, Union
-from jose import JWTError, jwt
+from typing import Dict, Optional, Union
+from cachetools import TLRUCache, TTLCache
+from jose import JWTError, jwk, jwt
 from passlib.context import CryptContext
-from fastapi import HTTPException, status, Depends
+from fastapi import HTTPException, Request, status, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from sqlalchemy import Row, case, exists, select, update
 from sqlalchemy.orm import Session
 from app.config import settings
-from app.database import get_db
+from app.database import get_db, SessionLocal
 from app.models import Usuario
 from app.schemas.usuario import TokenData
+import re
+import threading
+import time
 import logging
 
 # Configurar logging
 logger = logging.getLogger(__name__)
 
 # Configurar el contexto de hashing de contraseñas
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Los hashes nuevos usan argon2; los bcrypt existentes siguen verificando
+# y se rehashean con argon2 en el siguiente login exitoso.
+pwd_context = CryptContext(
+    schemes=["argon2", "bcrypt"],
+    deprecated="auto",
+    argon2__time_cost=2,
+    argon2__memory_cost=19456,
+    argon2__parallelism=1,
+)
+
+# Handler del esquema por defecto (argon2) con los parámetros del contexto ya
+# aplicados; hashear con él evita resolver el esquema en cada llamada
+_password_hasher = pwd_context.handler()
+
+# Hash de relleno: se verifica cuando el email no existe para que el tiempo
+# de respuesta del login no revele qué usuarios están registrados
+_DUMMY_HASH = _password_hasher.hash("usuario-inexistente")
 
 # Configurar el esquema de autenticación
 security = HTTPBearer()
 
+# Clave de firma construida una sola vez; evita que python-jose la derive
+# (y pruebe a parsearla como JSON) en cada firma o verificación
+_JWT_KEY = jwk.construct(settings.SECRET_KEY, settings.ALGORITHM)
+
+# Valores de configuración usados en cada petición, leídos una sola vez
+_ALGORITHM = settings.ALGORITHM
+_ALGORITHMS = [_ALGORITHM]
+_EXPIRE_DELTA = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+
+# Caché de tokens ya verificados (token -> payload)
+TOKEN_CACHE_TTL_SECONDS = 60
+
+
+def _token_ttu(token: str, payload: dict, now: float) -> float:
+    """
+    Calcular el instante de expiración de una entrada de la caché de tokens.
+    
+    La entrada nunca sobrevive a la expiración (`exp`) del propio token.
+    """
+    return min(now + TOKEN_CACHE_TTL_SECONDS, payload.get("exp", now))
+
+
+_token_cache = TLRUCache(maxsize=10_000, ttu=_token_ttu, timer=time.time)
+_token_cache_lock = threading.Lock()
+
+# Caché de usuarios autenticados (email -> columnas del usuario)
+_usuario_cache = TTLCache(maxsize=5000, ttl=settings.USER_CACHE_TTL_SECONDS)
+_usuario_cache_lock = threading.Lock()
+
+# Logins fallidos por IP y email ((ip, email) -> (inicio_ventana, fallos))
+_intentos_login = TTLCache(maxsize=10_000, ttl=settings.LOGIN_RATE_LIMIT_WINDOW_SECONDS)
+_intentos_login_lock = threading.Lock()
+
+# Últimos accesos pendientes de persistir (usuario_id -> fecha)
+_ultimos_accesos: Dict[int, datetime] = {}
+_ultimos_accesos_lock = threading.Lock()
+
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """
@@ -45,30 +103,204 @@ def get_password_hash(password: str) -> str:
     Returns:
         str: Contraseña hasheada
     """
-    return pwd_context.hash(password)
+    return _password_hasher.hash(password)
 
 
-def authenticate_user(db: Session, email: str, password: str) -> Union[Usuario, bool]:
+def authenticate_user(db: Session, email: str, password: str) -> Union[Row, bool]:
     """
     Autenticar un usuario.
     
+    Solo se cargan las columnas necesarias para el login, sin materializar
+    la entidad completa ni registrarla en la sesión.
+    
     Args:
         db: Sesión de base de datos
         email: Email del usuario
         password: Contraseña del usuario
         
     Returns:
-        Usuario: El usuario si la autenticación es exitosa
+        Row: Fila con id, email, hashed_password, activo y es_admin si la
+            autenticación es exitosa
         bool: False si la autenticación falla
     """
-    user = db.query(Usuario).filter(Usuario.email == email).first()
+    user = db.execute(
+        select(
+            Usuario.id,
+            Usuario.email,
+            Usuario.hashed_password,
+            Usuario.activo,
+            Usuario.es_admin,
+        ).where(Usuario.email == email)
+    ).first()
     if not user:
+        # Gastar lo mismo que una verificación real antes de rechazar
+        pwd_context.verify(password, _DUMMY_HASH)
         return False
-    if not verify_password(password, user.hashed_password):
+    valido, nuevo_hash = pwd_context.verify_and_update(password, user.hashed_password)
+    if not valido:
         return False
+    if nuevo_hash:
+        # Migrar hash obsoleto (p. ej. bcrypt) al esquema actual
+        db.execute(
+            update(Usuario)
+            .where(Usuario.id == user.id)
+            .values(hashed_password=nuevo_hash)
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+        invalidate_user(user.email)
     return user
 
 
+def _clave_intentos_login(request: Request, email: str) -> tuple:
+    """
+    Clave del contador de logins fallidos: IP del cliente y email.
+    
+    Detrás de un proxy inverso request.client es la IP del proxy salvo que
+    uvicorn se ejecute con --proxy-headers y --forwarded-allow-ips apuntando
+    al proxy; así se toma la IP real de X-Forwarded-For solo si la envía un
+    proxy de confianza.
+    
+    Args:
+        request: Petición HTTP
+        email: Email con el que se intenta iniciar sesión
+        
+    Returns:
+        tuple: (ip, email en minúsculas)
+    """
+    ip = request.client.host if request.client else "desconocida"
+    return ip, email.lower()
+
+
+def comprobar_intentos_login(request: Request, email: str) -> None:
+    """
+    Rechazar el login si la IP ya agotó los intentos fallidos para ese email.
+    
+    Acota cuántas contraseñas puede probar un cliente contra una cuenta sin
+    afectar a otros usuarios que compartan la IP (NAT, proxy).
+    
+    Args:
+        request: Petición HTTP
+        email: Email con el que se intenta iniciar sesión
+        
+    Raises:
+        HTTPException: Si se superó el número de intentos fallidos permitidos
+    """
+    clave = _clave_intentos_login(request, email)
+    ahora = time.monotonic()
+    ventana = settings.LOGIN_RATE_LIMIT_WINDOW_SECONDS
+    
+    with _intentos_login_lock:
+        inicio, fallos = _intentos_login.get(clave, (ahora, 0))
+    
+    if fallos >= settings.LOGIN_RATE_LIMIT and ahora - inicio < ventana:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Demasiados intentos de inicio de sesión, intenta más tarde",
+            headers={"Retry-After": str(max(1, int(ventana - (ahora - inicio))))},
+        )
+
+
+def registrar_login_fallido(request: Request, email: str) -> None:
+    """
+    Contar un login fallido dentro de la ventana de tiempo fija.
+    
+    Args:
+        request: Petición HTTP
+        email: Email con el que se intentó iniciar sesión
+    """
+    clave = _clave_intentos_login(request, email)
+    ahora = time.monotonic()
+    
+    with _intentos_login_lock:
+        inicio, fallos = _intentos_login.get(clave, (ahora, 0))
+        if ahora - inicio >= settings.LOGIN_RATE_LIMIT_WINDOW_SECONDS:
+            inicio, fallos = ahora, 0
+        _intentos_login[clave] = (inicio, fallos + 1)
+
+
+def reiniciar_intentos_login(request: Request, email: str) -> None:
+    """
+    Olvidar los logins fallidos tras un inicio de sesión correcto.
+    
+    Args:
+        request: Petición HTTP
+        email: Email con el que se inició sesión
+    """
+    clave = _clave_intentos_login(request, email)
+    with _intentos_login_lock:
+        _intentos_login.pop(clave, None)
+
+
+def decode_access_token(token: str) -> dict:
+    """
+    Decodificar y verificar un token JWT, reutilizando verificaciones previas.
+    
+    Los tokens se guardan en caché solo después de validar firma y expiración,
+    por lo que un acierto en caché equivale a un token ya verificado.
+    
+    Args:
+        token: Token JWT codificado
+        
+    Returns:
+        dict: Payload del token
+        
+    Raises:
+        JWTError: Si el token es inválido o ha expirado
+    """
+    with _token_cache_lock:
+        payload = _token_cache.get(token)
+    if payload is not None:
+        return payload
+    
+    payload = jwt.decode(token, _JWT_KEY, algorithms=_ALGORITHMS)
+    with _token_cache_lock:
+        _token_cache[token] = payload
+    return payload
+
+
+def get_user_by_email(db: Session, email: str) -> Optional[Usuario]:
+    """
+    Obtener un usuario por email, usando la caché de usuarios autenticados.
+    
+    En un acierto de caché se devuelve una instancia de `Usuario` no asociada
+    a la sesión, reconstruida a partir de las columnas guardadas.
+    
+    Args:
+        db: Sesión de base de datos
+        email: Email del usuario
+        
+    Returns:
+        Optional[Usuario]: El usuario o None si no existe
+    """
+    with _usuario_cache_lock:
+        datos = _usuario_cache.get(email)
+    if datos is not None:
+        return Usuario(**datos)
+    
+    user = db.query(Usuario).filter(Usuario.email == email).first()
+    if user is None:
+        return None
+    
+    datos = {columna.key: getattr(user, columna.key) for columna in Usuario.__table__.columns}
+    with _usuario_cache_lock:
+        _usuario_cache[email] = datos
+    return user
+
+
+def invalidate_user(email: str) -> None:
+    """
+    Eliminar un usuario de la caché de usuarios autenticados.
+    
+    Debe llamarse después de modificar los datos de un usuario.
+    
+    Args:
+        email: Email del usuario
+    """
+    with _usuario_cache_lock:
+        _usuario_cache.pop(email, None)
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """
     Crear un token de acceso JWT.
@@ -81,23 +313,23 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
         str: Token JWT codificado
     """
     to_encode = data.copy()
-    if expires_delta:
-        expire = datetime.utcnow() + expires_delta
-    else:
-        expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    expire = datetime.utcnow() + (expires_delta or _EXPIRE_DELTA)
     
     to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+    encoded_jwt = jwt.encode(to_encode, _JWT_KEY, algorithm=_ALGORITHM)
     return encoded_jwt
 
 
-async def get_current_user(
+def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: Session = Depends(get_db)
 ) -> Usuario:
     """
     Obtener el usuario actual a partir del token JWT.
     
+    Es síncrona a propósito: FastAPI la ejecuta en el threadpool, de modo
+    que la consulta a la base de datos no bloquea el event loop.
+    
     Args:
         credentials: Credenciales de autorización
         db: Sesión de base de datos
@@ -115,11 +347,7 @@ async def get_current_user(
     )
     
     try:
-        payload = jwt.decode(
-            credentials.credentials, 
-            settings.SECRET_KEY, 
-            algorithms=[settings.ALGORITHM]
-        )
+        payload = decode_access_token(credentials.credentials)
         email: str = payload.get("sub")
         if email is None:
             raise credentials_exception
@@ -127,17 +355,64 @@ async def get_current_user(
     except JWTError:
         raise credentials_exception
     
-    user = db.query(Usuario).filter(Usuario.email == token_data.email).first()
+    user = get_user_by_email(db, token_data.email)
     if user is None:
         raise credentials_exception
     
-    # Actualizar fecha de último acceso
-    user.fecha_ultimo_acceso = datetime.utcnow()
-    db.commit()
+    # Registrar último acceso (se persiste en lote)
+    registrar_ultimo_acceso(user.id)
     
     return user
 
 
+def registrar_ultimo_acceso(usuario_id: int) -> None:
+    """
+    Registrar en memoria la fecha de último acceso de un usuario.
+    
+    Args:
+        usuario_id: ID del usuario
+    """
+    with _ultimos_accesos_lock:
+        _ultimos_accesos[usuario_id] = datetime.utcnow()
+
+
+def flush_ultimos_accesos() -> int:
+    """
+    Persistir los últimos accesos pendientes con una única sentencia UPDATE.
+    
+    Returns:
+        int: Número de usuarios actualizados
+    """
+    with _ultimos_accesos_lock:
+        pendientes = dict(_ultimos_accesos)
+        _ultimos_accesos.clear()
+    
+    if not pendientes:
+        return 0
+    
+    db = SessionLocal()
+    try:
+        db.execute(
+            update(Usuario)
+            .where(Usuario.id.in_(pendientes.keys()))
+            .values(fecha_ultimo_acceso=case(pendientes, value=Usuario.id))
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Error al persistir últimos accesos: {e}")
+        # Reencolar sin pisar accesos más recientes
+        with _ultimos_accesos_lock:
+            for usuario_id, fecha in pendientes.items():
+                _ultimos_accesos.setdefault(usuario_id, fecha)
+        return 0
+    finally:
+        db.close()
+    
+    return len(pendientes)
+
+
 async def get_current_active_user(
     current_user: Usuario = Depends(get_current_user)
 ) -> Usuario:
@@ -197,6 +472,14 @@ def generate_username_from_email(email: str) -> str:
     return email.split("@")[0]
 
 
+# Requisitos de contraseña compilados una sola vez al importar el módulo
+_PASSWORD_SPECIAL_CHARS = frozenset("!@#$%^&*()_+-=[]{}|;:,.<>?")
+_PASSWORD_RE = re.compile(
+    r"(?=.*[A-Z])(?=.*[a-z])(?=.*\d)(?=.*[!@#$%^&*()_+\-=\[\]{}|;:,.<>?]).{8,}",
+    re.DOTALL,
+)
+
+
 def is_valid_password(password: str) -> tuple[bool, str]:
     """
     Validar que una contraseña cumpla con los requisitos de seguridad.
@@ -207,6 +490,11 @@ def is_valid_password(password: str) -> tuple[bool, str]:
     Returns:
         tuple: (es_válida, mensaje_error)
     """
+    # Camino rápido: una sola pasada con la expresión precompilada
+    if _PASSWORD_RE.fullmatch(password):
+        return True, "Contraseña válida"
+    
+    # Si falla, revisar cada regla para devolver el mensaje concreto
     if len(password) < 8:
         return False, "La contraseña debe tener al menos 8 caracteres"
     
@@ -219,13 +507,13 @@ def is_valid_password(password: str) -> tuple[bool, str]:
     if not any(c.isdigit() for c in password):
         return False, "La contraseña debe tener al menos un número"
     
-    if not any(c in "!@#$%^&*()_+-=[]{}|;:,.<>?" for c in password):
+    if not any(c in _PASSWORD_SPECIAL_CHARS for c in password):
         return False, "La contraseña debe tener al menos un carácter especial"
     
     return True, "Contraseña válida"
 
 
-def create_first_admin_user(db: Session) -> Usuario:
+def create_first_admin_user(db: Session) -> Optional[Usuario]:
     """
     Crear el primer usuario administrador del sistema.
     
@@ -233,22 +521,24 @@ def create_first_admin_user(db: Session) -> Usuario:
         db: Sesión de base de datos
         
     Returns:
-        Usuario: El usuario administrador creado
+        Usuario: El usuario administrador creado, o None si ya existía
     """
     admin_email = "admin@sistema.com"
     admin_password = "Admin123!"
     
-    # Verificar si ya existe un usuario admin
-    existing_admin = db.query(Usuario).filter(Usuario.email == admin_email).first()
-    if existing_admin:
-        return existing_admin
+    # Verificar si ya existe un usuario admin (EXISTS, sin cargar la fila)
+    if db.query(exists().where(Usuario.email == admin_email)).scalar():
+        return None
+    
+    # Hashear solo en el primer arranque; si hay un hash precalculado, usarlo
+    hashed_password = settings.ADMIN_PASSWORD_HASH or get_password_hash(admin_password)
     
     # Crear el usuario administrador
     admin_user = Usuario(
         email=admin_email,
         nombre="Administrador",
         apellido="Sistema",
-        hashed_password=get_password_hash(admin_password),
+        hashed_password=hashed_password,
         es_admin=True,
         activo=True
     )
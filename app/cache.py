@@ -0,0 +1,161 @@
+"""
+Caché de respuestas para endpoints de lectura.
+
+Usa Redis cuando REDIS_URL está configurado, de modo que todos los workers
+comparten las entradas y las invalidaciones. Sin Redis se usa una caché TTL
+en memoria del proceso, suficiente para desarrollo o un único worker.
+
+Los valores se guardan serializados con orjson, así que deben ser
+serializables a JSON (dicts, listas, esquemas Pydantic ya volcados...).
+"""
+
+from typing import Any, Callable, Optional
+import logging
+import threading
+import time
+
+import orjson
+from cachetools import TLRUCache
+from fastapi import Response
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Prefijo común de todas las claves, para no colisionar con otros usos de Redis
+_PREFIJO = "cache:"
+
+# Prefijo de los reportes (app/routers/reportes.py). Agregan proyectos,
+# clientes, colaboradores, cotizaciones y costos rígidos, así que toda
+# escritura sobre esas tablas lo invalida junto con su propio prefijo
+PREFIJO_REPORTES = "reportes:"
+
+_redis = None
+if settings.CACHE_ENABLED and settings.REDIS_URL:
+    import redis
+
+    _redis = redis.Redis.from_url(
+        settings.REDIS_URL,
+        socket_timeout=settings.CACHE_REDIS_TIMEOUT_SECONDS,
+        socket_connect_timeout=settings.CACHE_REDIS_TIMEOUT_SECONDS,
+    )
+
+# Caché local: cada entrada guarda (ttl, bytes) y expira según su propio ttl
+_memoria = TLRUCache(maxsize=1024, ttu=lambda clave, valor, ahora: ahora + valor[0], timer=time.monotonic)
+_memoria_lock = threading.Lock()
+
+
+def _leer(clave: str) -> Optional[bytes]:
+    """Leer una entrada serializada, o None si no existe o ha expirado."""
+    if _redis is not None:
+        return _redis.get(clave)
+    with _memoria_lock:
+        entrada = _memoria.get(clave)
+    return entrada[1] if entrada is not None else None
+
+
+def _escribir(clave: str, datos: bytes, ttl: int) -> None:
+    """Guardar una entrada serializada con su tiempo de vida."""
+    if _redis is not None:
+        _redis.set(clave, datos, ex=ttl)
+        return
+    with _memoria_lock:
+        _memoria[clave] = (ttl, datos)
+
+
+def _cached_bytes(key: str, ttl: int, loader: Callable[[], Any]) -> bytes:
+    """
+    Devolver la entrada serializada para una clave o calcularla y guardarla.
+
+    Si Redis no responde se registra un aviso y se calcula el valor sin caché:
+    la caché nunca hace fallar una petición.
+
+    Args:
+        key: Clave de la entrada
+        ttl: Tiempo de vida en segundos
+        loader: Función sin argumentos que calcula el valor
+
+    Returns:
+        bytes: Valor serializado con orjson
+    """
+    if not settings.CACHE_ENABLED:
+        return orjson.dumps(loader())
+
+    clave = _PREFIJO + key
+    try:
+        datos = _leer(clave)
+    except Exception as e:
+        logger.warning("Caché no disponible al leer %s: %s", clave, e)
+        return orjson.dumps(loader())
+
+    if datos is not None:
+        return datos
+
+    datos = orjson.dumps(loader())
+    try:
+        _escribir(clave, datos, ttl)
+    except Exception as e:
+        logger.warning("Caché no disponible al escribir %s: %s", clave, e)
+    return datos
+
+
+def cached(key: str, ttl: int, loader: Callable[[], Any]) -> Any:
+    """
+    Devolver el valor cacheado para una clave o calcularlo y guardarlo.
+
+    Args:
+        key: Clave de la entrada (p. ej. "colaboradores:estadisticas")
+        ttl: Tiempo de vida en segundos
+        loader: Función sin argumentos que calcula el valor
+
+    Returns:
+        Any: Valor deserializado desde la caché o recién calculado
+    """
+    return orjson.loads(_cached_bytes(key, ttl, loader))
+
+
+def cached_response(key: str, ttl: int, loader: Callable[[], Any]) -> Response:
+    """
+    Respuesta JSON con el valor cacheado, enviando los bytes tal cual.
+
+    Evita deserializar la entrada y volver a serializarla (y la validación
+    del response_model): en un acierto de caché no se procesa el cuerpo.
+
+    Args:
+        key: Clave de la entrada (p. ej. "costos_rigidos:estadisticas")
+        ttl: Tiempo de vida en segundos
+        loader: Función sin argumentos que calcula el valor
+
+    Returns:
+        Response: Respuesta application/json con el cuerpo serializado
+    """
+    return Response(content=_cached_bytes(key, ttl, loader), media_type="application/json")
+
+
+def invalidate(*prefixes: str) -> None:
+    """
+    Eliminar todas las entradas cuya clave empiece por alguno de los prefijos.
+
+    Debe llamarse después de cualquier escritura que afecte a los datos
+    cacheados bajo esos prefijos.
+
+    Args:
+        *prefixes: Prefijos de las claves (p. ej. "colaboradores:", PREFIJO_REPORTES)
+    """
+    if not settings.CACHE_ENABLED:
+        return
+
+    patrones = tuple(_PREFIJO + prefix for prefix in prefixes)
+    if _redis is not None:
+        for patron in patrones:
+            try:
+                claves = list(_redis.scan_iter(match=patron + "*", count=500))
+                if claves:
+                    _redis.delete(*claves)
+            except Exception as e:
+                logger.warning("Caché no disponible al invalidar %s: %s", patron, e)
+        return
+
+    with _memoria_lock:
+        for clave in [c for c in _memoria.keys() if c.startswith(patrones)]:
+            _memoria.pop(clave, None)
@@ -1,6 +1,7 @@
 from pydantic_settings import BaseSettings
 from typing import List, Optional
 from pydantic import validator
+from functools import lru_cache
 import os
 
 
@@ -18,16 +19,33 @@ class Settings(BaseSettings):
     DATABASE_NAME: str = "proyecto_db"
     DATABASE_USER: str = "usuario"
     DATABASE_PASSWORD: str = "password"
+    DB_POOL_PRE_PING: bool = True  # Desactivar si ningún proxy corta conexiones ociosas
+    DB_POOL_SIZE: int = 25  # Conexiones persistentes del pool
+    DB_MAX_OVERFLOW: int = 25  # Conexiones extra permitidas en picos de carga
+    DB_POOL_TIMEOUT: int = 10  # Segundos de espera por una conexión libre antes de fallar
+    DB_POOL_WARMUP: bool = True  # Abrir DB_POOL_SIZE conexiones al arrancar
+    DB_POOL_RECYCLE: int = 1800  # Segundos antes de reciclar una conexión
+    DB_QUERY_CACHE_SIZE: int = 1200  # Sentencias compiladas en caché (SQLAlchemy usa 500)
+    ECHO_SQL: bool = False  # Registrar cada sentencia SQL (muy costoso)
+    CREATE_TABLES_ON_STARTUP: bool = True  # Desactivar si el esquema se gestiona con Alembic
     
     # Security
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    LAST_ACCESS_FLUSH_SECONDS: int = 30
+    USER_CACHE_TTL_SECONDS: int = 30  # Vida de la caché de usuarios autenticados
+    ADMIN_PASSWORD_HASH: Optional[str] = None  # Hash precalculado del admin inicial
+    LOGIN_RATE_LIMIT: int = 5  # Logins fallidos permitidos por IP y email en cada ventana
+    LOGIN_RATE_LIMIT_WINDOW_SECONDS: int = 60
     
     # Environment
     ENVIRONMENT: str = "development"
     DEBUG: bool = True
     
+    # Hilos para endpoints síncronos y hashing de contraseñas (anyio usa 40 por defecto)
+    THREADPOOL_SIZE: int = 40
+    
     # API Configuration
     API_V1_STR: str = "/api/v1"
     PROJECT_NAME: str = "Sistema de Gestión de Proyectos"
@@ -57,6 +75,10 @@ class Settings(BaseSettings):
     # Redis Configuration (opcional)
     REDIS_URL: Optional[str] = None
     
+    # Caché de respuestas de lectura (Redis si REDIS_URL está definido, si no en memoria)
+    CACHE_ENABLED: bool = True
+    CACHE_REDIS_TIMEOUT_SECONDS: float = 0.5
+    
     # Logging Configuration
     LOG_LEVEL: str = "INFO"
     LOG_FORMAT: str = "json"
@@ -77,5 +99,16 @@ class Settings(BaseSettings):
         extra = "allow"  # Permitir variables extra del .env
 
 
+@lru_cache()
+def get_settings() -> Settings:
+    """
+    Obtener la configuración de la aplicación, construida una sola vez.
+    
+    Returns:
+        Settings: Instancia compartida de configuración
+    """
+    return Settings()
+
+
 # Instancia global de configuración
-settings = Settings()
+settings = get_settings()
@@ -1,22 +1,25 @@
-from sqlalchemy import create_engine
+from contextlib import ExitStack
+from sqlalchemy import create_engine, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
 from app.config import settings
 import logging
 
-# Configurar logging
-logging.basicConfig(level=logging.INFO)
+# El logging raíz (QueueHandler + QueueListener) se configura en app.main
 logger = logging.getLogger(__name__)
 
 # Crear el motor de la base de datos
 engine = create_engine(
     settings.DATABASE_URL,
-    pool_pre_ping=True,
-    pool_recycle=300,
-    pool_size=10,
-    max_overflow=20,
-    echo=settings.DEBUG,  # Logs SQL queries en desarrollo
+    pool_pre_ping=settings.DB_POOL_PRE_PING,
+    pool_recycle=settings.DB_POOL_RECYCLE,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT,  # Fallar pronto si el pool se agota en vez de esperar 30 s
+    pool_use_lifo=True,  # Reutilizar la conexión más reciente; deja expirar las ociosas
+    query_cache_size=settings.DB_QUERY_CACHE_SIZE,  # Evitar recompilar SQL de sentencias repetidas
+    echo=settings.ECHO_SQL,  # Logs SQL solo si se pide explícitamente
 )
 
 # Crear una sesión de base de datos
@@ -44,6 +47,21 @@ def get_db():
         db.close()
 
 
+def warm_up_pool():
+    """
+    Abrir por adelantado las conexiones persistentes del pool.
+    
+    Las conexiones se mantienen abiertas a la vez (si no, el pool reutilizaría
+    siempre la misma) y al cerrarlas vuelven al pool listas para las primeras
+    peticiones, que así no pagan el coste de conectar.
+    """
+    with ExitStack() as stack:
+        for _ in range(settings.DB_POOL_SIZE):
+            conn = stack.enter_context(engine.connect())
+            conn.execute(text("SELECT 1"))
+    logger.info("Pool de conexiones precalentado: %s", engine.pool.status())
+
+
 async def create_tables():
     """
     Crear todas las tablas en la base de datos.
@@ -51,7 +69,9 @@ async def create_tables():
     Esta función debe ser llamada al iniciar la aplicación.
     """
     try:
-        Base.metadata.create_all(bind=engine)
+        # Una sola conexión para todas las comprobaciones de existencia y el DDL
+        with engine.begin() as conn:
+            Base.metadata.create_all(bind=conn, checkfirst=True)
         logger.info("Tablas creadas exitosamente")
     except Exception as e:
         logger.error(f"Error al crear tablas: {e}")
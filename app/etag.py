@@ -0,0 +1,100 @@
+"""
+ETag y GET condicional para las respuestas de la API.
+
+Middleware ASGI que calcula un ETag débil a partir del cuerpo de cada
+respuesta 200 a un GET. Si el cliente envía If-None-Match con ese mismo
+ETag se responde 304 sin cuerpo: los dashboards que sondean la API
+reciben solo cabeceras mientras los datos no cambian.
+"""
+
+from hashlib import blake2b
+from typing import List
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+class ETagMiddleware:
+    """
+    Añadir ETag a las respuestas GET y contestar 304 cuando el cliente ya
+    tiene la misma versión.
+    """
+
+    def __init__(self, app: ASGIApp):
+        """
+        Inicializar el middleware.
+
+        Args:
+            app: Aplicación ASGI envuelta
+        """
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] != "GET":
+            await self.app(scope, receive, send)
+            return
+
+        if_none_match = Headers(scope=scope).get("if-none-match")
+        inicio: Message = {}
+        cuerpo: List[bytes] = []
+
+        async def send_con_etag(message: Message) -> None:
+            nonlocal inicio
+
+            if message["type"] == "http.response.start":
+                # Solo respuestas 200 sin ETag propio; el resto pasa tal cual
+                if message["status"] != 200 or "etag" in Headers(scope=message):
+                    inicio = {}
+                    await send(message)
+                else:
+                    inicio = message
+                return
+
+            if message["type"] != "http.response.body" or not inicio:
+                await send(message)
+                return
+
+            # Acumular el cuerpo completo antes de calcular el hash
+            cuerpo.append(message.get("body", b""))
+            if message.get("more_body", False):
+                return
+
+            datos = b"".join(cuerpo)
+            etag = f'W/"{blake2b(datos, digest_size=16).hexdigest()}"'
+            headers = MutableHeaders(scope=inicio)
+            headers["etag"] = etag
+
+            if if_none_match and _coincide(if_none_match, etag):
+                # 304: mismas cabeceras (CORS incluidas) pero sin cuerpo
+                del headers["content-length"]
+                del headers["content-type"]
+                inicio["status"] = 304
+                await send(inicio)
+                await send({"type": "http.response.body", "body": b""})
+                return
+
+            await send(inicio)
+            await send({"type": "http.response.body", "body": datos})
+
+        await self.app(scope, receive, send_con_etag)
+
+
+def _coincide(if_none_match: str, etag: str) -> bool:
+    """
+    Comprobar si la cabecera If-None-Match incluye el ETag dado.
+
+    Args:
+        if_none_match: Valor de la cabecera (uno o varios ETags separados por comas)
+        etag: ETag débil de la respuesta actual
+
+    Returns:
+        bool: True si el cliente ya tiene esta versión
+    """
+    if if_none_match.strip() == "*":
+        return True
+    # La comparación débil ignora el prefijo W/
+    valor = etag.removeprefix("W/")
+    return any(
+        candidato.strip().removeprefix("W/") == valor
+        for candidato in if_none_match.split(",")
+    )
@@ -1,29 +1,57 @@
-from fastapi import FastAPI, HTTPException, Depends
+from fastapi import FastAPI, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from sqlalchemy.orm import Session
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import text
+from cachetools import TTLCache
 from contextlib import asynccontextmanager
+from anyio import to_thread
+from logging.handlers import QueueHandler, QueueListener
+import asyncio
 import logging
+import queue
 import sys
+import threading
+import time
 
 # Configurar logging
+# Los handlers de archivo y consola se ejecutan en un hilo aparte vía
+# QueueListener; las peticiones solo encolan el registro.
+_log_formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+_log_handlers = [
+    logging.FileHandler("app.log"),
+    logging.StreamHandler(sys.stdout)
+]
+for _handler in _log_handlers:
+    _handler.setFormatter(_log_formatter)
+
+_log_queue = queue.Queue(-1)
+log_listener = QueueListener(_log_queue, *_log_handlers, respect_handler_level=True)
+
 logging.basicConfig(
     level=logging.INFO,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-    handlers=[
-        logging.FileHandler("app.log"),
-        logging.StreamHandler(sys.stdout)
-    ]
+    format="%(message)s",  # El formato completo lo aplican los handlers del listener
+    handlers=[QueueHandler(_log_queue)]
 )
 logger = logging.getLogger(__name__)
 
 # Imports de la aplicación
 from app.config import settings
-from app.database import create_tables, get_db
-from app.auth import create_first_admin_user
+from app.database import create_tables, engine, warm_up_pool
+from app.auth import create_first_admin_user, flush_ultimos_accesos
+from app.etag import ETagMiddleware
 from app.routers import auth, colaboradores, proyectos, clientes, cotizaciones, costos_rigidos, reportes
 
 
+async def persistir_ultimos_accesos():
+    """
+    Tarea en segundo plano que persiste periódicamente los últimos accesos.
+    """
+    while True:
+        await asyncio.sleep(settings.LAST_ACCESS_FLUSH_SECONDS)
+        await run_in_threadpool(flush_ultimos_accesos)
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """
@@ -32,12 +60,24 @@ async def lifespan(app: FastAPI):
     Se ejecuta al iniciar y cerrar la aplicación.
     """
     # Startup
+    log_listener.start()
     logger.info("Iniciando aplicación...")
     
+    # Los endpoints con base de datos son síncronos (def): usan una Session
+    # bloqueante, así que FastAPI los ejecuta en este threadpool sin bloquear
+    # el event loop. Lo comparten con las consultas y el hashing lanzados con
+    # run_in_threadpool
+    to_thread.current_default_thread_limiter().total_tokens = settings.THREADPOOL_SIZE
+    
     try:
-        # Crear tablas de base de datos
-        await create_tables()
-        logger.info("Tablas de base de datos creadas/verificadas")
+        # Crear tablas de base de datos (omitible cuando se usa Alembic)
+        if settings.CREATE_TABLES_ON_STARTUP:
+            await create_tables()
+            logger.info("Tablas de base de datos creadas/verificadas")
+        
+        # Abrir las conexiones del pool antes de recibir tráfico
+        if settings.DB_POOL_WARMUP:
+            await run_in_threadpool(warm_up_pool)
         
         # Crear usuario administrador por defecto
         from app.database import SessionLocal
@@ -56,10 +96,18 @@ async def lifespan(app: FastAPI):
         logger.error(f"Error al iniciar aplicación: {e}")
         raise
     
+    tarea_ultimos_accesos = asyncio.create_task(persistir_ultimos_accesos())
+    
     yield
     
     # Shutdown
     logger.info("Cerrando aplicación...")
+    
+    tarea_ultimos_accesos.cancel()
+    await run_in_threadpool(flush_ultimos_accesos)
+    
+    # Vaciar la cola de logs pendientes antes de salir
+    log_listener.stop()
 
 
 # Crear instancia de FastAPI
@@ -70,18 +118,23 @@ app = FastAPI(
     openapi_url=f"{settings.API_V1_STR}/openapi.json",
     docs_url=f"{settings.API_V1_STR}/docs",
     redoc_url=f"{settings.API_V1_STR}/redoc",
+    default_response_class=ORJSONResponse,
     lifespan=lifespan
 )
 
 # Configurar CORS
+# frozenset: Starlette comprueba "origin in allow_origins" en cada petición
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=settings.BACKEND_CORS_ORIGINS,
+    allow_origins=frozenset(settings.BACKEND_CORS_ORIGINS),
     allow_credentials=True,
-    allow_methods=["*"],
+    allow_methods=["GET", "POST", "PUT", "PATCH", "DELETE"],
     allow_headers=["*"],
 )
 
+# ETag en las respuestas GET y 304 si el cliente ya tiene la misma versión
+app.add_middleware(ETagMiddleware)
+
 
 # Manejador de errores global
 @app.exception_handler(Exception)
@@ -94,12 +147,12 @@ async def global_exception_handler(request, exc):
     logger.error(f"Error no controlado: {exc}", exc_info=True)
     
     if isinstance(exc, HTTPException):
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=exc.status_code,
             content={"detail": exc.detail}
         )
     
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=500,
         content={"detail": "Error interno del servidor"}
     )
@@ -121,6 +174,25 @@ async def health_check():
     }
 
 
+@app.get("/health/pool")
+async def pool_status():
+    """
+    Estado del pool de conexiones, para ajustar DB_POOL_SIZE/DB_MAX_OVERFLOW.
+    
+    Returns:
+        dict: Conexiones en uso, libres y de desbordamiento del pool
+    """
+    pool = engine.pool
+    return {
+        "status": pool.status(),
+        "size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "checked_out": pool.checkedout() if hasattr(pool, "checkedout") else None,
+        "checked_in": pool.checkedin() if hasattr(pool, "checkedin") else None,
+        "overflow": pool.overflow() if hasattr(pool, "overflow") else None,
+    }
+
+
 # Endpoint de información de la API
 @app.get("/")
 async def root():
@@ -138,33 +210,46 @@ async def root():
     }
 
 
+# Resultado reciente del chequeo de base de datos; las sondas de salud
+# consultan cada pocos segundos y no necesitan un SELECT por petición
+_estado_db_cache = TTLCache(maxsize=1, ttl=1)
+_estado_db_cache_lock = threading.Lock()
+
+
 # Endpoint de información de la base de datos
 @app.get(f"{settings.API_V1_STR}/database/status")
-async def database_status(db: Session = Depends(get_db)):
+def database_status():
     """
     Verificar estado de la base de datos.
     
-    Args:
-        db: Sesión de base de datos
-        
     Returns:
         dict: Estado de la conexión a la base de datos
     """
+    with _estado_db_cache_lock:
+        estado = _estado_db_cache.get("estado")
+    if estado is not None:
+        return estado
+    
     try:
-        # Ejecutar una consulta simple para verificar la conexión
-        db.execute("SELECT 1")
-        return {
+        # Ejecutar una consulta simple sin abrir una sesión ORM completa
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+        estado = {
             "status": "connected",
             "database": "postgresql",
             "message": "Conexión a base de datos exitosa"
         }
     except Exception as e:
         logger.error(f"Error de conexión a base de datos: {e}")
-        return {
+        estado = {
             "status": "error",
             "database": "postgresql",
             "message": f"Error de conexión: {str(e)}"
         }
+    
+    with _estado_db_cache_lock:
+        _estado_db_cache["estado"] = estado
+    return estado
 
 
 # Incluir routers
@@ -211,6 +296,10 @@ app.include_router(
 )
 
 
+# Rutas consultadas por sondas de salud; registrarlas solo genera ruido
+_RUTAS_SIN_LOG = frozenset({"/health", "/health/pool", "/"})
+
+
 # Middleware para logging de requests
 @app.middleware("http")
 async def log_requests(request, call_next):
@@ -224,21 +313,22 @@ async def log_requests(request, call_next):
     Returns:
         Response: Respuesta HTTP
     """
-    import time
+    # Sin INFO habilitado, o en rutas de sondeo, no hay nada que registrar
+    if request.url.path in _RUTAS_SIN_LOG or not logger.isEnabledFor(logging.INFO):
+        return await call_next(request)
     
-    start_time = time.time()
+    start_time = time.perf_counter()
     
     # Procesar petición
     response = await call_next(request)
     
     # Calcular tiempo de procesamiento
-    process_time = time.time() - start_time
+    process_time = time.perf_counter() - start_time
     
     # Registrar petición
     logger.info(
-        f"{request.method} {request.url.path} - "
-        f"Status: {response.status_code} - "
-        f"Time: {process_time:.4f}s"
+        "%s %s - Status: %d - Time: %.4fs",
+        request.method, request.url.path, response.status_code, process_time
     )
     
     return response
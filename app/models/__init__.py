@@ -1,11 +1,12 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, Text, ForeignKey, Table, Enum as SQLEnum
+from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, Text, ForeignKey, Table, Index, JSON, DDL, cast, event, Enum as SQLEnum
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
 import enum
 
 
-class EstadoProyecto(enum.Enum):
+class EstadoProyecto(str, enum.Enum):
     """Estados posibles de un proyecto."""
     PLANIFICACION = "planificacion"
     EN_PROGRESO = "en_progreso"
@@ -14,7 +15,7 @@ class EstadoProyecto(enum.Enum):
     CANCELADO = "cancelado"
 
 
-class EstadoCotizacion(enum.Enum):
+class EstadoCotizacion(str, enum.Enum):
     """Estados posibles de una cotización."""
     BORRADOR = "borrador"
     ENVIADA = "enviada"
@@ -23,20 +24,74 @@ class EstadoCotizacion(enum.Enum):
     VENCIDA = "vencida"
 
 
-class TipoColaborador(enum.Enum):
+class TipoColaborador(str, enum.Enum):
     """Tipos de colaborador."""
     INTERNO = "interno"
     EXTERNO = "externo"
     FREELANCE = "freelance"
 
 
-class TipoCosto(enum.Enum):
+class TipoCosto(str, enum.Enum):
     """Tipos de costo rígido."""
     FIJO = "fijo"
     VARIABLE = "variable"
     RECURRENTE = "recurrente"
 
 
+def trigram_index(name: str, column: str) -> Index:
+    """
+    Crear un índice GIN de trigramas (pg_trgm) para búsquedas ILIKE '%texto%'.
+    
+    Args:
+        name: Nombre del índice
+        column: Nombre de la columna indexada
+        
+    Returns:
+        Index: Índice GIN con gin_trgm_ops (en otros motores, un índice normal)
+    """
+    return Index(name, column, postgresql_using="gin", postgresql_ops={column: "gin_trgm_ops"})
+
+
+def habilidades_minusculas(columna):
+    """
+    Expresión JSONB con la lista de habilidades en minúsculas.
+    
+    La usan el índice GIN de colaboradores y la búsqueda por habilidad, que
+    deben coincidir exactamente para que PostgreSQL use el índice.
+    
+    Args:
+        columna: Columna habilidades
+        
+    Returns:
+        Expresión lower(habilidades::text)::jsonb
+    """
+    return cast(func.lower(cast(columna, Text)), JSONB)
+
+
+def enum_column_type(enum_class: type) -> SQLEnum:
+    """
+    Tipo de columna para enums guardados como VARCHAR con restricción CHECK.
+    
+    Se guarda el valor del enum (p. ej. "en_progreso") en lugar del nombre,
+    de modo que las comparaciones con cadenas y con los enums de los
+    esquemas Pydantic funcionan igual que con los miembros del enum.
+    
+    Args:
+        enum_class: Clase del enum
+        
+    Returns:
+        SQLEnum: Tipo de columna no nativo
+    """
+    return SQLEnum(
+        enum_class,
+        native_enum=False,
+        create_constraint=True,
+        length=20,
+        validate_strings=True,
+        values_callable=lambda enum: [miembro.value for miembro in enum],
+    )
+
+
 # Tabla de asociación muchos-a-muchos entre proyectos y colaboradores
 proyecto_colaborador = Table(
     'proyecto_colaborador',
@@ -45,7 +100,10 @@ proyecto_colaborador = Table(
     Column('colaborador_id', Integer, ForeignKey('colaboradores.id'), primary_key=True),
     Column('horas_asignadas', Float, default=0.0),
     Column('fecha_asignacion', DateTime, default=func.now()),
-    Column('activo', Boolean, default=True)
+    Column('activo', Boolean, default=True),
+    # La clave primaria empieza por proyecto_id; este índice sirve las
+    # búsquedas y los conteos por colaborador
+    Index('ix_proyecto_colaborador_colaborador_id', 'colaborador_id')
 )
 
 
@@ -65,10 +123,10 @@ class Colaborador(Base):
     telefono = Column(String(20))
     cargo = Column(String(100), nullable=False)
     departamento = Column(String(100))
-    tipo = Column(SQLEnum(TipoColaborador), nullable=False, default=TipoColaborador.INTERNO)
+    tipo = Column(enum_column_type(TipoColaborador), nullable=False, default=TipoColaborador.INTERNO)
     costo_hora = Column(Float, nullable=False, default=0.0)
     disponible = Column(Boolean, default=True)
-    habilidades = Column(Text)  # JSON string con habilidades
+    habilidades = Column(JSON().with_variant(JSONB, "postgresql"))  # Lista de habilidades
     fecha_ingreso = Column(DateTime, default=func.now())
     fecha_creacion = Column(DateTime, default=func.now())
     fecha_actualizacion = Column(DateTime, default=func.now(), onupdate=func.now())
@@ -77,6 +135,22 @@ class Colaborador(Base):
     # Relaciones
     proyectos = relationship("Proyecto", secondary=proyecto_colaborador, back_populates="colaboradores")
     
+    __table_args__ = (
+        # Búsqueda por habilidad sin distinguir mayúsculas: contención (@>)
+        # sobre las habilidades en minúsculas (solo PostgreSQL)
+        Index(
+            "ix_colaboradores_habilidades_gin",
+            habilidades_minusculas(habilidades),
+            postgresql_using="gin"
+        ).ddl_if(dialect="postgresql"),
+        # Filtros del listado de colaboradores
+        Index("ix_colaboradores_activo_disponible_tipo", "activo", "disponible", "tipo"),
+        # Búsqueda libre del listado (ILIKE '%texto%' sobre nombre, apellido y email)
+        trigram_index("ix_colaboradores_nombre_trgm", "nombre"),
+        trigram_index("ix_colaboradores_apellido_trgm", "apellido"),
+        trigram_index("ix_colaboradores_email_trgm", "email"),
+    )
+    
     def __repr__(self):
         return f"<Colaborador(id={self.id}, nombre='{self.nombre} {self.apellido}', email='{self.email}')>"
 
@@ -122,7 +196,7 @@ class Proyecto(Base):
     nombre = Column(String(200), nullable=False, index=True)
     descripcion = Column(Text)
     cliente_id = Column(Integer, ForeignKey("clientes.id"), nullable=False)
-    estado = Column(SQLEnum(EstadoProyecto), nullable=False, default=EstadoProyecto.PLANIFICACION)
+    estado = Column(enum_column_type(EstadoProyecto), nullable=False, default=EstadoProyecto.PLANIFICACION)
     fecha_inicio = Column(DateTime)
     fecha_fin_estimada = Column(DateTime)
     fecha_fin_real = Column(DateTime)
@@ -143,6 +217,20 @@ class Proyecto(Base):
     cotizaciones = relationship("Cotizacion", back_populates="proyecto")
     costos_rigidos = relationship("CostoRigido", back_populates="proyecto")
     
+    __table_args__ = (
+        # Estadísticas por cliente: filtra por cliente/activo, cuenta por estado
+        # y suma montos; con INCLUDE se resuelve con un index-only scan
+        Index(
+            "ix_proyectos_cliente_activo_estado",
+            "cliente_id",
+            "activo",
+            "estado",
+            postgresql_include=["presupuesto", "costo_real"],
+        ),
+        # Listado de proyectos con paginación keyset: (fecha_creacion, id) descendente
+        Index("ix_proyectos_fecha_id", fecha_creacion.desc(), id.desc()),
+    )
+    
     def __repr__(self):
         return f"<Proyecto(id={self.id}, nombre='{self.nombre}', estado='{self.estado}')>"
 
@@ -165,7 +253,7 @@ class Cotizacion(Base):
     impuestos = Column(Float, default=0.0)
     descuento = Column(Float, default=0.0)
     total = Column(Float, nullable=False, default=0.0)
-    estado = Column(SQLEnum(EstadoCotizacion), nullable=False, default=EstadoCotizacion.BORRADOR)
+    estado = Column(enum_column_type(EstadoCotizacion), nullable=False, default=EstadoCotizacion.BORRADOR)
     fecha_creacion = Column(DateTime, default=func.now())
     fecha_envio = Column(DateTime)
     fecha_vencimiento = Column(DateTime)
@@ -180,6 +268,38 @@ class Cotizacion(Base):
     proyecto = relationship("Proyecto", back_populates="cotizaciones")
     items = relationship("ItemCotizacion", back_populates="cotizacion", cascade="all, delete-orphan")
     
+    __table_args__ = (
+        # Consultas por cliente filtradas por activo (listados y estadísticas)
+        Index(
+            "ix_cotizaciones_cliente_activo",
+            "cliente_id",
+            "activo",
+            postgresql_include=["estado", "total"],
+        ),
+        # Listado de cotizaciones activas con paginación keyset: (fecha_creacion, id) descendente
+        Index(
+            "ix_cotizaciones_activo_fecha_id",
+            fecha_creacion.desc(),
+            id.desc(),
+            postgresql_where=activo == True,
+        ),
+        # Mismo orden del listado con los filtros habituales por cliente y por estado
+        Index(
+            "ix_cotizaciones_cliente_fecha_id",
+            cliente_id,
+            fecha_creacion.desc(),
+            id.desc(),
+            postgresql_where=activo == True,
+        ),
+        Index(
+            "ix_cotizaciones_estado_fecha_id",
+            estado,
+            fecha_creacion.desc(),
+            id.desc(),
+            postgresql_where=activo == True,
+        ),
+    )
+    
     def __repr__(self):
         return f"<Cotizacion(id={self.id}, numero='{self.numero}', total={self.total})>"
 
@@ -208,6 +328,23 @@ class ItemCotizacion(Base):
         return f"<ItemCotizacion(id={self.id}, descripcion='{self.descripcion}', subtotal={self.subtotal})>"
 
 
+class ContadorNumeracion(Base):
+    """
+    Modelo para los contadores de numeración de documentos.
+    
+    Guarda el último número emitido por prefijo (p. ej. "COT-202401"); se
+    incrementa con un UPDATE ... RETURNING que bloquea la fila, de modo que
+    dos peticiones concurrentes nunca obtienen el mismo número.
+    """
+    __tablename__ = "contadores_numeracion"
+    
+    prefijo = Column(String(50), primary_key=True)
+    ultimo = Column(Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f"<ContadorNumeracion(prefijo='{self.prefijo}', ultimo={self.ultimo})>"
+
+
 class CostoRigido(Base):
     """
     Modelo para costos rígidos del sistema.
@@ -220,11 +357,12 @@ class CostoRigido(Base):
     proyecto_id = Column(Integer, ForeignKey("proyectos.id"))
     nombre = Column(String(200), nullable=False, index=True)
     descripcion = Column(Text)
-    tipo = Column(SQLEnum(TipoCosto), nullable=False, default=TipoCosto.FIJO)
+    tipo = Column(enum_column_type(TipoCosto), nullable=False, default=TipoCosto.FIJO)
     valor = Column(Float, nullable=False, default=0.0)
     moneda = Column(String(10), default="USD")
     frecuencia = Column(String(50))  # mensual, anual, único, etc.
-    fecha_aplicacion = Column(DateTime, default=func.now())
+    # Sin nulos: es la clave de orden (y del cursor) del listado
+    fecha_aplicacion = Column(DateTime, nullable=False, default=func.now(), server_default=func.now())
     categoria = Column(String(100))  # infraestructura, software, recursos, etc.
     proveedor = Column(String(200))
     activo = Column(Boolean, default=True)
@@ -234,6 +372,38 @@ class CostoRigido(Base):
     # Relaciones
     proyecto = relationship("Proyecto", back_populates="costos_rigidos")
     
+    __table_args__ = (
+        # Listado: filtra por activo/proyecto y ordena por fecha_aplicacion DESC
+        Index(
+            "ix_costos_rigidos_activo_proyecto_fecha",
+            "activo",
+            "proyecto_id",
+            fecha_aplicacion.desc(),
+            postgresql_include=["valor", "tipo", "frecuencia"],
+        ),
+        # Paginación keyset del listado: (fecha_aplicacion, id) descendente
+        Index(
+            "ix_costos_rigidos_fecha_id",
+            fecha_aplicacion.desc(),
+            id.desc(),
+        ),
+        # Filtros ILIKE '%texto%' del listado por categoría y proveedor
+        trigram_index("ix_costos_rigidos_categoria_trgm", "categoria"),
+        trigram_index("ix_costos_rigidos_proveedor_trgm", "proveedor"),
+        # Listas de categorías y proveedores (SELECT DISTINCT sobre costos
+        # activos): índices parciales que permiten un index-only scan
+        Index(
+            "ix_costos_rigidos_categoria_activo",
+            "categoria",
+            postgresql_where=(activo == True) & categoria.is_not(None),
+        ),
+        Index(
+            "ix_costos_rigidos_proveedor_activo",
+            "proveedor",
+            postgresql_where=(activo == True) & proveedor.is_not(None),
+        ),
+    )
+    
     def __repr__(self):
         return f"<CostoRigido(id={self.id}, nombre='{self.nombre}', valor={self.valor})>"
 
@@ -257,5 +427,22 @@ class Usuario(Base):
     fecha_creacion = Column(DateTime, default=func.now())
     fecha_actualizacion = Column(DateTime, default=func.now(), onupdate=func.now())
     
+    __table_args__ = (
+        # Índice de cobertura para el login: permite index-only scans por email
+        Index(
+            "ix_usuarios_email_login",
+            "email",
+            postgresql_include=["hashed_password", "activo", "es_admin"],
+        ),
+    )
+    
     def __repr__(self):
         return f"<Usuario(id={self.id}, email='{self.email}', nombre='{self.nombre}')>"
+
+
+# Los índices de trigramas requieren la extensión pg_trgm antes de crear las tablas
+event.listen(
+    Base.metadata,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql")
+)
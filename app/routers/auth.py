@@ -1,12 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.security import HTTPBearer
 from sqlalchemy.orm import Session
-from datetime import timedelta
 from app.database import get_db
-from app.auth import authenticate_user, create_access_token, get_current_active_user, get_password_hash
+from app.auth import (
+    authenticate_user, comprobar_intentos_login, create_access_token, get_current_active_user,
+    get_password_hash, invalidate_user, registrar_login_fallido, reiniciar_intentos_login,
+    verify_password
+)
 from app.models import Usuario
 from app.schemas.usuario import UsuarioLogin, Token, UsuarioCreate, UsuarioResponse, CambiarPassword
-from app.config import settings
 import logging
 
 logger = logging.getLogger(__name__)
@@ -15,25 +17,35 @@ security = HTTPBearer()
 
 
 @router.post("/login", response_model=Token)
-async def login_for_access_token(
+def login_for_access_token(
     user_credentials: UsuarioLogin,
+    request: Request,
     db: Session = Depends(get_db)
 ):
     """
     Autenticar usuario y obtener token de acceso.
     
+    Solo cuentan para el límite los intentos con contraseña incorrecta, por
+    IP y email; un login correcto reinicia el contador.
+    
     Args:
         user_credentials: Email y contraseña del usuario
+        request: Petición HTTP (IP del cliente para el límite de intentos)
         db: Sesión de base de datos
         
     Returns:
         Token: Token de acceso JWT
         
     Raises:
-        HTTPException: Si las credenciales son incorrectas
+        HTTPException: Si las credenciales son incorrectas o se superó el
+            límite de intentos
     """
+    # Endpoint síncrono: FastAPI lo ejecuta en el threadpool, así el hash
+    # y las consultas no bloquean el event loop
+    comprobar_intentos_login(request, user_credentials.email)
     user = authenticate_user(db, user_credentials.email, user_credentials.password)
     if not user:
+        registrar_login_fallido(request, user_credentials.email)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Email o contraseña incorrectos",
@@ -47,12 +59,12 @@ async def login_for_access_token(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = create_access_token(
-        data={"sub": user.email}, expires_delta=access_token_expires
-    )
+    reiniciar_intentos_login(request, user_credentials.email)
     
-    logger.info(f"Usuario {user.email} inició sesión")
+    # La expiración por defecto ya viene precalculada desde la configuración
+    access_token = create_access_token(data={"sub": user.email})
+    
+    logger.info("Usuario %s inició sesión", user.email)
     
     return {
         "access_token": access_token,
@@ -61,7 +73,7 @@ async def login_for_access_token(
 
 
 @router.post("/register", response_model=UsuarioResponse)
-async def register_user(
+def register_user(
     user: UsuarioCreate,
     db: Session = Depends(get_db),
     current_user: Usuario = Depends(get_current_active_user)
@@ -113,7 +125,7 @@ async def register_user(
     db.commit()
     db.refresh(db_user)
     
-    logger.info(f"Usuario {db_user.email} registrado por {current_user.email}")
+    logger.info("Usuario %s registrado por %s", db_user.email, current_user.email)
     
     return db_user
 
@@ -135,7 +147,7 @@ async def read_users_me(
 
 
 @router.post("/change-password")
-async def change_password(
+def change_password(
     password_data: CambiarPassword,
     db: Session = Depends(get_db),
     current_user: Usuario = Depends(get_current_active_user)
@@ -154,18 +166,22 @@ async def change_password(
     Raises:
         HTTPException: Si la contraseña actual es incorrecta
     """
-    # Verificar contraseña actual
-    if not authenticate_user(db, current_user.email, password_data.password_actual):
+    # Verificar contraseña actual contra el hash ya cargado en current_user
+    if not verify_password(password_data.password_actual, current_user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Contraseña actual incorrecta"
         )
     
-    # Actualizar contraseña
-    current_user.hashed_password = get_password_hash(password_data.password_nueva)
+    # Actualizar contraseña (current_user puede venir de la caché, sin sesión)
+    db.query(Usuario).filter(Usuario.id == current_user.id).update(
+        {Usuario.hashed_password: get_password_hash(password_data.password_nueva)},
+        synchronize_session=False
+    )
     db.commit()
+    invalidate_user(current_user.email)
     
-    logger.info(f"Usuario {current_user.email} cambió su contraseña")
+    logger.info("Usuario %s cambió su contraseña", current_user.email)
     
     return {"message": "Contraseña cambiada exitosamente"}
 
@@ -186,7 +202,7 @@ async def logout(
     Returns:
         dict: Mensaje de confirmación
     """
-    logger.info(f"Usuario {current_user.email} cerró sesión")
+    logger.info("Usuario %s cerró sesión", current_user.email)
     
     return {"message": "Sesión cerrada exitosamente"}
 
@@ -4,12 +4,13 @@ Router para gestión de clientes
 from typing import Optional, List
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
+from sqlalchemy.exc import IntegrityError
 
 from app.database import get_db
 from app.auth import get_current_user
+from app.cache import PREFIJO_REPORTES, invalidate
 from app.models import Cliente, Usuario
-from app.schemas import ClienteCreate, ClienteUpdate, ClienteResponse, PaginatedResponse
+from app.schemas import ClienteCreate, ClienteUpdate, ClienteResponse, ClienteListResponse, PaginatedResponse
 from app.services.cliente_service import cliente_service
 
 router = APIRouter(prefix="/clientes", tags=["clientes"])
@@ -17,8 +18,24 @@ router = APIRouter(prefix="/clientes", tags=["clientes"])
 # El servicio se importa directamente desde cliente_service
 
 
-@router.get("", response_model=PaginatedResponse[ClienteResponse])
-async def listar_clientes(
+def _detalle_duplicado(error: IntegrityError, mensaje_email: str) -> str:
+    """
+    Traducir una violación de unicidad a un mensaje para el cliente.
+    
+    Args:
+        error: Error de integridad lanzado por la base de datos
+        mensaje_email: Mensaje a usar si el duplicado es el email
+        
+    Returns:
+        str: Mensaje de error
+    """
+    if "email" in str(error.orig):
+        return mensaje_email
+    return "Ya existe un cliente con este NIT/RUC"
+
+
+@router.get("", response_model=PaginatedResponse[ClienteListResponse])
+def listar_clientes(
     skip: int = Query(0, ge=0, description="Número de registros a omitir"),
     limit: int = Query(10, ge=1, le=100, description="Número de registros a devolver"),
     search: Optional[str] = Query(None, description="Buscar por nombre"),
@@ -58,7 +75,7 @@ async def listar_clientes(
 
 
 @router.post("", response_model=ClienteResponse, status_code=201)
-async def crear_cliente(
+def crear_cliente(
     cliente_data: ClienteCreate,
     db: Session = Depends(get_db),
     current_user: Usuario = Depends(get_current_user)
@@ -67,20 +84,18 @@ async def crear_cliente(
     Crear un nuevo cliente.
     """
     try:
-        # Verificar que no exista un cliente con el mismo email
-        if cliente_data.email:
-            existing = db.query(Cliente).filter(Cliente.email == cliente_data.email).first()
-            if existing:
-                raise HTTPException(
-                    status_code=400, 
-                    detail="Ya existe un cliente con este email"
-                )
-        
-        # Crear cliente
-        cliente = cliente_service.create(db=db, obj_data=cliente_data.dict())
+        # La unicidad del email la garantiza la restricción UNIQUE de la tabla
+        cliente = cliente_service.create(db=db, obj_data=cliente_data.model_dump())
+        invalidate(PREFIJO_REPORTES)
         
         return cliente
         
+    except IntegrityError as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=400,
+            detail=_detalle_duplicado(e, "Ya existe un cliente con este email")
+        )
     except HTTPException:
         raise
     except Exception as e:
@@ -88,7 +103,7 @@ async def crear_cliente(
 
 
 @router.get("/{cliente_id}", response_model=ClienteResponse)
-async def obtener_cliente(
+def obtener_cliente(
     cliente_id: int,
     db: Session = Depends(get_db),
     current_user: Usuario = Depends(get_current_user)
@@ -110,7 +125,7 @@ async def obtener_cliente(
 
 
 @router.put("/{cliente_id}", response_model=ClienteResponse)
-async def actualizar_cliente(
+def actualizar_cliente(
     cliente_id: int,
     cliente_data: ClienteUpdate,
     db: Session = Depends(get_db),
@@ -120,34 +135,24 @@ async def actualizar_cliente(
     Actualizar cliente existente.
     """
     try:
-        # Verificar que el cliente existe
-        cliente_existente = cliente_service.get_by_id(db=db, obj_id=cliente_id)
-        if not cliente_existente:
-            raise HTTPException(status_code=404, detail="Cliente no encontrado")
-        
-        # Verificar email único si se está actualizando
-        if cliente_data.email and cliente_data.email != cliente_existente.email:
-            existing = db.query(Cliente).filter(
-                and_(
-                    Cliente.email == cliente_data.email,
-                    Cliente.id != cliente_id
-                )
-            ).first()
-            if existing:
-                raise HTTPException(
-                    status_code=400, 
-                    detail="Ya existe otro cliente con este email"
-                )
-        
-        # Actualizar cliente
+        # Actualizar cliente; la unicidad del email la garantiza la restricción UNIQUE
         cliente = cliente_service.update(
             db=db, 
             obj_id=cliente_id, 
-            obj_data=cliente_data.dict(exclude_unset=True)
+            obj_data=cliente_data.model_dump(exclude_unset=True)
         )
+        if not cliente:
+            raise HTTPException(status_code=404, detail="Cliente no encontrado")
+        invalidate(PREFIJO_REPORTES)
         
         return cliente
         
+    except IntegrityError as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=400,
+            detail=_detalle_duplicado(e, "Ya existe otro cliente con este email")
+        )
     except HTTPException:
         raise
     except Exception as e:
@@ -155,7 +160,7 @@ async def actualizar_cliente(
 
 
 @router.delete("/{cliente_id}")
-async def eliminar_cliente(
+def eliminar_cliente(
     cliente_id: int,
     db: Session = Depends(get_db),
     current_user: Usuario = Depends(get_current_user)
@@ -171,6 +176,7 @@ async def eliminar_cliente(
         
         # Soft delete
         cliente_service.delete(db=db, obj_id=cliente_id)
+        invalidate(PREFIJO_REPORTES)
         
         return {"message": "Cliente eliminado exitosamente"}
         
@@ -181,7 +187,7 @@ async def eliminar_cliente(
 
 
 @router.get("/{cliente_id}/proyectos")
-async def obtener_proyectos_cliente(
+def obtener_proyectos_cliente(
     cliente_id: int,
     db: Session = Depends(get_db),
     current_user: Usuario = Depends(get_current_user)
@@ -190,23 +196,14 @@ async def obtener_proyectos_cliente(
     Obtener proyectos de un cliente específico.
     """
     try:
-        # Verificar que el cliente existe
-        cliente = cliente_service.get_by_id(db=db, obj_id=cliente_id)
-        if not cliente:
+        # Cliente y proyectos activos en una sola consulta
+        resultado = cliente_service.get_with_projects(db=db, cliente_id=cliente_id)
+        if not resultado:
             raise HTTPException(status_code=404, detail="Cliente no encontrado")
         
-        # Obtener proyectos del cliente
-        from app.models import Proyecto
-        proyectos = db.query(Proyecto).filter(
-            and_(
-                Proyecto.cliente_id == cliente_id,
-                Proyecto.activo == True
-            )
-        ).all()
-        
         return {
-            "cliente": cliente.nombre,
-            "proyectos": proyectos
+            "cliente": resultado["cliente"].nombre,
+            "proyectos": resultado["proyectos"]
         }
         
     except HTTPException:
@@ -216,7 +213,7 @@ async def obtener_proyectos_cliente(
 
 
 @router.get("/{cliente_id}/estadisticas")
-async def obtener_estadisticas_cliente(
+def obtener_estadisticas_cliente(
     cliente_id: int,
     db: Session = Depends(get_db),
     current_user: Usuario = Depends(get_current_user)
@@ -225,58 +222,12 @@ async def obtener_estadisticas_cliente(
     Obtener estadísticas de un cliente específico.
     """
     try:
-        # Verificar que el cliente existe
-        cliente = cliente_service.get_by_id(db=db, obj_id=cliente_id)
-        if not cliente:
+        # Cliente y agregados de proyectos/cotizaciones en una sola consulta
+        estadisticas = cliente_service.get_statistics(db=db, cliente_id=cliente_id)
+        if not estadisticas:
             raise HTTPException(status_code=404, detail="Cliente no encontrado")
         
-        from app.models import Proyecto, Cotizacion
-        
-        # Estadísticas de proyectos
-        proyectos_stats = db.query(
-            func.count(Proyecto.id).label("total_proyectos"),
-            func.count().filter(Proyecto.estado == "completado").label("proyectos_completados"),
-            func.count().filter(Proyecto.estado == "en_progreso").label("proyectos_en_progreso"),
-            func.sum(Proyecto.presupuesto).label("presupuesto_total"),
-            func.sum(Proyecto.costo_real).label("costo_real_total")
-        ).filter(
-            and_(
-                Proyecto.cliente_id == cliente_id,
-                Proyecto.activo == True
-            )
-        ).first()
-        
-        # Estadísticas de cotizaciones
-        cotizaciones_stats = db.query(
-            func.count(Cotizacion.id).label("total_cotizaciones"),
-            func.count().filter(Cotizacion.estado == "aprobada").label("cotizaciones_aprobadas"),
-            func.sum(Cotizacion.total).label("valor_total_cotizaciones")
-        ).filter(
-            and_(
-                Cotizacion.cliente_id == cliente_id,
-                Cotizacion.activo == True
-            )
-        ).first()
-        
-        return {
-            "cliente": {
-                "id": cliente.id,
-                "nombre": cliente.nombre,
-                "tipo_cliente": cliente.tipo_cliente
-            },
-            "proyectos": {
-                "total": proyectos_stats.total_proyectos or 0,
-                "completados": proyectos_stats.proyectos_completados or 0,
-                "en_progreso": proyectos_stats.proyectos_en_progreso or 0,
-                "presupuesto_total": float(proyectos_stats.presupuesto_total or 0),
-                "costo_real_total": float(proyectos_stats.costo_real_total or 0)
-            },
-            "cotizaciones": {
-                "total": cotizaciones_stats.total_cotizaciones or 0,
-                "aprobadas": cotizaciones_stats.cotizaciones_aprobadas or 0,
-                "valor_total": float(cotizaciones_stats.valor_total_cotizaciones or 0)
-            }
-        }
+        return estadisticas
         
     except HTTPException:
         raise
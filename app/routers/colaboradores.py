@@ -3,19 +3,22 @@ from sqlalchemy.orm import Session
 from typing import List, Optional
 from app.database import get_db
 from app.auth import get_current_active_user
+from app.cache import PREFIJO_REPORTES, cached_response, invalidate
 from app.models import Usuario
 from app.schemas.colaborador import (
     ColaboradorCreate, ColaboradorUpdate, ColaboradorResponse, 
     ColaboradorList, EstadisticasColaborador
 )
-from app.services.colaborador_service import ColaboradorService
-import math
+from app.services.colaborador_service import colaborador_service
 
 router = APIRouter()
 
+# Prefijo de caché de las lecturas de colaboradores; toda escritura lo invalida
+_CACHE_PREFIX = "colaboradores:"
+
 
 @router.post("/", response_model=ColaboradorResponse)
-async def create_colaborador(
+def create_colaborador(
     colaborador: ColaboradorCreate,
     db: Session = Depends(get_db),
     current_user: Usuario = Depends(get_current_active_user)
@@ -25,12 +28,13 @@ async def create_colaborador(
     
     Requiere autenticación.
     """
-    service = ColaboradorService(db)
-    return service.create_colaborador(colaborador)
+    db_colaborador = colaborador_service.create_colaborador(db, colaborador)
+    invalidate(_CACHE_PREFIX, PREFIJO_REPORTES)
+    return db_colaborador
 
 
 @router.get("/", response_model=ColaboradorList)
-async def read_colaboradores(
+def read_colaboradores(
     skip: int = Query(0, ge=0, description="Número de registros a saltar"),
     limit: int = Query(100, ge=1, le=1000, description="Número máximo de registros"),
     activo: Optional[bool] = Query(None, description="Filtrar por estado activo/inactivo"),
@@ -44,30 +48,44 @@ async def read_colaboradores(
     """
     Obtener lista de colaboradores con filtros y paginación.
     
+    La primera página se cachea 30 segundos por combinación de filtros; las
+    escrituras sobre colaboradores la invalidan.
+    
     Requiere autenticación.
     """
-    service = ColaboradorService(db)
-    colaboradores, total = service.get_colaboradores(
-        skip=skip,
-        limit=limit,
-        activo=activo,
-        disponible=disponible,
-        tipo=tipo,
-        departamento=departamento,
-        search=search
-    )
+    def listar() -> ColaboradorList:
+        colaboradores, total = colaborador_service.get_colaboradores(
+            db=db,
+            skip=skip,
+            limit=limit,
+            activo=activo,
+            disponible=disponible,
+            tipo=tipo,
+            departamento=departamento,
+            search=search
+        )
+        
+        return ColaboradorList(
+            colaboradores=colaboradores,
+            total=total,
+            pagina=skip // limit + 1,
+            tamaño_pagina=limit,
+            total_paginas=(total + limit - 1) // limit
+        )
+    
+    if skip > 0:
+        return listar()
     
-    return ColaboradorList(
-        colaboradores=colaboradores,
-        total=total,
-        pagina=skip // limit + 1,
-        tamaño_pagina=limit,
-        total_paginas=math.ceil(total / limit)
+    clave = (limit, activo, disponible, tipo, departamento, search)
+    return cached_response(
+        f"{_CACHE_PREFIX}lista:{clave!r}",
+        30,
+        lambda: listar().model_dump(mode="json")
     )
 
 
 @router.get("/disponibles", response_model=List[ColaboradorResponse])
-async def read_colaboradores_disponibles(
+def read_colaboradores_disponibles(
     db: Session = Depends(get_db),
     current_user: Usuario = Depends(get_current_active_user)
 ):
@@ -76,12 +94,18 @@ async def read_colaboradores_disponibles(
     
     Requiere autenticación.
     """
-    service = ColaboradorService(db)
-    return service.get_colaboradores_disponibles()
+    return cached_response(
+        _CACHE_PREFIX + "disponibles",
+        60,
+        lambda: [
+            ColaboradorResponse.model_validate(c).model_dump(mode="json")
+            for c in colaborador_service.get_colaboradores_disponibles(db)
+        ]
+    )
 
 
 @router.get("/estadisticas", response_model=EstadisticasColaborador)
-async def read_estadisticas_colaboradores(
+def read_estadisticas_colaboradores(
     db: Session = Depends(get_db),
     current_user: Usuario = Depends(get_current_active_user)
 ):
@@ -90,12 +114,15 @@ async def read_estadisticas_colaboradores(
     
     Requiere autenticación.
     """
-    service = ColaboradorService(db)
-    return service.get_estadisticas()
+    return cached_response(
+        _CACHE_PREFIX + "estadisticas",
+        300,
+        lambda: colaborador_service.get_estadisticas(db).model_dump(mode="json")
+    )
 
 
 @router.get("/por-habilidad/{habilidad}", response_model=List[ColaboradorResponse])
-async def read_colaboradores_por_habilidad(
+def read_colaboradores_por_habilidad(
     habilidad: str,
     db: Session = Depends(get_db),
     current_user: Usuario = Depends(get_current_active_user)
@@ -105,12 +132,11 @@ async def read_colaboradores_por_habilidad(
     
     Requiere autenticación.
     """
-    service = ColaboradorService(db)
-    return service.buscar_colaboradores_por_habilidad(habilidad)
+    return colaborador_service.buscar_colaboradores_por_habilidad(db, habilidad)
 
 
 @router.get("/por-departamento/{departamento}", response_model=List[ColaboradorResponse])
-async def read_colaboradores_por_departamento(
+def read_colaboradores_por_departamento(
     departamento: str,
     db: Session = Depends(get_db),
     current_user: Usuario = Depends(get_current_active_user)
@@ -120,12 +146,11 @@ async def read_colaboradores_por_departamento(
     
     Requiere autenticación.
     """
-    service = ColaboradorService(db)
-    return service.get_colaboradores_por_departamento(departamento)
+    return colaborador_service.get_colaboradores_por_departamento(db, departamento)
 
 
 @router.get("/{colaborador_id}", response_model=ColaboradorResponse)
-async def read_colaborador(
+def read_colaborador(
     colaborador_id: int,
     db: Session = Depends(get_db),
     current_user: Usuario = Depends(get_current_active_user)
@@ -135,8 +160,7 @@ async def read_colaborador(
     
     Requiere autenticación.
     """
-    service = ColaboradorService(db)
-    colaborador = service.get_colaborador(colaborador_id)
+    colaborador = colaborador_service.get_colaborador(db, colaborador_id)
     if colaborador is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -146,7 +170,7 @@ async def read_colaborador(
 
 
 @router.put("/{colaborador_id}", response_model=ColaboradorResponse)
-async def update_colaborador(
+def update_colaborador(
     colaborador_id: int,
     colaborador: ColaboradorUpdate,
     db: Session = Depends(get_db),
@@ -157,18 +181,18 @@ async def update_colaborador(
     
     Requiere autenticación.
     """
-    service = ColaboradorService(db)
-    db_colaborador = service.update_colaborador(colaborador_id, colaborador)
+    db_colaborador = colaborador_service.update_colaborador(db, colaborador_id, colaborador)
     if db_colaborador is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Colaborador no encontrado"
         )
+    invalidate(_CACHE_PREFIX, PREFIJO_REPORTES)
     return db_colaborador
 
 
 @router.delete("/{colaborador_id}")
-async def delete_colaborador(
+def delete_colaborador(
     colaborador_id: int,
     db: Session = Depends(get_db),
     current_user: Usuario = Depends(get_current_active_user)
@@ -178,18 +202,18 @@ async def delete_colaborador(
     
     Requiere autenticación.
     """
-    service = ColaboradorService(db)
-    success = service.delete_colaborador(colaborador_id)
+    success = colaborador_service.delete_colaborador(db, colaborador_id)
     if not success:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Colaborador no encontrado"
         )
+    invalidate(_CACHE_PREFIX, PREFIJO_REPORTES)
     return {"message": "Colaborador eliminado exitosamente"}
 
 
 @router.post("/{colaborador_id}/activar", response_model=ColaboradorResponse)
-async def activar_colaborador(
+def activar_colaborador(
     colaborador_id: int,
     db: Session = Depends(get_db),
     current_user: Usuario = Depends(get_current_active_user)
@@ -199,11 +223,11 @@ async def activar_colaborador(
     
     Requiere autenticación.
     """
-    service = ColaboradorService(db)
-    db_colaborador = service.activar_colaborador(colaborador_id)
+    db_colaborador = colaborador_service.activar_colaborador(db, colaborador_id)
     if db_colaborador is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Colaborador no encontrado"
         )
+    invalidate(_CACHE_PREFIX, PREFIJO_REPORTES)
     return db_colaborador
@@ -1,25 +1,31 @@
 """
 Router para gestión de costos rígidos
 """
-from typing import Optional, List
+from typing import Dict, Optional, List
 from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, func, extract
-from datetime import datetime, date
+from sqlalchemy import and_, case, exists, extract, func, literal, select, tuple_, union_all
+from datetime import datetime, date, timedelta
 
 from app.database import get_db
 from app.auth import get_current_user
-from app.models import CostoRigido, Usuario, Proyecto
-from app.schemas import CostoRigidoCreate, CostoRigidoUpdate, CostoRigidoResponse, PaginatedResponse
+from app.cache import PREFIJO_REPORTES, cached_response, invalidate
+from app.models import CostoRigido, Usuario, Proyecto, TipoCosto
+from app.schemas import CostoRigidoCreate, CostoRigidoUpdate, CostoRigidoResponse, CostoRigidoListResponse, PaginatedResponse
+from app.services.base_service import ilike_contiene, normalizar_busqueda
 from app.services.costo_rigido_service import costo_rigido_service
 
 router = APIRouter(prefix="/costos-rigidos", tags=["costos-rigidos"])
 
 # El servicio se importa directamente desde costo_rigido_service
 
+# Prefijo de caché de las lecturas de costos; toda escritura lo invalida
+_CACHE_PREFIX = "costos_rigidos:"
 
-@router.get("", response_model=PaginatedResponse[CostoRigidoResponse])
-async def listar_costos_rigidos(
+
+@router.get("", response_model=PaginatedResponse[CostoRigidoListResponse])
+def listar_costos_rigidos(
     skip: int = Query(0, ge=0, description="Número de registros a omitir"),
     limit: int = Query(10, ge=1, le=100, description="Número de registros a devolver"),
     categoria: Optional[str] = Query(None, description="Filtrar por categoría"),
@@ -28,18 +34,29 @@ async def listar_costos_rigidos(
     proveedor: Optional[str] = Query(None, description="Filtrar por proveedor"),
     frecuencia: Optional[str] = Query(None, description="Filtrar por frecuencia"),
     activo: Optional[bool] = Query(None, description="Filtrar por estado activo"),
+    after_fecha: Optional[datetime] = Query(None, description="Cursor: fecha_aplicacion del último costo recibido"),
+    after_id: Optional[int] = Query(None, description="Cursor: ID del último costo recibido"),
     db: Session = Depends(get_db),
     current_user: Usuario = Depends(get_current_user)
 ):
     """
     Listar costos rígidos con paginación y filtros.
+    
+    Admite paginación keyset: con after_fecha y after_id (el next_cursor de la
+    respuesta anterior) se ignora skip y se continúa tras ese costo sin que la
+    base de datos recorra las filas ya devueltas. En ese modo total cuenta los
+    costos restantes a partir del cursor.
+    
+    La primera página se cachea 30 segundos por combinación de filtros; las
+    escrituras sobre costos la invalidan.
     """
     try:
         # Construir filtros
         filters = []
         
+        categoria = normalizar_busqueda(categoria)
         if categoria:
-            filters.append(CostoRigido.categoria.ilike(f"%{categoria}%"))
+            filters.append(ilike_contiene(CostoRigido.categoria, categoria))
         
         if tipo:
             filters.append(CostoRigido.tipo == tipo)
@@ -47,8 +64,9 @@ async def listar_costos_rigidos(
         if proyecto_id:
             filters.append(CostoRigido.proyecto_id == proyecto_id)
         
+        proveedor = normalizar_busqueda(proveedor)
         if proveedor:
-            filters.append(CostoRigido.proveedor.ilike(f"%{proveedor}%"))
+            filters.append(ilike_contiene(CostoRigido.proveedor, proveedor))
         
         if frecuencia:
             filters.append(CostoRigido.frecuencia == frecuencia)
@@ -56,23 +74,54 @@ async def listar_costos_rigidos(
         if activo is not None:
             filters.append(CostoRigido.activo == activo)
         
-        # Obtener datos paginados
-        result = costo_rigido_service.get_paginated(
-            db=db,
-            skip=skip,
-            limit=limit,
-            filters=filters,
-            order_by=[CostoRigido.fecha_aplicacion.desc()]
+        # Paginación keyset: continuar después del último (fecha, id) recibido
+        primera_pagina = skip == 0
+        if after_fecha is not None and after_id is not None:
+            filters.append(
+                tuple_(CostoRigido.fecha_aplicacion, CostoRigido.id) < tuple_(after_fecha, after_id)
+            )
+            skip = 0
+            primera_pagina = False
+        
+        def listar() -> dict:
+            # Obtener datos paginados (id desempata costos con la misma fecha)
+            result = costo_rigido_service.get_paginated(
+                db=db,
+                skip=skip,
+                limit=limit,
+                filters=filters,
+                order_by=[CostoRigido.fecha_aplicacion.desc(), CostoRigido.id.desc()]
+            )
+            
+            # Cursor de la página siguiente si quedan costos por devolver
+            items = result["items"]
+            if items and result["total"] > skip + len(items):
+                ultimo = items[-1]
+                result["next_cursor"] = {
+                    "after_fecha": ultimo.fecha_aplicacion.isoformat(),
+                    "after_id": ultimo.id
+                }
+            
+            return result
+        
+        if not primera_pagina:
+            return listar()
+        
+        clave = (limit, categoria, tipo, proyecto_id, proveedor, frecuencia, activo)
+        return cached_response(
+            f"{_CACHE_PREFIX}lista:{clave!r}",
+            30,
+            lambda: PaginatedResponse[CostoRigidoListResponse].model_validate(
+                listar()
+            ).model_dump(mode="json")
         )
         
-        return result
-        
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error al obtener costos: {str(e)}")
 
 
 @router.post("", response_model=CostoRigidoResponse, status_code=201)
-async def crear_costo_rigido(
+def crear_costo_rigido(
     costo_data: CostoRigidoCreate,
     db: Session = Depends(get_db),
     current_user: Usuario = Depends(get_current_user)
@@ -83,14 +132,19 @@ async def crear_costo_rigido(
     try:
         # Verificar que el proyecto existe (si se especifica)
         if costo_data.proyecto_id:
-            proyecto = db.query(Proyecto).filter(Proyecto.id == costo_data.proyecto_id).first()
-            if not proyecto:
+            # SELECT EXISTS: no se carga el proyecto completo
+            proyecto_existe = db.scalar(
+                select(exists().where(Proyecto.id == costo_data.proyecto_id))
+            )
+            if not proyecto_existe:
                 raise HTTPException(status_code=404, detail="Proyecto no encontrado")
         
         # El costo está listo para crear (sin validación de fecha_fin porque no existe)
         
         # Crear costo
-        costo = costo_rigido_service.create(db=db, obj_data=costo_data.dict())
+        # Sin los campos omitidos: fecha_aplicacion toma el valor por defecto
+        costo = costo_rigido_service.create(db=db, obj_data=costo_data.model_dump(exclude_none=True))
+        invalidate(_CACHE_PREFIX, PREFIJO_REPORTES)
         
         return costo
         
@@ -100,8 +154,9 @@ async def crear_costo_rigido(
         raise HTTPException(status_code=500, detail=f"Error al crear costo: {str(e)}")
 
 
-@router.get("/{costo_id}", response_model=CostoRigidoResponse)
-async def obtener_costo_rigido(
+# ":int" evita que esta ruta capture /calcular-proyeccion, declarada más abajo
+@router.get("/{costo_id:int}", response_model=CostoRigidoResponse)
+def obtener_costo_rigido(
     costo_id: int,
     db: Session = Depends(get_db),
     current_user: Usuario = Depends(get_current_user)
@@ -122,8 +177,8 @@ async def obtener_costo_rigido(
         raise HTTPException(status_code=500, detail=f"Error al obtener costo: {str(e)}")
 
 
-@router.put("/{costo_id}", response_model=CostoRigidoResponse)
-async def actualizar_costo_rigido(
+@router.put("/{costo_id:int}", response_model=CostoRigidoResponse)
+def actualizar_costo_rigido(
     costo_id: int,
     costo_data: CostoRigidoUpdate,
     db: Session = Depends(get_db),
@@ -133,19 +188,23 @@ async def actualizar_costo_rigido(
     Actualizar costo rígido existente.
     """
     try:
-        # Verificar que el costo existe
-        costo_existente = costo_rigido_service.get_by_id(db=db, obj_id=costo_id)
+        # Verificar que el costo existe y bloquear la fila: la comprobación del
+        # proyecto y el update corren en la misma transacción hasta el commit
+        costo_existente = costo_rigido_service.get_by_id(db=db, obj_id=costo_id, for_update=True)
         if not costo_existente:
             raise HTTPException(status_code=404, detail="Costo no encontrado")
         
         # Verificar proyecto si se está actualizando
         if costo_data.proyecto_id:
-            proyecto = db.query(Proyecto).filter(Proyecto.id == costo_data.proyecto_id).first()
-            if not proyecto:
+            # SELECT EXISTS: no se carga el proyecto completo
+            proyecto_existe = db.scalar(
+                select(exists().where(Proyecto.id == costo_data.proyecto_id))
+            )
+            if not proyecto_existe:
                 raise HTTPException(status_code=404, detail="Proyecto no encontrado")
         
         # Validar fechas si se están actualizando
-        update_dict = costo_data.dict(exclude_unset=True)
+        update_dict = costo_data.model_dump(exclude_unset=True)
         fecha_aplicacion = update_dict.get('fecha_aplicacion', costo_existente.fecha_aplicacion)
         # Actualizar costo (sin validación de fecha_fin porque no existe)
         costo = costo_rigido_service.update(
@@ -153,6 +212,7 @@ async def actualizar_costo_rigido(
             obj_id=costo_id, 
             obj_data=update_dict
         )
+        invalidate(_CACHE_PREFIX, PREFIJO_REPORTES)
         
         return costo
         
@@ -162,8 +222,8 @@ async def actualizar_costo_rigido(
         raise HTTPException(status_code=500, detail=f"Error al actualizar costo: {str(e)}")
 
 
-@router.delete("/{costo_id}")
-async def eliminar_costo_rigido(
+@router.delete("/{costo_id:int}")
+def eliminar_costo_rigido(
     costo_id: int,
     db: Session = Depends(get_db),
     current_user: Usuario = Depends(get_current_user)
@@ -172,13 +232,14 @@ async def eliminar_costo_rigido(
     Eliminar costo rígido (soft delete).
     """
     try:
-        # Verificar que el costo existe
-        costo = costo_rigido_service.get_by_id(db=db, obj_id=costo_id)
+        # Verificar que el costo existe y bloquear la fila hasta el commit
+        costo = costo_rigido_service.get_by_id(db=db, obj_id=costo_id, for_update=True)
         if not costo:
             raise HTTPException(status_code=404, detail="Costo no encontrado")
         
         # Soft delete
         costo_rigido_service.delete(db=db, obj_id=costo_id)
+        invalidate(_CACHE_PREFIX, PREFIJO_REPORTES)
         
         return {"message": "Costo eliminado exitosamente"}
         
@@ -188,8 +249,140 @@ async def eliminar_costo_rigido(
         raise HTTPException(status_code=500, detail=f"Error al eliminar costo: {str(e)}")
 
 
+def _calcular_estadisticas(db: Session) -> dict:
+    """
+    Calcular las estadísticas generales de costos rígidos.
+    
+    Args:
+        db: Sesión de base de datos
+        
+    Returns:
+        dict: Estadísticas generales, por categoría, frecuencia, proyecto y mes
+    """
+    # Una sola pasada sobre los costos activos: se agrupa por la combinación
+    # categoría/frecuencia/tipo (pocas filas) y a partir de ella se acumulan
+    # los totales generales, por tipo, por categoría y por frecuencia
+    grupos = db.query(
+        CostoRigido.categoria,
+        CostoRigido.frecuencia,
+        CostoRigido.tipo,
+        func.count(CostoRigido.id).label("cantidad"),
+        func.sum(CostoRigido.valor).label("monto_total")
+    ).filter(
+        CostoRigido.activo == True
+    ).group_by(
+        CostoRigido.categoria,
+        CostoRigido.frecuencia,
+        CostoRigido.tipo
+    ).all()
+    
+    total_costos = 0
+    monto_total = 0.0
+    por_tipo = {tipo: 0 for tipo in TipoCosto}
+    por_categoria: Dict[Optional[str], List] = {}
+    por_frecuencia: Dict[Optional[str], List] = {}
+    for grupo in grupos:
+        monto = float(grupo.monto_total or 0)
+        total_costos += grupo.cantidad
+        monto_total += monto
+        por_tipo[grupo.tipo] += grupo.cantidad
+        
+        categoria = por_categoria.setdefault(grupo.categoria, [0, 0.0])
+        categoria[0] += grupo.cantidad
+        categoria[1] += monto
+        
+        frecuencia = por_frecuencia.setdefault(grupo.frecuencia, [0, 0.0])
+        frecuencia[0] += grupo.cantidad
+        frecuencia[1] += monto
+    
+    # Costos por proyecto
+    stats_proyecto = db.query(
+        Proyecto.nombre.label("proyecto_nombre"),
+        func.count(CostoRigido.id).label("cantidad_costos"),
+        func.sum(CostoRigido.valor).label("monto_total")
+    ).join(
+        Proyecto, CostoRigido.proyecto_id == Proyecto.id, isouter=True
+    ).filter(
+        CostoRigido.activo == True
+    ).group_by(
+        Proyecto.id, Proyecto.nombre
+    ).order_by(
+        func.sum(CostoRigido.valor).desc()
+    ).limit(10).all()
+    
+    # Costos mensuales (últimos 12 meses)
+    costos_mensuales = db.query(
+        extract('year', CostoRigido.fecha_aplicacion).label('año'),
+        extract('month', CostoRigido.fecha_aplicacion).label('mes'),
+        func.count(CostoRigido.id).label('cantidad'),
+        func.sum(CostoRigido.valor).label('monto_total')
+    ).filter(
+        and_(
+            CostoRigido.activo == True,
+            CostoRigido.fecha_aplicacion >= datetime.now() - timedelta(days=365)
+        )
+    ).group_by(
+        extract('year', CostoRigido.fecha_aplicacion),
+        extract('month', CostoRigido.fecha_aplicacion)
+    ).order_by(
+        extract('year', CostoRigido.fecha_aplicacion),
+        extract('month', CostoRigido.fecha_aplicacion)
+    ).all()
+    
+    return {
+        "generales": {
+            "total_costos": total_costos,
+            "por_tipo": {
+                "fijos": por_tipo[TipoCosto.FIJO],
+                "variables": por_tipo[TipoCosto.VARIABLE],
+                "recurrentes": por_tipo[TipoCosto.RECURRENTE]
+            },
+            "montos": {
+                "total": monto_total,
+                "promedio": monto_total / total_costos if total_costos else 0.0
+            }
+        },
+        "por_categoria": [
+            {
+                "categoria": categoria,
+                "cantidad": cantidad,
+                "monto_total": monto,
+                "monto_promedio": monto / cantidad
+            }
+            for categoria, (cantidad, monto) in sorted(
+                por_categoria.items(), key=lambda item: item[1][1], reverse=True
+            )
+        ],
+        "por_frecuencia": [
+            {
+                "frecuencia": frecuencia,
+                "cantidad": cantidad,
+                "monto_total": monto
+            }
+            for frecuencia, (cantidad, monto) in por_frecuencia.items()
+        ],
+        "por_proyecto": [
+            {
+                "proyecto": row.proyecto_nombre or "Sin proyecto",
+                "cantidad_costos": row.cantidad_costos,
+                "monto_total": float(row.monto_total or 0)
+            }
+            for row in stats_proyecto
+        ],
+        "mensuales": [
+            {
+                "año": int(row.año),
+                "mes": int(row.mes),
+                "cantidad": row.cantidad,
+                "monto_total": float(row.monto_total or 0)
+            }
+            for row in costos_mensuales
+        ]
+    }
+
+
 @router.get("/estadisticas/resumen")
-async def obtener_estadisticas_costos(
+def obtener_estadisticas_costos(
     db: Session = Depends(get_db),
     current_user: Usuario = Depends(get_current_user)
 ):
@@ -197,130 +390,65 @@ async def obtener_estadisticas_costos(
     Obtener estadísticas generales de costos rígidos.
     """
     try:
-        # Estadísticas generales
-        stats_generales = db.query(
-            func.count(CostoRigido.id).label("total_costos"),
-            func.count().filter(CostoRigido.tipo == "fijo").label("costos_fijos"),
-            func.count().filter(CostoRigido.tipo == "variable").label("costos_variables"),
-            func.count().filter(CostoRigido.tipo == "recurrente").label("costos_recurrentes"),
-            func.sum(CostoRigido.monto).label("monto_total"),
-            func.avg(CostoRigido.monto).label("monto_promedio")
-        ).filter(CostoRigido.activo == True).first()
-        
-        # Estadísticas por categoría
-        stats_categoria = db.query(
-            CostoRigido.categoria,
-            func.count(CostoRigido.id).label("cantidad"),
-            func.sum(CostoRigido.monto).label("monto_total"),
-            func.avg(CostoRigido.monto).label("monto_promedio")
-        ).filter(
-            CostoRigido.activo == True
-        ).group_by(
-            CostoRigido.categoria
-        ).order_by(
-            func.sum(CostoRigido.monto).desc()
-        ).all()
-        
-        # Estadísticas por frecuencia
-        stats_frecuencia = db.query(
-            CostoRigido.frecuencia,
-            func.count(CostoRigido.id).label("cantidad"),
-            func.sum(CostoRigido.monto).label("monto_total")
-        ).filter(
-            CostoRigido.activo == True
-        ).group_by(
-            CostoRigido.frecuencia
-        ).all()
-        
-        # Costos por proyecto
-        stats_proyecto = db.query(
-            Proyecto.nombre.label("proyecto_nombre"),
-            func.count(CostoRigido.id).label("cantidad_costos"),
-            func.sum(CostoRigido.monto).label("monto_total")
-        ).join(
-            Proyecto, CostoRigido.proyecto_id == Proyecto.id, isouter=True
-        ).filter(
-            CostoRigido.activo == True
-        ).group_by(
-            Proyecto.id, Proyecto.nombre
-        ).order_by(
-            func.sum(CostoRigido.monto).desc()
-        ).limit(10).all()
-        
-        # Costos mensuales (últimos 12 meses)
-        costos_mensuales = db.query(
-            extract('year', CostoRigido.fecha_aplicacion).label('año'),
-            extract('month', CostoRigido.fecha_aplicacion).label('mes'),
-            func.count(CostoRigido.id).label('cantidad'),
-            func.sum(CostoRigido.valor).label('monto_total')
-        ).filter(
-            and_(
-                CostoRigido.activo == True,
-                CostoRigido.fecha_aplicacion >= func.current_date() - func.interval('12 months')
-            )
-        ).group_by(
-            extract('year', CostoRigido.fecha_aplicacion),
-            extract('month', CostoRigido.fecha_aplicacion)
-        ).order_by(
-            extract('year', CostoRigido.fecha_aplicacion),
-            extract('month', CostoRigido.fecha_aplicacion)
-        ).all()
-        
-        return {
-            "generales": {
-                "total_costos": stats_generales.total_costos or 0,
-                "por_tipo": {
-                    "fijos": stats_generales.costos_fijos or 0,
-                    "variables": stats_generales.costos_variables or 0,
-                    "recurrentes": stats_generales.costos_recurrentes or 0
-                },
-                "montos": {
-                    "total": float(stats_generales.monto_total or 0),
-                    "promedio": float(stats_generales.monto_promedio or 0)
-                }
-            },
-            "por_categoria": [
-                {
-                    "categoria": row.categoria,
-                    "cantidad": row.cantidad,
-                    "monto_total": float(row.monto_total or 0),
-                    "monto_promedio": float(row.monto_promedio or 0)
-                }
-                for row in stats_categoria
-            ],
-            "por_frecuencia": [
-                {
-                    "frecuencia": row.frecuencia,
-                    "cantidad": row.cantidad,
-                    "monto_total": float(row.monto_total or 0)
-                }
-                for row in stats_frecuencia
-            ],
-            "por_proyecto": [
-                {
-                    "proyecto": row.proyecto_nombre or "Sin proyecto",
-                    "cantidad_costos": row.cantidad_costos,
-                    "monto_total": float(row.monto_total or 0)
-                }
-                for row in stats_proyecto
-            ],
-            "mensuales": [
-                {
-                    "año": int(row.año),
-                    "mes": int(row.mes),
-                    "cantidad": row.cantidad,
-                    "monto_total": float(row.monto_total or 0)
-                }
-                for row in costos_mensuales
-            ]
-        }
+        # Las escrituras invalidan la entrada; el TTL solo acota el desfase de
+        # la ventana de 12 meses, así que los agregados se recalculan como
+        # mucho cada 5 minutos
+        return cached_response(_CACHE_PREFIX + "estadisticas", 300, lambda: _calcular_estadisticas(db))
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error al obtener estadísticas: {str(e)}")
 
 
+def _calcular_categorias(db: Session) -> dict:
+    """
+    Obtener las categorías únicas de los costos activos.
+    
+    Args:
+        db: Sesión de base de datos
+        
+    Returns:
+        dict: Lista de categorías
+    """
+    # Los nulos y vacíos se descartan en SQL; se obtienen cadenas, no filas
+    categorias = db.scalars(
+        select(CostoRigido.categoria).where(
+            CostoRigido.activo == True,
+            CostoRigido.categoria.is_not(None),
+            CostoRigido.categoria != ""
+        ).distinct()
+    ).all()
+    
+    return {
+        "categorias": categorias
+    }
+
+
+def _calcular_proveedores(db: Session) -> dict:
+    """
+    Obtener los proveedores únicos de los costos activos.
+    
+    Args:
+        db: Sesión de base de datos
+        
+    Returns:
+        dict: Lista de proveedores
+    """
+    # Los nulos y vacíos se descartan en SQL; se obtienen cadenas, no filas
+    proveedores = db.scalars(
+        select(CostoRigido.proveedor).where(
+            CostoRigido.activo == True,
+            CostoRigido.proveedor.is_not(None),
+            CostoRigido.proveedor != ""
+        ).distinct()
+    ).all()
+    
+    return {
+        "proveedores": proveedores
+    }
+
+
 @router.get("/categorias/lista")
-async def listar_categorias(
+def listar_categorias(
     db: Session = Depends(get_db),
     current_user: Usuario = Depends(get_current_user)
 ):
@@ -328,20 +456,14 @@ async def listar_categorias(
     Obtener lista de categorías únicas de costos.
     """
     try:
-        categorias = db.query(CostoRigido.categoria).filter(
-            CostoRigido.activo == True
-        ).distinct().all()
-        
-        return {
-            "categorias": [cat[0] for cat in categorias if cat[0]]
-        }
+        return cached_response(_CACHE_PREFIX + "categorias", 3600, lambda: _calcular_categorias(db))
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error al obtener categorías: {str(e)}")
 
 
 @router.get("/proveedores/lista")
-async def listar_proveedores(
+def listar_proveedores(
     db: Session = Depends(get_db),
     current_user: Usuario = Depends(get_current_user)
 ):
@@ -349,23 +471,14 @@ async def listar_proveedores(
     Obtener lista de proveedores únicos.
     """
     try:
-        proveedores = db.query(CostoRigido.proveedor).filter(
-            and_(
-                CostoRigido.activo == True,
-                CostoRigido.proveedor.is_not(None)
-            )
-        ).distinct().all()
-        
-        return {
-            "proveedores": [prov[0] for prov in proveedores if prov[0]]
-        }
+        return cached_response(_CACHE_PREFIX + "proveedores", 3600, lambda: _calcular_proveedores(db))
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error al obtener proveedores: {str(e)}")
 
 
 @router.get("/calcular-proyeccion")
-async def calcular_proyeccion_costos(
+def calcular_proyeccion_costos(
     proyecto_id: Optional[int] = Query(None, description="ID del proyecto (opcional)"),
     meses: int = Query(12, ge=1, le=60, description="Número de meses a proyectar"),
     db: Session = Depends(get_db),
@@ -375,60 +488,68 @@ async def calcular_proyeccion_costos(
     Calcular proyección de costos para un período determinado.
     """
     try:
-        # Construir filtros
-        filters = [CostoRigido.activo == True]
-        
+        # Primer día de cada mes proyectado (el mes 1 es el mes actual)
+        inicio = date.today().replace(day=1)
+        fechas = []
+        for mes in range(1, meses + 1):
+            años, indice_mes = divmod(inicio.month - 1 + mes - 1, 12)
+            fechas.append(datetime(inicio.year + años, indice_mes + 1, 1))
+        
+        # Serie de meses como CTE (UNION ALL de literales, portable entre motores)
+        serie = union_all(*[
+            select(literal(mes).label("mes"), literal(fecha).label("fecha"))
+            for mes, fecha in enumerate(fechas, start=1)
+        ]).cte("meses")
+        
+        # Cada costo se une a los meses en los que ya está vigente
+        condiciones = [
+            CostoRigido.activo == True,
+            CostoRigido.fecha_aplicacion <= serie.c.fecha
+        ]
         if proyecto_id:
-            filters.append(CostoRigido.proyecto_id == proyecto_id)
-        
-        # Obtener costos activos
-        costos = db.query(CostoRigido).filter(and_(*filters)).all()
-        
-        # Calcular proyección
-        proyeccion_mensual = []
-        total_proyectado = 0
+            condiciones.append(CostoRigido.proyecto_id == proyecto_id)
+        
+        # Monto de cada costo en cada mes según su frecuencia
+        monto_mes = case(
+            (CostoRigido.frecuencia == "mensual", CostoRigido.valor),
+            (and_(CostoRigido.frecuencia == "trimestral", serie.c.mes % 3 == 1), CostoRigido.valor),
+            (and_(CostoRigido.frecuencia == "semestral", serie.c.mes % 6 == 1), CostoRigido.valor),
+            (and_(CostoRigido.frecuencia.in_(("anual", "unico")), serie.c.mes == 1), CostoRigido.valor),
+            else_=0
+        )
         
-        for mes in range(1, meses + 1):
-            costo_mes = 0
-            
-            for costo in costos:
-                # Verificar si el costo aplica para este mes
-                fecha_actual = date.today().replace(day=1)
-                fecha_mes = date(fecha_actual.year, fecha_actual.month + mes - 1, 1)
-                
-                # Verificar si está en el rango de fechas del costo
-                if fecha_mes < costo.fecha_aplicacion:
-                    continue
-                
-                # Sin fecha_fin, el costo se aplica indefinidamente
-                
-                # Calcular monto según frecuencia
-                if costo.frecuencia == "mensual":
-                    costo_mes += costo.monto
-                elif costo.frecuencia == "trimestral" and mes % 3 == 1:
-                    costo_mes += costo.monto
-                elif costo.frecuencia == "semestral" and mes % 6 == 1:
-                    costo_mes += costo.monto
-                elif costo.frecuencia == "anual" and mes == 1:
-                    costo_mes += costo.monto
-                elif costo.frecuencia == "unico" and mes == 1:
-                    costo_mes += costo.monto
-            
-            proyeccion_mensual.append({
-                "mes": mes,
-                "fecha": fecha_mes.isoformat(),
-                "costo_proyectado": float(costo_mes)
-            })
-            
-            total_proyectado += costo_mes
+        # Proyección completa en una sola consulta agregada
+        filas = db.execute(
+            select(
+                serie.c.mes,
+                func.coalesce(func.sum(monto_mes), 0).label("costo_proyectado")
+            ).select_from(
+                serie.outerjoin(CostoRigido, and_(*condiciones))
+            ).group_by(
+                serie.c.mes
+            ).order_by(
+                serie.c.mes
+            )
+        ).all()
         
-        return {
+        proyeccion_mensual = [
+            {
+                "mes": fila.mes,
+                "fecha": fechas[fila.mes - 1].date().isoformat(),
+                "costo_proyectado": float(fila.costo_proyectado)
+            }
+            for fila in filas
+        ]
+        total_proyectado = sum(fila["costo_proyectado"] for fila in proyeccion_mensual)
+        
+        # Ya es JSON nativo: ORJSONResponse directa evita el jsonable_encoder
+        return ORJSONResponse({
             "proyecto_id": proyecto_id,
             "periodo_meses": meses,
             "total_proyectado": float(total_proyectado),
             "promedio_mensual": float(total_proyectado / meses) if meses > 0 else 0,
             "detalle_mensual": proyeccion_mensual
-        }
+        })
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error al calcular proyección: {str(e)}")
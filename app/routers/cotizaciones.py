@@ -3,16 +3,22 @@ Router para gestión de cotizaciones
 """
 from typing import Optional, List
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, func
+from sqlalchemy.orm import Session, raiseload
+from sqlalchemy import and_, case, delete, exists, func, insert, select, tuple_, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from datetime import datetime, date
+from calendar import monthrange
 
 from app.database import get_db
 from app.auth import get_current_user
-from app.models import Cotizacion, ItemCotizacion, Usuario, Cliente, Proyecto
+from app.cache import PREFIJO_REPORTES, cached_response, invalidate
+from app.models import (
+    Cotizacion, ContadorNumeracion, EstadoCotizacion, ItemCotizacion, Usuario, Cliente, Proyecto
+)
 from app.schemas import (
-    CotizacionCreate, CotizacionUpdate, CotizacionResponse, 
-    ItemCotizacionCreate, PaginatedResponse
+    CotizacionCreate, CotizacionUpdate, CotizacionResponse, CotizacionListResponse,
+    EstadoCotizacionEnum, ItemCotizacionCreate, PaginatedResponse
 )
 from app.services.cotizacion_service import cotizacion_service
 
@@ -20,27 +26,59 @@ router = APIRouter(prefix="/cotizaciones", tags=["cotizaciones"])
 
 # El servicio se importa directamente desde cotizacion_service
 
+# Prefijo de caché de las lecturas de cotizaciones; toda escritura lo invalida
+_CACHE_PREFIX = "cotizaciones:"
 
-def generar_numero_cotizacion(db: Session) -> str:
+
+def reservar_numeros_cotizacion(db: Session, cantidad: int) -> List[str]:
     """
-    Generar número único para la cotización.
+    Reservar un bloque de números consecutivos para nuevas cotizaciones.
+    
+    Los números salen de un contador por mes que se incrementa en la misma
+    transacción que crea las cotizaciones: la fila del contador queda
+    bloqueada hasta el commit y las peticiones concurrentes esperan su turno.
+    Todo el bloque se reserva con una sola sentencia.
     """
-    year = datetime.now().year
-    month = datetime.now().month
+    # Una sola lectura del reloj: año y mes deben ser del mismo instante
+    ahora = datetime.now()
+    prefijo = f"COT-{ahora.year:04d}{ahora.month:02d}"
     
-    # Buscar el último número del mes actual
-    last_cotizacion = db.query(Cotizacion).filter(
-        Cotizacion.numero.like(f"COT-{year:04d}{month:02d}-%")
-    ).order_by(Cotizacion.numero.desc()).first()
+    # Caso habitual: el contador del mes ya existe
+    ultimo = db.scalar(
+        update(ContadorNumeracion)
+        .where(ContadorNumeracion.prefijo == prefijo)
+        .values(ultimo=ContadorNumeracion.ultimo + cantidad)
+        .returning(ContadorNumeracion.ultimo)
+    )
     
-    if last_cotizacion:
-        # Extraer el número secuencial y incrementar
-        last_number = int(last_cotizacion.numero.split("-")[-1])
-        new_number = last_number + 1
-    else:
-        new_number = 1
+    if ultimo is None:
+        # Primer número del mes: continuar desde el último ya emitido, por si
+        # hay cotizaciones numeradas antes de existir el contador
+        last_numero = db.scalar(
+            select(Cotizacion.numero).where(
+                Cotizacion.numero.like(f"{prefijo}-%")
+            ).order_by(Cotizacion.numero.desc()).limit(1)
+        )
+        anterior = int(last_numero.split("-")[-1]) if last_numero else 0
+        
+        # Si otra petición creó el contador entretanto, se incrementa el suyo
+        insert_dialecto = pg_insert if db.get_bind().dialect.name == "postgresql" else sqlite_insert
+        stmt = insert_dialecto(ContadorNumeracion).values(prefijo=prefijo, ultimo=anterior + cantidad)
+        ultimo = db.scalar(
+            stmt.on_conflict_do_update(
+                index_elements=[ContadorNumeracion.prefijo],
+                set_={"ultimo": ContadorNumeracion.ultimo + cantidad}
+            ).returning(ContadorNumeracion.ultimo)
+        )
     
-    return f"COT-{year:04d}{month:02d}-{new_number:04d}"
+    return [f"{prefijo}-{numero:04d}" for numero in range(ultimo - cantidad + 1, ultimo + 1)]
+
+
+def generar_numero_cotizacion(db: Session) -> str:
+    """
+    Generar número único para la cotización.
+    """
+    return reservar_numeros_cotizacion(db, 1)[0]
 
 
 def calcular_totales_cotizacion(items: List[ItemCotizacionCreate]) -> dict:
@@ -62,8 +100,38 @@ def calcular_totales_cotizacion(items: List[ItemCotizacionCreate]) -> dict:
     }
 
 
-@router.get("", response_model=PaginatedResponse[CotizacionResponse])
-async def listar_cotizaciones(
+def filas_items_cotizacion(cotizacion_id: int, items: List[ItemCotizacionCreate]) -> List[dict]:
+    """
+    Construir las filas de los items de una cotización para un INSERT por lotes.
+    """
+    return [
+        {
+            "cotizacion_id": cotizacion_id,
+            "descripcion": item_data.descripcion,
+            "cantidad": item_data.cantidad,
+            "precio_unitario": item_data.precio_unitario,
+            "subtotal": item_data.cantidad * item_data.precio_unitario,
+            "orden": idx + 1
+        }
+        for idx, item_data in enumerate(items)
+    ]
+
+
+def insertar_items_cotizacion(db: Session, cotizacion_id: int, items: List[ItemCotizacionCreate]) -> None:
+    """
+    Insertar los items de una cotización en un único INSERT por lotes.
+    
+    No se crean objetos ORM por item: las filas se envían como diccionarios
+    en un solo executemany.
+    """
+    if not items:
+        return
+    
+    db.execute(insert(ItemCotizacion), filas_items_cotizacion(cotizacion_id, items))
+
+
+@router.get("", response_model=PaginatedResponse[CotizacionListResponse])
+def listar_cotizaciones(
     skip: int = Query(0, ge=0, description="Número de registros a omitir"),
     limit: int = Query(10, ge=1, le=100, description="Número de registros a devolver"),
     cliente_id: Optional[int] = Query(None, description="Filtrar por cliente"),
@@ -71,48 +139,67 @@ async def listar_cotizaciones(
     estado: Optional[str] = Query(None, description="Filtrar por estado"),
     fecha_desde: Optional[date] = Query(None, description="Filtrar desde fecha"),
     fecha_hasta: Optional[date] = Query(None, description="Filtrar hasta fecha"),
+    after_fecha: Optional[datetime] = Query(None, description="Cursor: fecha_creacion de la última cotización recibida"),
+    after_id: Optional[int] = Query(None, description="Cursor: ID de la última cotización recibida"),
     db: Session = Depends(get_db),
     current_user: Usuario = Depends(get_current_user)
 ):
     """
     Listar cotizaciones con paginación y filtros.
+    
+    Admite paginación keyset: con after_fecha y after_id (el next_cursor de la
+    respuesta anterior) se ignora skip y se continúa tras esa cotización sin
+    que la base de datos recorra las filas ya devueltas. En ese modo total
+    cuenta las cotizaciones restantes a partir del cursor.
     """
-    try:
-        # Construir filtros
-        filters = [Cotizacion.activo == True]
-        
-        if cliente_id:
-            filters.append(Cotizacion.cliente_id == cliente_id)
-        
-        if proyecto_id:
-            filters.append(Cotizacion.proyecto_id == proyecto_id)
-        
-        if estado:
-            filters.append(Cotizacion.estado == estado)
-        
-        if fecha_desde:
-            filters.append(Cotizacion.fecha_creacion >= fecha_desde)
-        
-        if fecha_hasta:
-            filters.append(Cotizacion.fecha_creacion <= fecha_hasta)
-        
-        # Obtener datos paginados
-        result = cotizacion_service.get_paginated(
-            db=db,
-            skip=skip,
-            limit=limit,
-            filters=filters,
-            order_by=[Cotizacion.fecha_creacion.desc()]
+    # Construir filtros
+    filters = [Cotizacion.activo == True]
+    
+    if cliente_id:
+        filters.append(Cotizacion.cliente_id == cliente_id)
+    
+    if proyecto_id:
+        filters.append(Cotizacion.proyecto_id == proyecto_id)
+    
+    if estado:
+        filters.append(Cotizacion.estado == estado)
+    
+    if fecha_desde:
+        filters.append(Cotizacion.fecha_creacion >= fecha_desde)
+    
+    if fecha_hasta:
+        filters.append(Cotizacion.fecha_creacion <= fecha_hasta)
+    
+    # Paginación keyset: continuar después de la última (fecha, id) recibida
+    if after_fecha is not None and after_id is not None:
+        filters.append(
+            tuple_(Cotizacion.fecha_creacion, Cotizacion.id) < tuple_(after_fecha, after_id)
         )
-        
-        return result
-        
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error al obtener cotizaciones: {str(e)}")
+        skip = 0
+    
+    # Obtener datos paginados (id desempata cotizaciones con la misma fecha)
+    result = cotizacion_service.get_paginated(
+        db=db,
+        skip=skip,
+        limit=limit,
+        filters=filters,
+        order_by=[Cotizacion.fecha_creacion.desc(), Cotizacion.id.desc()]
+    )
+    
+    # Cursor de la página siguiente si quedan cotizaciones por devolver
+    items = result["items"]
+    if items and result["total"] > skip + len(items):
+        ultima = items[-1]
+        result["next_cursor"] = {
+            "after_fecha": ultima.fecha_creacion.isoformat(),
+            "after_id": ultima.id
+        }
+    
+    return result
 
 
 @router.post("", response_model=CotizacionResponse, status_code=201)
-async def crear_cotizacion(
+def crear_cotizacion(
     cotizacion_data: CotizacionCreate,
     db: Session = Depends(get_db),
     current_user: Usuario = Depends(get_current_user)
@@ -120,63 +207,118 @@ async def crear_cotizacion(
     """
     Crear una nueva cotización con sus items.
     """
-    try:
-        # Verificar que el cliente existe
-        cliente = db.query(Cliente).filter(Cliente.id == cotizacion_data.cliente_id).first()
-        if not cliente:
-            raise HTTPException(status_code=404, detail="Cliente no encontrado")
-        
-        # Verificar que el proyecto existe (si se especifica)
-        if cotizacion_data.proyecto_id:
-            proyecto = db.query(Proyecto).filter(Proyecto.id == cotizacion_data.proyecto_id).first()
-            if not proyecto:
-                raise HTTPException(status_code=404, detail="Proyecto no encontrado")
-        
-        # Calcular totales
-        totales = calcular_totales_cotizacion(cotizacion_data.items)
-        
-        # Generar número de cotización
-        numero = generar_numero_cotizacion(db)
-        
-        # Crear cotización
-        cotizacion_dict = cotizacion_data.dict(exclude={"items"})
-        cotizacion_dict.update({
-            "numero": numero,
-            "subtotal": totales["subtotal"],
-            "impuestos": totales["impuestos"],
-            "total": totales["total"]
-        })
-        
-        cotizacion = Cotizacion(**cotizacion_dict)
-        db.add(cotizacion)
-        db.flush()  # Para obtener el ID
-        
-        # Crear items de la cotizacion
-        for idx, item_data in enumerate(cotizacion_data.items):
-            item = ItemCotizacion(
-                cotizacion_id=cotizacion.id,
-                descripcion=item_data.descripcion,
-                cantidad=item_data.cantidad,
-                precio_unitario=item_data.precio_unitario,
-                subtotal=item_data.cantidad * item_data.precio_unitario,
-                orden=idx + 1
-            )
-            db.add(item)
-        
-        db.commit()
-        db.refresh(cotizacion)
-        
-        return cotizacion
-        
-    except HTTPException:
-        raise
-    except Exception as e:
-        db.rollback()
-        raise HTTPException(status_code=500, detail=f"Error al crear cotización: {str(e)}")
+    # Verificar cliente y proyecto (si se especifica) en una sola consulta
+    # de dos SELECT EXISTS, sin cargar ninguna de las filas
+    existentes = db.execute(
+        select(
+            exists().where(Cliente.id == cotizacion_data.cliente_id).label("cliente"),
+            exists().where(Proyecto.id == cotizacion_data.proyecto_id).label("proyecto")
+        )
+    ).one()
+    if not existentes.cliente:
+        raise HTTPException(status_code=404, detail="Cliente no encontrado")
+    
+    if cotizacion_data.proyecto_id and not existentes.proyecto:
+        raise HTTPException(status_code=404, detail="Proyecto no encontrado")
+    
+    # Calcular totales
+    totales = calcular_totales_cotizacion(cotizacion_data.items)
+    
+    # Generar número de cotización
+    numero = generar_numero_cotizacion(db)
+    
+    # Crear cotización
+    cotizacion_dict = cotizacion_data.model_dump(exclude={"items"})
+    cotizacion_dict.update({
+        "numero": numero,
+        "subtotal": totales["subtotal"],
+        "impuestos": totales["impuestos"],
+        "total": totales["total"]
+    })
+    
+    cotizacion = Cotizacion(**cotizacion_dict)
+    db.add(cotizacion)
+    db.flush()  # Para obtener el ID
+    
+    # Crear items de la cotizacion
+    insertar_items_cotizacion(db, cotizacion.id, cotizacion_data.items)
+    
+    db.commit()
+    invalidate(_CACHE_PREFIX, PREFIJO_REPORTES)
+    db.refresh(cotizacion)
+    
+    return cotizacion
+
+
+@router.post("/bulk", response_model=List[CotizacionResponse], status_code=201)
+def crear_cotizaciones_bulk(
+    cotizaciones_data: List[CotizacionCreate],
+    db: Session = Depends(get_db),
+    current_user: Usuario = Depends(get_current_user)
+):
+    """
+    Crear varias cotizaciones con sus items en una sola transacción.
+    
+    Pensado para importaciones: los clientes y proyectos referenciados se
+    verifican con una consulta IN por tabla, los números se reservan en
+    bloque y cotizaciones e items se insertan con un INSERT por lotes cada
+    uno. Si alguna referencia no existe no se crea ninguna cotización.
+    """
+    if not cotizaciones_data:
+        return []
+    
+    # Verificar todos los clientes y proyectos referenciados de una vez
+    cliente_ids = {c.cliente_id for c in cotizaciones_data}
+    clientes = set(db.scalars(select(Cliente.id).where(Cliente.id.in_(cliente_ids))))
+    faltantes = sorted(cliente_ids - clientes)
+    if faltantes:
+        raise HTTPException(status_code=404, detail=f"Clientes no encontrados: {faltantes}")
+    
+    proyecto_ids = {c.proyecto_id for c in cotizaciones_data if c.proyecto_id}
+    if proyecto_ids:
+        proyectos = set(db.scalars(select(Proyecto.id).where(Proyecto.id.in_(proyecto_ids))))
+        faltantes = sorted(proyecto_ids - proyectos)
+        if faltantes:
+            raise HTTPException(status_code=404, detail=f"Proyectos no encontrados: {faltantes}")
+    
+    numeros = reservar_numeros_cotizacion(db, len(cotizaciones_data))
+    
+    filas = []
+    for numero, cotizacion_data in zip(numeros, cotizaciones_data):
+        fila = cotizacion_data.model_dump(exclude={"items"})
+        fila.update(calcular_totales_cotizacion(cotizacion_data.items))
+        fila["numero"] = numero
+        filas.append(fila)
+    
+    # Un INSERT ... RETURNING por lotes; RETURNING no garantiza el orden de
+    # las filas, así que se reordenan por su número (único y ya conocido)
+    por_numero = {
+        cotizacion.numero: cotizacion
+        for cotizacion in db.scalars(insert(Cotizacion).returning(Cotizacion), filas)
+    }
+    cotizaciones = [por_numero[numero] for numero in numeros]
+    
+    # Los items de todas las cotizaciones en un solo INSERT por lotes
+    items = [
+        fila
+        for cotizacion, cotizacion_data in zip(cotizaciones, cotizaciones_data)
+        for fila in filas_items_cotizacion(cotizacion.id, cotizacion_data.items)
+    ]
+    if items:
+        db.execute(insert(ItemCotizacion), items)
+    
+    # Desasociar antes del commit para conservar los valores devueltos por
+    # RETURNING sin que el commit los expire (un SELECT por cotización)
+    for cotizacion in cotizaciones:
+        db.expunge(cotizacion)
+    db.commit()
+    invalidate(_CACHE_PREFIX, PREFIJO_REPORTES)
+    
+    return cotizaciones
 
 
 @router.get("/{cotizacion_id}", response_model=CotizacionResponse)
-async def obtener_cotizacion(
+def obtener_cotizacion(
     cotizacion_id: int,
     db: Session = Depends(get_db),
     current_user: Usuario = Depends(get_current_user)
@@ -184,27 +326,22 @@ async def obtener_cotizacion(
     """
     Obtener cotización por ID con sus items.
     """
-    try:
-        cotizacion = db.query(Cotizacion).filter(
-            and_(
-                Cotizacion.id == cotizacion_id,
-                Cotizacion.activo == True
-            )
-        ).first()
-        
-        if not cotizacion:
-            raise HTTPException(status_code=404, detail="Cotización no encontrada")
-        
-        return cotizacion
-        
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error al obtener cotización: {str(e)}")
+    # CotizacionResponse no expone relaciones: se prohíben las cargas perezosas
+    cotizacion = db.query(Cotizacion).options(raiseload("*")).filter(
+        and_(
+            Cotizacion.id == cotizacion_id,
+            Cotizacion.activo == True
+        )
+    ).first()
+    
+    if not cotizacion:
+        raise HTTPException(status_code=404, detail="Cotización no encontrada")
+    
+    return cotizacion
 
 
 @router.put("/{cotizacion_id}", response_model=CotizacionResponse)
-async def actualizar_cotizacion(
+def actualizar_cotizacion(
     cotizacion_id: int,
     cotizacion_data: CotizacionUpdate,
     db: Session = Depends(get_db),
@@ -213,119 +350,90 @@ async def actualizar_cotizacion(
     """
     Actualizar cotización existente.
     """
-    try:
-        # Verificar que la cotización existe
-        cotizacion = db.query(Cotizacion).filter(
-            and_(
-                Cotizacion.id == cotizacion_id,
-                Cotizacion.activo == True
-            )
-        ).first()
-        
-        if not cotizacion:
-            raise HTTPException(status_code=404, detail="Cotización no encontrada")
-        
-        # Solo permitir actualización si está en estado borrador
-        if cotizacion.estado != "borrador":
-            raise HTTPException(
-                status_code=400, 
-                detail="Solo se pueden actualizar cotizaciones en estado borrador"
-            )
-        
-        # Actualizar campos
-        update_data = cotizacion_data.dict(exclude_unset=True, exclude={"items"})
-        for field, value in update_data.items():
-            setattr(cotizacion, field, value)
-        
-        # Si se proporcionan items, recalcular y actualizar
-        if cotizacion_data.items is not None:
-            # Eliminar items existentes
-            db.query(ItemCotizacion).filter(
-                ItemCotizacion.cotizacion_id == cotizacion_id
-            ).delete()
-            
-            # Calcular nuevos totales
-            totales = calcular_totales_cotizacion(cotizacion_data.items)
-            cotizacion.subtotal = totales["subtotal"]
-            cotizacion.impuestos = totales["impuestos"]
-            cotizacion.total = totales["total"]
-            
-            # Crear nuevos items
-            for idx, item_data in enumerate(cotizacion_data.items):
-                item = ItemCotizacion(
-                    cotizacion_id=cotizacion.id,
-                    descripcion=item_data.descripcion,
-                    cantidad=item_data.cantidad,
-                    precio_unitario=item_data.precio_unitario,
-                    subtotal=item_data.cantidad * item_data.precio_unitario,
-                    orden=idx + 1
-                )
-                db.add(item)
-        
-        db.commit()
-        db.refresh(cotizacion)
+    # Verificar que la cotización existe
+    cotizacion = db.query(Cotizacion).filter(
+        and_(
+            Cotizacion.id == cotizacion_id,
+            Cotizacion.activo == True
+        )
+    ).first()
+    
+    if not cotizacion:
+        raise HTTPException(status_code=404, detail="Cotización no encontrada")
+    
+    # Solo permitir actualización si está en estado borrador
+    if cotizacion.estado != EstadoCotizacion.BORRADOR:
+        raise HTTPException(
+            status_code=400, 
+            detail="Solo se pueden actualizar cotizaciones en estado borrador"
+        )
+    
+    # Actualizar campos
+    update_data = cotizacion_data.model_dump(exclude_unset=True, exclude={"items"})
+    for field, value in update_data.items():
+        setattr(cotizacion, field, value)
+    
+    # Si se proporcionan items, recalcular y actualizar
+    if cotizacion_data.items is not None:
+        # Eliminar items existentes en un único DELETE; ningún item está
+        # cargado en la sesión, así que no hace falta sincronizarla
+        db.execute(
+            delete(ItemCotizacion).where(ItemCotizacion.cotizacion_id == cotizacion_id),
+            execution_options={"synchronize_session": False}
+        )
         
-        return cotizacion
+        # Calcular nuevos totales
+        totales = calcular_totales_cotizacion(cotizacion_data.items)
+        cotizacion.subtotal = totales["subtotal"]
+        cotizacion.impuestos = totales["impuestos"]
+        cotizacion.total = totales["total"]
         
-    except HTTPException:
-        raise
-    except Exception as e:
-        db.rollback()
-        raise HTTPException(status_code=500, detail=f"Error al actualizar cotización: {str(e)}")
+        # Crear nuevos items
+        insertar_items_cotizacion(db, cotizacion.id, cotizacion_data.items)
+    
+    db.commit()
+    invalidate(_CACHE_PREFIX, PREFIJO_REPORTES)
+    db.refresh(cotizacion)
+    
+    return cotizacion
 
 
 @router.patch("/{cotizacion_id}/estado")
-async def cambiar_estado_cotizacion(
+def cambiar_estado_cotizacion(
     cotizacion_id: int,
-    nuevo_estado: str,
+    nuevo_estado: EstadoCotizacionEnum,
     db: Session = Depends(get_db),
     current_user: Usuario = Depends(get_current_user)
 ):
     """
     Cambiar el estado de una cotización.
+    
+    Un estado que no exista en EstadoCotizacion se rechaza con 422.
     """
-    try:
-        # Estados válidos
-        estados_validos = ["borrador", "enviada", "revisada", "aprobada", "rechazada", "cancelada"]
-        
-        if nuevo_estado not in estados_validos:
-            raise HTTPException(
-                status_code=400, 
-                detail=f"Estado inválido. Estados válidos: {', '.join(estados_validos)}"
-            )
-        
-        # Verificar que la cotización existe
-        cotizacion = db.query(Cotizacion).filter(
-            and_(
-                Cotizacion.id == cotizacion_id,
-                Cotizacion.activo == True
-            )
-        ).first()
-        
-        if not cotizacion:
-            raise HTTPException(status_code=404, detail="Cotización no encontrada")
-        
-        # Actualizar estado
-        cotizacion.estado = nuevo_estado
-        cotizacion.fecha_actualizacion = datetime.utcnow()
-        
-        db.commit()
-        
-        return {
-            "message": f"Estado de cotización actualizado a: {nuevo_estado}",
-            "cotizacion_id": cotizacion_id,
-            "nuevo_estado": nuevo_estado
-        }
-        
-    except HTTPException:
-        raise
-    except Exception as e:
-        db.rollback()
-        raise HTTPException(status_code=500, detail=f"Error al cambiar estado: {str(e)}")
+    # Actualizar estado en una sola sentencia; sin fila devuelta no existe
+    actualizada = db.execute(
+        update(Cotizacion)
+        .where(Cotizacion.id == cotizacion_id, Cotizacion.activo == True)
+        .values(estado=nuevo_estado.value)
+        .returning(Cotizacion.id),
+        execution_options={"synchronize_session": False}
+    ).first()
+    
+    if actualizada is None:
+        raise HTTPException(status_code=404, detail="Cotización no encontrada")
+    
+    db.commit()
+    invalidate(_CACHE_PREFIX, PREFIJO_REPORTES)
+    
+    return {
+        "message": f"Estado de cotización actualizado a: {nuevo_estado.value}",
+        "cotizacion_id": cotizacion_id,
+        "nuevo_estado": nuevo_estado.value
+    }
 
 
 @router.delete("/{cotizacion_id}")
-async def eliminar_cotizacion(
+def eliminar_cotizacion(
     cotizacion_id: int,
     db: Session = Depends(get_db),
     current_user: Usuario = Depends(get_current_user)
@@ -333,103 +441,119 @@ async def eliminar_cotizacion(
     """
     Eliminar cotización (soft delete).
     """
-    try:
-        # Verificar que la cotización existe
-        cotizacion = db.query(Cotizacion).filter(
-            and_(
-                Cotizacion.id == cotizacion_id,
-                Cotizacion.activo == True
-            )
-        ).first()
-        
-        if not cotizacion:
+    # Soft delete en una sola sentencia, solo si está en estado borrador
+    eliminada = db.execute(
+        update(Cotizacion)
+        .where(
+            Cotizacion.id == cotizacion_id,
+            Cotizacion.activo == True,
+            Cotizacion.estado == EstadoCotizacion.BORRADOR
+        )
+        .values(activo=False)
+        .returning(Cotizacion.id),
+        execution_options={"synchronize_session": False}
+    ).first()
+    
+    if eliminada is None:
+        # Solo en el camino de error: distinguir inexistente de no borrador
+        existe = db.scalar(select(exists().where(
+            Cotizacion.id == cotizacion_id,
+            Cotizacion.activo == True
+        )))
+        if not existe:
             raise HTTPException(status_code=404, detail="Cotización no encontrada")
+        raise HTTPException(
+            status_code=400, 
+            detail="Solo se pueden eliminar cotizaciones en estado borrador"
+        )
+    
+    db.commit()
+    invalidate(_CACHE_PREFIX, PREFIJO_REPORTES)
+    
+    return {"message": "Cotización eliminada exitosamente"}
+
+
+def _calcular_estadisticas(db: Session) -> dict:
+    """
+    Calcular las estadísticas generales de cotizaciones.
+    
+    Args:
+        db: Sesión de base de datos
         
-        # Solo permitir eliminación si está en estado borrador
-        if cotizacion.estado != "borrador":
-            raise HTTPException(
-                status_code=400, 
-                detail="Solo se pueden eliminar cotizaciones en estado borrador"
-            )
-        
-        # Soft delete
-        cotizacion.activo = False
-        cotizacion.fecha_actualizacion = datetime.utcnow()
-        
-        db.commit()
-        
-        return {"message": "Cotización eliminada exitosamente"}
-        
-    except HTTPException:
-        raise
-    except Exception as e:
-        db.rollback()
-        raise HTTPException(status_code=500, detail=f"Error al eliminar cotización: {str(e)}")
+    Returns:
+        dict: Totales por estado y valores, y cotizaciones de los últimos 6 meses
+    """
+    # Misma fecha de hace 6 meses (ajustada al último día si ese mes es más corto)
+    hoy = date.today()
+    años, indice_mes = divmod(hoy.month - 1 - 6, 12)
+    año_desde, mes_desde = hoy.year + años, indice_mes + 1
+    desde = date(año_desde, mes_desde, min(hoy.day, monthrange(año_desde, mes_desde)[1]))
+    
+    # Un solo recorrido: grupos por estado y, solo para los últimos 6 meses,
+    # también por año y mes (NULL para las anteriores). Como mucho
+    # estados × 7 filas, que se pliegan aquí en generales y mensuales
+    reciente = Cotizacion.fecha_creacion >= desde
+    año = case((reciente, func.extract('year', Cotizacion.fecha_creacion)))
+    mes = case((reciente, func.extract('month', Cotizacion.fecha_creacion)))
+    grupos = db.query(
+        Cotizacion.estado,
+        año.label('año'),
+        mes.label('mes'),
+        func.count(Cotizacion.id).label('cantidad'),
+        func.sum(Cotizacion.total).label('valor')
+    ).filter(
+        Cotizacion.activo == True
+    ).group_by(Cotizacion.estado, año, mes).all()
+    
+    por_estado = dict.fromkeys(EstadoCotizacion, 0)
+    valor_total = valor_aprobado = 0.0
+    mensuales = {}
+    for grupo in grupos:
+        valor = float(grupo.valor or 0)
+        por_estado[grupo.estado] += grupo.cantidad
+        valor_total += valor
+        if grupo.estado == EstadoCotizacion.APROBADA:
+            valor_aprobado += valor
+        if grupo.año is not None:
+            clave = (int(grupo.año), int(grupo.mes))
+            cantidad, acumulado = mensuales.get(clave, (0, 0.0))
+            mensuales[clave] = (cantidad + grupo.cantidad, acumulado + valor)
+    
+    return {
+        "generales": {
+            "total": sum(por_estado.values()),
+            "por_estado": {
+                "borradores": por_estado[EstadoCotizacion.BORRADOR],
+                "enviadas": por_estado[EstadoCotizacion.ENVIADA],
+                "aprobadas": por_estado[EstadoCotizacion.APROBADA],
+                "rechazadas": por_estado[EstadoCotizacion.RECHAZADA]
+            },
+            "valores": {
+                "total": valor_total,
+                "aprobado": valor_aprobado
+            }
+        },
+        "mensuales": [
+            {
+                "año": año_mes[0],
+                "mes": año_mes[1],
+                "cantidad": cantidad,
+                "valor": valor
+            }
+            for año_mes, (cantidad, valor) in sorted(mensuales.items())
+        ]
+    }
 
 
 @router.get("/estadisticas/resumen")
-async def obtener_estadisticas_cotizaciones(
+def obtener_estadisticas_cotizaciones(
     db: Session = Depends(get_db),
     current_user: Usuario = Depends(get_current_user)
 ):
     """
     Obtener estadísticas generales de cotizaciones.
     """
-    try:
-        # Estadísticas generales
-        stats = db.query(
-            func.count(Cotizacion.id).label("total"),
-            func.count().filter(Cotizacion.estado == "borrador").label("borradores"),
-            func.count().filter(Cotizacion.estado == "enviada").label("enviadas"),
-            func.count().filter(Cotizacion.estado == "aprobada").label("aprobadas"),
-            func.count().filter(Cotizacion.estado == "rechazada").label("rechazadas"),
-            func.sum(Cotizacion.total).label("valor_total"),
-            func.sum(Cotizacion.total).filter(Cotizacion.estado == "aprobada").label("valor_aprobado")
-        ).filter(Cotizacion.activo == True).first()
-        
-        # Cotizaciones por mes (últimos 6 meses)
-        cotizaciones_mensuales = db.query(
-            func.extract('year', Cotizacion.fecha_creacion).label('año'),
-            func.extract('month', Cotizacion.fecha_creacion).label('mes'),
-            func.count(Cotizacion.id).label('cantidad'),
-            func.sum(Cotizacion.total).label('valor')
-        ).filter(
-            and_(
-                Cotizacion.activo == True,
-                Cotizacion.fecha_creacion >= func.current_date() - func.interval('6 months')
-            )
-        ).group_by(
-            func.extract('year', Cotizacion.fecha_creacion),
-            func.extract('month', Cotizacion.fecha_creacion)
-        ).order_by(
-            func.extract('year', Cotizacion.fecha_creacion),
-            func.extract('month', Cotizacion.fecha_creacion)
-        ).all()
-        
-        return {
-            "generales": {
-                "total": stats.total or 0,
-                "por_estado": {
-                    "borradores": stats.borradores or 0,
-                    "enviadas": stats.enviadas or 0,
-                    "aprobadas": stats.aprobadas or 0,
-                    "rechazadas": stats.rechazadas or 0
-                },
-                "valores": {
-                    "total": float(stats.valor_total or 0),
-                    "aprobado": float(stats.valor_aprobado or 0)
-                }
-            },
-            "mensuales": [
-                {
-                    "año": int(row.año),
-                    "mes": int(row.mes),
-                    "cantidad": row.cantidad,
-                    "valor": float(row.valor or 0)
-                }
-                for row in cotizaciones_mensuales
-            ]
-        }
-        
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error al obtener estadísticas: {str(e)}")
+    # Las escrituras invalidan la entrada; el TTL solo acota el desfase de
+    # la ventana de 6 meses, así que los agregados se recalculan como
+    # mucho cada 5 minutos
+    return cached_response(_CACHE_PREFIX + "estadisticas", 300, lambda: _calcular_estadisticas(db))
@@ -1,21 +1,22 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
 from typing import List, Optional
+from datetime import datetime
 from app.database import get_db
 from app.auth import get_current_active_user
+from app.cache import PREFIJO_REPORTES, invalidate
 from app.models import Usuario
 from app.schemas.proyecto import (
     ProyectoCreate, ProyectoUpdate, ProyectoResponse, 
     ProyectoList, EstadisticasProyecto, AsignarColaborador
 )
 from app.services.proyecto_service import ProyectoService
-import math
 
 router = APIRouter()
 
 
 @router.post("/", response_model=ProyectoResponse)
-async def create_proyecto(
+def create_proyecto(
     proyecto: ProyectoCreate,
     db: Session = Depends(get_db),
     current_user: Usuario = Depends(get_current_active_user)
@@ -26,25 +27,37 @@ async def create_proyecto(
     Requiere autenticación.
     """
     service = ProyectoService(db)
-    return service.create_proyecto(proyecto)
+    db_proyecto = service.create_proyecto(proyecto)
+    invalidate(PREFIJO_REPORTES)
+    return db_proyecto
 
 
 @router.get("/", response_model=ProyectoList)
-async def read_proyectos(
+def read_proyectos(
     skip: int = Query(0, ge=0, description="Número de registros a saltar"),
     limit: int = Query(100, ge=1, le=1000, description="Número máximo de registros"),
     activo: Optional[bool] = Query(None, description="Filtrar por estado activo/inactivo"),
     estado: Optional[str] = Query(None, description="Filtrar por estado del proyecto"),
     cliente_id: Optional[int] = Query(None, description="Filtrar por cliente"),
     search: Optional[str] = Query(None, description="Buscar por nombre del proyecto"),
+    after_fecha: Optional[datetime] = Query(None, description="Cursor: fecha_creacion del último proyecto recibido"),
+    after_id: Optional[int] = Query(None, description="Cursor: ID del último proyecto recibido"),
     db: Session = Depends(get_db),
     current_user: Usuario = Depends(get_current_active_user)
 ):
     """
     Obtener lista de proyectos con filtros y paginación.
     
+    Admite paginación keyset: con after_fecha y after_id (el next_cursor de la
+    respuesta anterior) se ignora skip y se continúa tras ese proyecto sin que
+    la base de datos recorra las filas ya devueltas. En ese modo total cuenta
+    los proyectos restantes a partir del cursor.
+    
     Requiere autenticación.
     """
+    if after_fecha is not None and after_id is not None:
+        skip = 0
+    
     service = ProyectoService(db)
     proyectos, total = service.get_proyectos(
         skip=skip,
@@ -52,20 +65,32 @@ async def read_proyectos(
         activo=activo,
         estado=estado,
         cliente_id=cliente_id,
-        search=search
+        search=search,
+        after_fecha=after_fecha,
+        after_id=after_id
     )
     
+    # Cursor de la página siguiente si quedan proyectos por devolver
+    next_cursor = None
+    if proyectos and total > skip + len(proyectos):
+        ultimo = proyectos[-1]
+        next_cursor = {
+            "after_fecha": ultimo.fecha_creacion.isoformat(),
+            "after_id": ultimo.id
+        }
+    
     return ProyectoList(
         proyectos=proyectos,
         total=total,
         pagina=skip // limit + 1,
         tamaño_pagina=limit,
-        total_paginas=math.ceil(total / limit)
+        total_paginas=(total + limit - 1) // limit,
+        next_cursor=next_cursor
     )
 
 
 @router.get("/estadisticas", response_model=EstadisticasProyecto)
-async def read_estadisticas_proyectos(
+def read_estadisticas_proyectos(
     db: Session = Depends(get_db),
     current_user: Usuario = Depends(get_current_active_user)
 ):
@@ -79,7 +104,7 @@ async def read_estadisticas_proyectos(
 
 
 @router.get("/por-colaborador/{colaborador_id}", response_model=List[ProyectoResponse])
-async def read_proyectos_por_colaborador(
+def read_proyectos_por_colaborador(
     colaborador_id: int,
     db: Session = Depends(get_db),
     current_user: Usuario = Depends(get_current_active_user)
@@ -94,7 +119,7 @@ async def read_proyectos_por_colaborador(
 
 
 @router.get("/por-cliente/{cliente_id}", response_model=List[ProyectoResponse])
-async def read_proyectos_por_cliente(
+def read_proyectos_por_cliente(
     cliente_id: int,
     db: Session = Depends(get_db),
     current_user: Usuario = Depends(get_current_active_user)
@@ -109,7 +134,7 @@ async def read_proyectos_por_cliente(
 
 
 @router.get("/{proyecto_id}", response_model=ProyectoResponse)
-async def read_proyecto(
+def read_proyecto(
     proyecto_id: int,
     db: Session = Depends(get_db),
     current_user: Usuario = Depends(get_current_active_user)
@@ -130,7 +155,7 @@ async def read_proyecto(
 
 
 @router.put("/{proyecto_id}", response_model=ProyectoResponse)
-async def update_proyecto(
+def update_proyecto(
     proyecto_id: int,
     proyecto: ProyectoUpdate,
     db: Session = Depends(get_db),
@@ -148,11 +173,12 @@ async def update_proyecto(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Proyecto no encontrado"
         )
+    invalidate(PREFIJO_REPORTES)
     return db_proyecto
 
 
 @router.delete("/{proyecto_id}")
-async def delete_proyecto(
+def delete_proyecto(
     proyecto_id: int,
     db: Session = Depends(get_db),
     current_user: Usuario = Depends(get_current_active_user)
@@ -169,11 +195,12 @@ async def delete_proyecto(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Proyecto no encontrado"
         )
+    invalidate(PREFIJO_REPORTES)
     return {"message": "Proyecto eliminado exitosamente"}
 
 
 @router.post("/{proyecto_id}/asignar-colaborador", response_model=ProyectoResponse)
-async def asignar_colaborador(
+def asignar_colaborador(
     proyecto_id: int,
     asignacion: AsignarColaborador,
     db: Session = Depends(get_db),
@@ -195,11 +222,12 @@ async def asignar_colaborador(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Proyecto no encontrado"
         )
+    invalidate(PREFIJO_REPORTES)
     return db_proyecto
 
 
 @router.delete("/{proyecto_id}/desasignar-colaborador/{colaborador_id}")
-async def desasignar_colaborador(
+def desasignar_colaborador(
     proyecto_id: int,
     colaborador_id: int,
     db: Session = Depends(get_db),
@@ -217,11 +245,12 @@ async def desasignar_colaborador(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Proyecto no encontrado"
         )
+    invalidate(PREFIJO_REPORTES)
     return {"message": "Colaborador desasignado exitosamente"}
 
 
 @router.patch("/{proyecto_id}/progreso")
-async def actualizar_progreso(
+def actualizar_progreso(
     proyecto_id: int,
     progreso: float = Query(..., ge=0, le=100, description="Progreso del proyecto (0-100)"),
     db: Session = Depends(get_db),
@@ -239,4 +268,5 @@ async def actualizar_progreso(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Proyecto no encontrado"
         )
+    invalidate(PREFIJO_REPORTES)
     return {"message": f"Progreso actualizado a {progreso}%", "proyecto": db_proyecto}
@@ -6,23 +6,41 @@ Este módulo maneja todas las operaciones relacionadas con reportes del sistema.
 
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
-from sqlalchemy import func, extract, text
+from sqlalchemy import extract, func, select, text, true
 from typing import List, Optional
 from datetime import datetime, timedelta
 import logging
 
 from app.database import get_db
 from app.auth import get_current_user
-from app.models import Usuario, Proyecto, Colaborador, Cotizacion, CostoRigido, Cliente, EstadoProyecto, EstadoCotizacion
+from app.cache import PREFIJO_REPORTES, cached_response
+from app.models import (
+    Usuario, Proyecto, Colaborador, Cotizacion, CostoRigido, Cliente, EstadoProyecto, EstadoCotizacion,
+    proyecto_colaborador
+)
 # from app.services.pdf_service import PDFGenerator  # TODO: Implementar servicio PDF
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Prefijo de caché de los reportes. Son agregados sobre todas las tablas y
+# los paneles los consultan por sondeo: se sirven desde la caché, que las
+# escrituras de los demás routers invalidan; _CACHE_TTL acota además lo que
+# pueda quedar desfasado por cambios hechos fuera de la API
+_CACHE_PREFIX = PREFIJO_REPORTES
+_CACHE_TTL = 60
+_CACHE_TTL_CERRADO = 86400  # Reportes de años cerrados, que casi nunca cambian
+
+# Nombres de los meses para los reportes mensuales (índice = número de mes - 1)
+_MESES = (
+    "Enero", "Febrero", "Marzo", "Abril", "Mayo", "Junio",
+    "Julio", "Agosto", "Septiembre", "Octubre", "Noviembre", "Diciembre"
+)
+
 
 @router.get("/dashboard")
-async def get_dashboard_stats(
+def get_dashboard_stats(
     db: Session = Depends(get_db),
     current_user: Usuario = Depends(get_current_user)
 ):
@@ -37,81 +55,102 @@ async def get_dashboard_stats(
         dict: Estadísticas del dashboard
     """
     try:
-        # Estadísticas de proyectos
-        total_proyectos = db.query(Proyecto).count()
-        proyectos_activos = db.query(Proyecto).filter(
-            Proyecto.estado == EstadoProyecto.EN_PROGRESO
-        ).count()
-        proyectos_completados = db.query(Proyecto).filter(
-            Proyecto.estado == EstadoProyecto.COMPLETADO
-        ).count()
-        
-        # Estadísticas de colaboradores
-        total_colaboradores = db.query(Colaborador).count()
-        colaboradores_activos = db.query(Colaborador).filter(
-            Colaborador.activo == True
-        ).count()
-        
-        # Estadísticas de cotizaciones
-        total_cotizaciones = db.query(Cotizacion).count()
-        cotizaciones_pendientes = db.query(Cotizacion).filter(
-            Cotizacion.estado == EstadoCotizacion.ENVIADA
-        ).count()
-        cotizaciones_aprobadas = db.query(Cotizacion).filter(
-            Cotizacion.estado == EstadoCotizacion.APROBADA
-        ).count()
-        
-        # Estadísticas de clientes
-        total_clientes = db.query(Cliente).count()
-        clientes_activos = db.query(Cliente).filter(
-            Cliente.activo == True
-        ).count()
-        
-        # Valor total de cotizaciones
-        valor_total_cotizaciones = db.query(
-            func.sum(Cotizacion.total)
-        ).scalar() or 0
-        
-        valor_cotizaciones_aprobadas = db.query(
-            func.sum(Cotizacion.total)
-        ).filter(
-            Cotizacion.estado == EstadoCotizacion.APROBADA
-        ).scalar() or 0
-        
-        return {
-            "proyectos": {
-                "total": total_proyectos,
-                "activos": proyectos_activos,
-                "completados": proyectos_completados,
-                "porcentaje_completados": (
-                    (proyectos_completados / total_proyectos * 100) 
-                    if total_proyectos > 0 else 0
-                )
-            },
-            "colaboradores": {
-                "total": total_colaboradores,
-                "activos": colaboradores_activos,
-                "porcentaje_activos": (
-                    (colaboradores_activos / total_colaboradores * 100) 
-                    if total_colaboradores > 0 else 0
-                )
-            },
-            "cotizaciones": {
-                "total": total_cotizaciones,
-                "pendientes": cotizaciones_pendientes,
-                "aprobadas": cotizaciones_aprobadas,
-                "valor_total": float(valor_total_cotizaciones),
-                "valor_aprobadas": float(valor_cotizaciones_aprobadas)
-            },
-            "clientes": {
-                "total": total_clientes,
-                "activos": clientes_activos,
-                "porcentaje_activos": (
-                    (clientes_activos / total_clientes * 100) 
-                    if total_clientes > 0 else 0
+        def calcular() -> dict:
+            # Un agregado de una fila por tabla, con FILTER para los conteos
+            # condicionales; las cuatro se combinan en una sola sentencia
+            proyectos = select(
+                func.count().label("total"),
+                func.count().filter(Proyecto.estado == EstadoProyecto.EN_PROGRESO).label("activos"),
+                func.count().filter(Proyecto.estado == EstadoProyecto.COMPLETADO).label("completados")
+            ).subquery()
+            colaboradores = select(
+                func.count().label("total"),
+                func.count().filter(Colaborador.activo == True).label("activos")
+            ).subquery()
+            cotizaciones = select(
+                func.count().label("total"),
+                func.count().filter(Cotizacion.estado == EstadoCotizacion.ENVIADA).label("pendientes"),
+                func.count().filter(Cotizacion.estado == EstadoCotizacion.APROBADA).label("aprobadas"),
+                func.sum(Cotizacion.total).label("valor_total"),
+                func.sum(Cotizacion.total).filter(
+                    Cotizacion.estado == EstadoCotizacion.APROBADA
+                ).label("valor_aprobadas")
+            ).subquery()
+            clientes = select(
+                func.count().label("total"),
+                func.count().filter(Cliente.activo == True).label("activos")
+            ).subquery()
+            
+            stats = db.execute(
+                select(
+                    proyectos.c.total.label("total_proyectos"),
+                    proyectos.c.activos.label("proyectos_activos"),
+                    proyectos.c.completados.label("proyectos_completados"),
+                    colaboradores.c.total.label("total_colaboradores"),
+                    colaboradores.c.activos.label("colaboradores_activos"),
+                    cotizaciones.c.total.label("total_cotizaciones"),
+                    cotizaciones.c.pendientes.label("cotizaciones_pendientes"),
+                    cotizaciones.c.aprobadas.label("cotizaciones_aprobadas"),
+                    cotizaciones.c.valor_total.label("valor_total_cotizaciones"),
+                    cotizaciones.c.valor_aprobadas.label("valor_cotizaciones_aprobadas"),
+                    clientes.c.total.label("total_clientes"),
+                    clientes.c.activos.label("clientes_activos")
+                ).select_from(
+                    proyectos.join(colaboradores, true())
+                    .join(cotizaciones, true())
+                    .join(clientes, true())
                 )
+            ).one()
+            
+            total_proyectos = stats.total_proyectos
+            proyectos_activos = stats.proyectos_activos
+            proyectos_completados = stats.proyectos_completados
+            total_colaboradores = stats.total_colaboradores
+            colaboradores_activos = stats.colaboradores_activos
+            total_cotizaciones = stats.total_cotizaciones
+            cotizaciones_pendientes = stats.cotizaciones_pendientes
+            cotizaciones_aprobadas = stats.cotizaciones_aprobadas
+            valor_total_cotizaciones = stats.valor_total_cotizaciones or 0
+            valor_cotizaciones_aprobadas = stats.valor_cotizaciones_aprobadas or 0
+            total_clientes = stats.total_clientes
+            clientes_activos = stats.clientes_activos
+            
+            return {
+                "proyectos": {
+                    "total": total_proyectos,
+                    "activos": proyectos_activos,
+                    "completados": proyectos_completados,
+                    "porcentaje_completados": (
+                        (proyectos_completados / total_proyectos * 100) 
+                        if total_proyectos > 0 else 0
+                    )
+                },
+                "colaboradores": {
+                    "total": total_colaboradores,
+                    "activos": colaboradores_activos,
+                    "porcentaje_activos": (
+                        (colaboradores_activos / total_colaboradores * 100) 
+                        if total_colaboradores > 0 else 0
+                    )
+                },
+                "cotizaciones": {
+                    "total": total_cotizaciones,
+                    "pendientes": cotizaciones_pendientes,
+                    "aprobadas": cotizaciones_aprobadas,
+                    "valor_total": float(valor_total_cotizaciones),
+                    "valor_aprobadas": float(valor_cotizaciones_aprobadas)
+                },
+                "clientes": {
+                    "total": total_clientes,
+                    "activos": clientes_activos,
+                    "porcentaje_activos": (
+                        (clientes_activos / total_clientes * 100) 
+                        if total_clientes > 0 else 0
+                    )
+                }
             }
-        }
+        
+        return cached_response(_CACHE_PREFIX + "dashboard", _CACHE_TTL, calcular)
     
     except Exception as e:
         logger.error(f"Error al obtener estadísticas del dashboard: {e}")
@@ -155,7 +194,7 @@ async def get_dashboard_stats_test():
 
 
 @router.get("/proyectos-por-estado")
-async def get_proyectos_por_estado(
+def get_proyectos_por_estado(
     db: Session = Depends(get_db),
     current_user: Usuario = Depends(get_current_user)
 ):
@@ -170,18 +209,21 @@ async def get_proyectos_por_estado(
         List[dict]: Distribución de proyectos por estado
     """
     try:
-        resultado = db.query(
-            Proyecto.estado,
-            func.count(Proyecto.id).label('cantidad')
-        ).group_by(Proyecto.estado).all()
+        def calcular() -> List[dict]:
+            resultado = db.query(
+                Proyecto.estado,
+                func.count(Proyecto.id).label('cantidad')
+            ).group_by(Proyecto.estado).all()
+            
+            return [
+                {
+                    "estado": estado,
+                    "cantidad": cantidad
+                }
+                for estado, cantidad in resultado
+            ]
         
-        return [
-            {
-                "estado": estado,
-                "cantidad": cantidad
-            }
-            for estado, cantidad in resultado
-        ]
+        return cached_response(_CACHE_PREFIX + "proyectos-por-estado", _CACHE_TTL, calcular)
     
     except Exception as e:
         logger.error(f"Error al obtener proyectos por estado: {e}")
@@ -192,8 +234,8 @@ async def get_proyectos_por_estado(
 
 
 @router.get("/cotizaciones-por-mes")
-async def get_cotizaciones_por_mes(
-    año: int = Query(default=datetime.now().year, description="Año para el reporte"),
+def get_cotizaciones_por_mes(
+    año: Optional[int] = Query(default=None, ge=1, le=9998, description="Año para el reporte (por defecto, el actual)"),
     db: Session = Depends(get_db),
     current_user: Usuario = Depends(get_current_user)
 ):
@@ -208,33 +250,43 @@ async def get_cotizaciones_por_mes(
     Returns:
         List[dict]: Cotizaciones por mes
     """
+    # El año por defecto se calcula en cada petición, no al importar el módulo
+    año_actual = datetime.now().year
+    if año is None:
+        año = año_actual
+    
     try:
-        resultado = db.query(
-            extract('month', Cotizacion.fecha_creacion).label('mes'),
-            func.count(Cotizacion.id).label('cantidad'),
-            func.sum(Cotizacion.total).label('valor_total')
-        ).filter(
-            extract('year', Cotizacion.fecha_creacion) == año
-        ).group_by(
-            extract('month', Cotizacion.fecha_creacion)
-        ).order_by(
-            extract('month', Cotizacion.fecha_creacion)
-        ).all()
-        
-        meses = [
-            "Enero", "Febrero", "Marzo", "Abril", "Mayo", "Junio",
-            "Julio", "Agosto", "Septiembre", "Octubre", "Noviembre", "Diciembre"
-        ]
+        def calcular() -> List[dict]:
+            resultado = db.query(
+                extract('month', Cotizacion.fecha_creacion).label('mes'),
+                func.count(Cotizacion.id).label('cantidad'),
+                func.sum(Cotizacion.total).label('valor_total')
+            ).filter(
+                # Rango de fechas en lugar de EXTRACT(year ...) = año: la
+                # condición es indexable sobre fecha_creacion
+                Cotizacion.fecha_creacion >= datetime(año, 1, 1),
+                Cotizacion.fecha_creacion < datetime(año + 1, 1, 1)
+            ).group_by(
+                extract('month', Cotizacion.fecha_creacion)
+            ).order_by(
+                extract('month', Cotizacion.fecha_creacion)
+            ).all()
+            
+            return [
+                {
+                    "mes": _MESES[int(mes) - 1],
+                    "numero_mes": int(mes),
+                    "cantidad": cantidad,
+                    "valor_total": float(valor_total or 0)
+                }
+                for mes, cantidad, valor_total in resultado
+            ]
         
-        return [
-            {
-                "mes": meses[int(mes) - 1],
-                "numero_mes": int(mes),
-                "cantidad": cantidad,
-                "valor_total": float(valor_total or 0)
-            }
-            for mes, cantidad, valor_total in resultado
-        ]
+        # Un año cerrado solo cambia cuando se edita una de sus cotizaciones
+        # (p. ej. el total de un borrador), y toda escritura de cotizaciones
+        # invalida PREFIJO_REPORTES: basta con recalcularlo una vez al día
+        ttl = _CACHE_TTL if año >= año_actual else _CACHE_TTL_CERRADO
+        return cached_response(f"{_CACHE_PREFIX}cotizaciones-por-mes:{año}", ttl, calcular)
     
     except Exception as e:
         logger.error(f"Error al obtener cotizaciones por mes: {e}")
@@ -245,7 +297,7 @@ async def get_cotizaciones_por_mes(
 
 
 @router.get("/costos-rigidos-resumen")
-async def get_costos_rigidos_resumen(
+def get_costos_rigidos_resumen(
     db: Session = Depends(get_db),
     current_user: Usuario = Depends(get_current_user)
 ):
@@ -260,29 +312,30 @@ async def get_costos_rigidos_resumen(
         dict: Resumen de costos rígidos
     """
     try:
-        # Costos por categoría
-        costos_por_categoria = db.query(
-            CostoRigido.categoria,
-            func.count(CostoRigido.id).label('cantidad'),
-            func.sum(CostoRigido.monto).label('total')
-        ).group_by(CostoRigido.categoria).all()
-        
-        # Total de costos rígidos
-        total_costos = db.query(
-            func.sum(CostoRigido.monto)
-        ).scalar() or 0
-        
-        return {
-            "total_costos": float(total_costos),
-            "por_categoria": [
+        def calcular() -> dict:
+            # Costos por categoría; el total general es la suma de las
+            # categorías (incluida la de categoría NULL), sin otro recorrido
+            costos_por_categoria = db.query(
+                CostoRigido.categoria,
+                func.count(CostoRigido.id).label('cantidad'),
+                func.sum(CostoRigido.valor).label('total')
+            ).group_by(CostoRigido.categoria).all()
+            
+            por_categoria = [
                 {
                     "categoria": categoria,
                     "cantidad": cantidad,
-                    "total": float(total)
+                    "total": float(total or 0)
                 }
                 for categoria, cantidad, total in costos_por_categoria
             ]
-        }
+            
+            return {
+                "total_costos": sum(fila["total"] for fila in por_categoria),
+                "por_categoria": por_categoria
+            }
+        
+        return cached_response(_CACHE_PREFIX + "costos-rigidos-resumen", _CACHE_TTL, calcular)
     
     except Exception as e:
         logger.error(f"Error al obtener resumen de costos rígidos: {e}")
@@ -293,7 +346,7 @@ async def get_costos_rigidos_resumen(
 
 
 @router.get("/colaboradores-productividad")
-async def get_colaboradores_productividad(
+def get_colaboradores_productividad(
     db: Session = Depends(get_db),
     current_user: Usuario = Depends(get_current_user)
 ):
@@ -308,20 +361,21 @@ async def get_colaboradores_productividad(
         List[dict]: Productividad por colaborador
     """
     try:
-        # Obtener colaboradores con conteo de proyectos
+        # Proyectos asignados por colaborador, agregados solo por la clave de
+        # la tabla de asociación antes de unirse a los colaboradores
+        asignaciones = select(
+            proyecto_colaborador.c.colaborador_id,
+            func.count().label('proyectos_asignados')
+        ).group_by(proyecto_colaborador.c.colaborador_id).subquery()
+        
         resultado = db.query(
             Colaborador.id,
             Colaborador.nombre,
             Colaborador.email,
-            Colaborador.especialidad,
-            func.count(Proyecto.id).label('proyectos_asignados')
+            Colaborador.cargo,
+            func.coalesce(asignaciones.c.proyectos_asignados, 0)
         ).outerjoin(
-            Proyecto, Colaborador.id == Proyecto.claborador_principal_id
-        ).group_by(
-            Colaborador.id,
-            Colaborador.nombre,
-            Colaborador.email,
-            Colaborador.especialidad
+            asignaciones, asignaciones.c.colaborador_id == Colaborador.id
         ).filter(
             Colaborador.activo == True
         ).all()
@@ -331,10 +385,10 @@ async def get_colaboradores_productividad(
                 "id": colaborador_id,
                 "nombre": nombre,
                 "email": email,
-                "especialidad": especialidad,
+                "cargo": cargo,
                 "proyectos_asignados": proyectos_asignados
             }
-            for colaborador_id, nombre, email, especialidad, proyectos_asignados in resultado
+            for colaborador_id, nombre, email, cargo, proyectos_asignados in resultado
         ]
     
     except Exception as e:
@@ -346,7 +400,7 @@ async def get_colaboradores_productividad(
 
 
 @router.get("/clientes-mas-activos")
-async def get_clientes_mas_activos(
+def get_clientes_mas_activos(
     limite: int = Query(default=10, description="Número máximo de clientes a retornar"),
     db: Session = Depends(get_db),
     current_user: Usuario = Depends(get_current_user)
@@ -363,23 +417,26 @@ async def get_clientes_mas_activos(
         List[dict]: Clientes más activos
     """
     try:
+        # Proyectos por cliente, agregados solo por cliente_id (índice
+        # ix_proyectos_cliente_activo_estado) antes de unirse a los clientes
+        proyectos = select(
+            Proyecto.cliente_id,
+            func.count().label('total_proyectos')
+        ).group_by(Proyecto.cliente_id).subquery()
+        total_proyectos = func.coalesce(proyectos.c.total_proyectos, 0)
+        
         resultado = db.query(
             Cliente.id,
             Cliente.nombre,
             Cliente.email,
             Cliente.telefono,
-            func.count(Proyecto.id).label('total_proyectos')
+            total_proyectos
         ).outerjoin(
-            Proyecto, Cliente.id == Proyecto.cliente_id
-        ).group_by(
-            Cliente.id,
-            Cliente.nombre,
-            Cliente.email,
-            Cliente.telefono
+            proyectos, proyectos.c.cliente_id == Cliente.id
         ).filter(
             Cliente.activo == True
         ).order_by(
-            func.count(Proyecto.id).desc()
+            total_proyectos.desc()
         ).limit(limite).all()
         
         return [
@@ -402,7 +459,7 @@ async def get_clientes_mas_activos(
 
 
 @router.get("/resumen-financiero")
-async def get_resumen_financiero(
+def get_resumen_financiero(
     db: Session = Depends(get_db),
     current_user: Usuario = Depends(get_current_user)
 ):
@@ -417,33 +474,36 @@ async def get_resumen_financiero(
         dict: Resumen financiero
     """
     try:
-        # Ingresos de cotizaciones aprobadas
-        ingresos_cotizaciones = db.query(
-            func.sum(Cotizacion.total)
-        ).filter(
-            Cotizacion.estado == EstadoCotizacion.APROBADA
-        ).scalar() or 0
-        
-        # Gastos de costos rígidos
-        gastos_costos_rigidos = db.query(
-            func.sum(CostoRigido.monto)
-        ).scalar() or 0
-        
-        # Margen bruto
-        margen_bruto = float(ingresos_cotizaciones) - float(gastos_costos_rigidos)
-        
-        # Porcentaje de margen
-        porcentaje_margen = (
-            (margen_bruto / float(ingresos_cotizaciones) * 100) 
-            if ingresos_cotizaciones > 0 else 0
-        )
+        def calcular() -> dict:
+            # Ingresos de cotizaciones aprobadas
+            ingresos_cotizaciones = db.query(
+                func.sum(Cotizacion.total)
+            ).filter(
+                Cotizacion.estado == EstadoCotizacion.APROBADA
+            ).scalar() or 0
+            
+            # Gastos de costos rígidos
+            gastos_costos_rigidos = db.query(
+                func.sum(CostoRigido.valor)
+            ).scalar() or 0
+            
+            # Margen bruto
+            margen_bruto = float(ingresos_cotizaciones) - float(gastos_costos_rigidos)
+            
+            # Porcentaje de margen
+            porcentaje_margen = (
+                (margen_bruto / float(ingresos_cotizaciones) * 100) 
+                if ingresos_cotizaciones > 0 else 0
+            )
+            
+            return {
+                "ingresos_cotizaciones": float(ingresos_cotizaciones),
+                "gastos_costos_rigidos": float(gastos_costos_rigidos),
+                "margen_bruto": margen_bruto,
+                "porcentaje_margen": porcentaje_margen
+            }
         
-        return {
-            "ingresos_cotizaciones": float(ingresos_cotizaciones),
-            "gastos_costos_rigidos": float(gastos_costos_rigidos),
-            "margen_bruto": margen_bruto,
-            "porcentaje_margen": porcentaje_margen
-        }
+        return cached_response(_CACHE_PREFIX + "resumen-financiero", _CACHE_TTL, calcular)
     
     except Exception as e:
         logger.error(f"Error al obtener resumen financiero: {e}")
@@ -4,7 +4,7 @@ from .colaborador import (
 )
 from .cliente import (
     ClienteBase, ClienteCreate, ClienteUpdate, ClienteResponse,
-    ClienteList, ClienteResumen
+    ClienteListResponse, ClienteList, ClienteResumen
 )
 from .proyecto import (
     ProyectoBase, ProyectoCreate, ProyectoUpdate, ProyectoResponse,
@@ -13,13 +13,13 @@ from .proyecto import (
 )
 from .cotizacion import (
     CotizacionBase, CotizacionCreate, CotizacionUpdate, CotizacionResponse,
-    CotizacionList, CotizacionResumen, ItemCotizacionBase, ItemCotizacionCreate,
+    CotizacionListResponse, CotizacionList, CotizacionResumen, ItemCotizacionBase, ItemCotizacionCreate,
     ItemCotizacionUpdate, ItemCotizacionResponse, EstadisticasCotizacion,
     EnviarCotizacion, EstadoCotizacionEnum
 )
 from .costo_rigido import (
     CostoRigidoBase, CostoRigidoCreate, CostoRigidoUpdate, CostoRigidoResponse,
-    CostoRigidoList, CostoRigidoResumen, EstadisticasCostoRigido,
+    CostoRigidoListResponse, CostoRigidoList, CostoRigidoResumen, EstadisticasCostoRigido,
     CostosPorCategoria, CostosPorProyecto, TipoCostoEnum
 )
 from .usuario import (
@@ -40,7 +40,7 @@ __all__ = [
     
     # Cliente
     "ClienteBase", "ClienteCreate", "ClienteUpdate", "ClienteResponse",
-    "ClienteList", "ClienteResumen",
+    "ClienteListResponse", "ClienteList", "ClienteResumen",
     
     # Proyecto
     "ProyectoBase", "ProyectoCreate", "ProyectoUpdate", "ProyectoResponse",
@@ -49,13 +49,13 @@ __all__ = [
     
     # Cotización
     "CotizacionBase", "CotizacionCreate", "CotizacionUpdate", "CotizacionResponse",
-    "CotizacionList", "CotizacionResumen", "ItemCotizacionBase", "ItemCotizacionCreate",
+    "CotizacionListResponse", "CotizacionList", "CotizacionResumen", "ItemCotizacionBase", "ItemCotizacionCreate",
     "ItemCotizacionUpdate", "ItemCotizacionResponse", "EstadisticasCotizacion",
     "EnviarCotizacion", "EstadoCotizacionEnum",
     
     # Costo Rígido
     "CostoRigidoBase", "CostoRigidoCreate", "CostoRigidoUpdate", "CostoRigidoResponse",
-    "CostoRigidoList", "CostoRigidoResumen", "EstadisticasCostoRigido",
+    "CostoRigidoListResponse", "CostoRigidoList", "CostoRigidoResumen", "EstadisticasCostoRigido",
     "CostosPorCategoria", "CostosPorProyecto", "TipoCostoEnum",
     
     # Usuario
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, EmailStr, Field
+from pydantic import BaseModel, ConfigDict, EmailStr, Field
 from typing import Optional, List
 from datetime import datetime
 
@@ -46,8 +46,24 @@ class ClienteResponse(ClienteBase):
     total_cotizaciones: Optional[int] = None
     valor_total_proyectos: Optional[float] = None
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
+
+
+class ClienteListResponse(BaseModel):
+    """Esquema de respuesta para el listado de clientes (sin la dirección)."""
+    nombre: str
+    email: EmailStr
+    telefono: Optional[str] = None
+    ciudad: Optional[str] = None
+    pais: Optional[str] = None
+    contacto_principal: Optional[str] = None
+    nit_ruc: Optional[str] = None
+    activo: bool = True
+    id: int
+    fecha_creacion: datetime
+    fecha_actualizacion: datetime
+    
+    model_config = ConfigDict(from_attributes=True)
 
 
 class ClienteList(BaseModel):
@@ -68,5 +84,4 @@ class ClienteResumen(BaseModel):
     proyectos_activos: int
     valor_total: float
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
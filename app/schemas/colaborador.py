@@ -1,7 +1,8 @@
-from pydantic import BaseModel, EmailStr, Field, validator
+from pydantic import BaseModel, ConfigDict, EmailStr, Field, field_validator
 from typing import Optional, List
 from datetime import datetime
 from enum import Enum
+import json
 
 
 class TipoColaboradorEnum(str, Enum):
@@ -11,6 +12,25 @@ class TipoColaboradorEnum(str, Enum):
     FREELANCE = "freelance"
 
 
+def normalizar_habilidades(v):
+    """
+    Convertir habilidades a lista de cadenas.
+    
+    Acepta una lista, un JSON de lista o el formato anterior separado por comas.
+    """
+    if v is None or isinstance(v, list):
+        return v
+    if isinstance(v, str):
+        texto = v.strip()
+        if texto.startswith("["):
+            try:
+                return json.loads(texto)
+            except ValueError:
+                raise ValueError('Las habilidades deben ser una lista JSON válida')
+        return [h.strip() for h in texto.split(",") if h.strip()]
+    raise ValueError('Las habilidades deben ser una lista de cadenas')
+
+
 class ColaboradorBase(BaseModel):
     """Esquema base para colaborador."""
     nombre: str = Field(..., min_length=1, max_length=100)
@@ -22,10 +42,12 @@ class ColaboradorBase(BaseModel):
     tipo: TipoColaboradorEnum = TipoColaboradorEnum.INTERNO
     costo_hora: float = Field(..., ge=0)
     disponible: bool = True
-    habilidades: Optional[str] = None
+    habilidades: Optional[List[str]] = None
     fecha_ingreso: Optional[datetime] = None
     activo: bool = True
 
+    _normalizar_habilidades = field_validator('habilidades', mode='before')(normalizar_habilidades)
+
 
 class ColaboradorCreate(ColaboradorBase):
     """Esquema para crear colaborador."""
@@ -43,10 +65,12 @@ class ColaboradorUpdate(BaseModel):
     tipo: Optional[TipoColaboradorEnum] = None
     costo_hora: Optional[float] = Field(None, ge=0)
     disponible: Optional[bool] = None
-    habilidades: Optional[str] = None
+    habilidades: Optional[List[str]] = None
     fecha_ingreso: Optional[datetime] = None
     activo: Optional[bool] = None
 
+    _normalizar_habilidades = field_validator('habilidades', mode='before')(normalizar_habilidades)
+
 
 class ColaboradorResponse(ColaboradorBase):
     """Esquema de respuesta para colaborador."""
@@ -54,8 +78,7 @@ class ColaboradorResponse(ColaboradorBase):
     fecha_creacion: datetime
     fecha_actualizacion: datetime
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class ColaboradorList(BaseModel):
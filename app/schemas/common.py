@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import Generic, TypeVar, List, Optional
+from pydantic import BaseModel, ConfigDict
+from typing import Any, Dict, Generic, TypeVar, List, Optional
 
 T = TypeVar('T')
 
@@ -10,6 +10,10 @@ class PaginatedResponse(BaseModel, Generic[T]):
     page: int = 1
     size: int = 10
     pages: int
+    # Cursor para pedir la página siguiente (solo en listados con paginación keyset)
+    next_cursor: Optional[Dict[str, Any]] = None
+    
+    model_config = ConfigDict(from_attributes=True)
     
     @classmethod
     def create(cls, items: List[T], total: int, page: int = 1, size: int = 10):
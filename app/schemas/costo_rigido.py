@@ -1,8 +1,20 @@
-from pydantic import BaseModel, Field, validator
+from pydantic import BaseModel, ConfigDict, Field, field_validator
 from typing import Optional, List
 from datetime import datetime
 from enum import Enum
 
+# Monedas aceptadas (orden usado en el mensaje de error)
+_ORDEN_MONEDAS = ('USD', 'EUR', 'COP', 'MXN', 'ARS', 'PEN', 'CLP')
+_MONEDAS_VALIDAS = frozenset(_ORDEN_MONEDAS)
+_ERROR_MONEDA = f'Moneda debe ser una de: {", ".join(_ORDEN_MONEDAS)}'
+
+
+def _fecha_aplicacion_no_nula(v):
+    # Omitir el campo usa la fecha actual (o conserva la guardada); null no se admite
+    if v is None:
+        raise ValueError('fecha_aplicacion no puede ser null')
+    return v
+
 
 class TipoCostoEnum(str, Enum):
     """Tipos de costo rígido."""
@@ -25,17 +37,20 @@ class CostoRigidoBase(BaseModel):
     proveedor: Optional[str] = Field(None, max_length=200)
     activo: bool = True
 
-    @validator('valor')
+    validar_fecha_aplicacion = field_validator('fecha_aplicacion')(_fecha_aplicacion_no_nula)
+
+    @field_validator('valor')
+    @classmethod
     def valor_positivo(cls, v):
         if v <= 0:
             raise ValueError('El valor debe ser positivo')
         return v
 
-    @validator('moneda')
+    @field_validator('moneda')
+    @classmethod
     def moneda_valida(cls, v):
-        monedas_validas = ['USD', 'EUR', 'COP', 'MXN', 'ARS', 'PEN', 'CLP']
-        if v not in monedas_validas:
-            raise ValueError(f'Moneda debe ser una de: {", ".join(monedas_validas)}')
+        if v not in _MONEDAS_VALIDAS:
+            raise ValueError(_ERROR_MONEDA)
         return v
 
 
@@ -58,6 +73,8 @@ class CostoRigidoUpdate(BaseModel):
     proveedor: Optional[str] = Field(None, max_length=200)
     activo: Optional[bool] = None
 
+    validar_fecha_aplicacion = field_validator('fecha_aplicacion')(_fecha_aplicacion_no_nula)
+
 
 class CostoRigidoResponse(CostoRigidoBase):
     """Esquema de respuesta para costo rígido."""
@@ -69,8 +86,26 @@ class CostoRigidoResponse(CostoRigidoBase):
     valor_anual: Optional[float] = None
     valor_mensual: Optional[float] = None
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
+
+
+class CostoRigidoListResponse(BaseModel):
+    """Esquema de respuesta para el listado de costos rígidos (sin la descripción)."""
+    proyecto_id: Optional[int] = None
+    nombre: str
+    tipo: TipoCostoEnum
+    valor: float
+    moneda: str
+    frecuencia: Optional[str] = None
+    fecha_aplicacion: Optional[datetime] = None
+    categoria: Optional[str] = None
+    proveedor: Optional[str] = None
+    activo: bool = True
+    id: int
+    fecha_creacion: datetime
+    fecha_actualizacion: datetime
+    
+    model_config = ConfigDict(from_attributes=True)
 
 
 class CostoRigidoList(BaseModel):
@@ -92,8 +127,7 @@ class CostoRigidoResumen(BaseModel):
     categoria: Optional[str]
     proyecto: Optional[str]
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class EstadisticasCostoRigido(BaseModel):
@@ -113,6 +113,33 @@ class CotizacionResponse(CotizacionBase):
         from_attributes = True
 
 
+class CotizacionListResponse(BaseModel):
+    """Esquema de respuesta para el listado de cotizaciones (sin descripción, términos ni notas)."""
+    cliente_id: int
+    proyecto_id: Optional[int] = None
+    titulo: str
+    descuento: float = 0.0
+    estado: EstadoCotizacionEnum
+    fecha_vencimiento: Optional[datetime] = None
+    validez_dias: int = 30
+    activo: bool = True
+    id: int
+    numero: str
+    subtotal: float
+    impuestos: float
+    total: float
+    fecha_creacion: datetime
+    fecha_envio: Optional[datetime]
+    fecha_aprobacion: Optional[datetime]
+    
+    # Campos calculados
+    dias_para_vencimiento: Optional[int] = None
+    porcentaje_impuestos: Optional[float] = None
+    
+    class Config:
+        from_attributes = True
+
+
 class CotizacionList(BaseModel):
     """Esquema para lista de cotizaciones."""
     cotizaciones: List[CotizacionResponse]
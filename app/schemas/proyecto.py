@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field, validator
-from typing import Optional, List
+from typing import Any, Dict, List, Optional
 from datetime import datetime
 from enum import Enum
 
@@ -69,6 +69,27 @@ class ProyectoUpdate(BaseModel):
     colaboradores_ids: Optional[List[int]] = None
 
 
+class ClienteProyecto(BaseModel):
+    """Datos del cliente incluidos en la respuesta de un proyecto."""
+    id: int
+    nombre: str
+    email: Optional[str] = None
+    
+    class Config:
+        from_attributes = True
+
+
+class ColaboradorProyecto(BaseModel):
+    """Datos de un colaborador incluidos en la respuesta de un proyecto."""
+    id: int
+    nombre: str
+    apellido: str
+    cargo: Optional[str] = None
+    
+    class Config:
+        from_attributes = True
+
+
 class ProyectoResponse(ProyectoBase):
     """Esquema de respuesta para proyecto."""
     id: int
@@ -76,10 +97,10 @@ class ProyectoResponse(ProyectoBase):
     fecha_actualizacion: datetime
     
     # Información del cliente
-    cliente: Optional[dict] = None
+    cliente: Optional[ClienteProyecto] = None
     
     # Información de colaboradores
-    colaboradores: Optional[List[dict]] = None
+    colaboradores: Optional[List[ColaboradorProyecto]] = None
     
     # Estadísticas calculadas
     dias_restantes: Optional[int] = None
@@ -97,6 +118,8 @@ class ProyectoList(BaseModel):
     pagina: int
     tamaño_pagina: int
     total_paginas: int
+    # Cursor para pedir la página siguiente (paginación keyset)
+    next_cursor: Optional[Dict[str, Any]] = None
 
 
 class AsignarColaborador(BaseModel):
@@ -5,11 +5,11 @@ Este módulo proporciona una clase base que implementa operaciones CRUD
 estándar que pueden ser reutilizadas por otros servicios.
 """
 
-from typing import Any, Dict, Generic, List, Optional, Type, TypeVar, Union
+from typing import Any, Dict, Generic, List, Optional, Tuple, Type, TypeVar, Union
 from fastapi.encoders import jsonable_encoder
 from pydantic import BaseModel
-from sqlalchemy.orm import Session
-from sqlalchemy import and_
+from sqlalchemy.orm import Query, Session
+from sqlalchemy import and_, exists, func, select
 
 from app.database import Base
 
@@ -18,6 +18,67 @@ CreateSchemaType = TypeVar("CreateSchemaType", bound=BaseModel)
 UpdateSchemaType = TypeVar("UpdateSchemaType", bound=BaseModel)
 
 
+def normalizar_busqueda(texto: Optional[str]) -> Optional[str]:
+    """
+    Normalizar un término de búsqueda recibido como parámetro.
+    
+    Args:
+        texto: Término tal como llega en la query
+        
+    Returns:
+        Optional[str]: Término sin espacios sobrantes, o None si queda vacío
+    """
+    if texto is None:
+        return None
+    texto = " ".join(texto.split())
+    return texto or None
+
+
+def ilike_contiene(columna, texto: str):
+    """
+    Construir un filtro ILIKE '%texto%' tratando el texto como literal.
+    
+    Los comodines % y _ del usuario se escapan, y el patrón viaja siempre como
+    parámetro ligado: la sentencia compilada es la misma para cualquier valor
+    y la reutiliza la caché de compilación de SQLAlchemy.
+    
+    Args:
+        columna: Columna sobre la que buscar
+        texto: Término de búsqueda ya normalizado
+        
+    Returns:
+        Expresión de filtro SQLAlchemy
+    """
+    escapado = texto.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return columna.ilike(f"%{escapado}%", escape="\\")
+
+
+def paginar_con_total(query: Query, skip: int, limit: int) -> Tuple[List[Any], int]:
+    """
+    Ejecutar una consulta paginada obteniendo también el total de registros.
+    
+    Filas y total en una sola consulta: COUNT(*) OVER () se calcula sobre
+    todo el conjunto filtrado antes de aplicar OFFSET/LIMIT. Solo si la
+    página queda fuera de rango, y no hay filas de las que leerlo, se cuenta
+    con una consulta aparte.
+    
+    Args:
+        query: Consulta de una entidad con filtros y orden ya aplicados
+        skip: Número de registros a omitir
+        limit: Número máximo de registros a devolver
+        
+    Returns:
+        tuple: (objetos de la página, total de registros)
+    """
+    rows = query.add_columns(func.count().over().label("_total")).offset(skip).limit(limit).all()
+    
+    if rows:
+        return [row[0] for row in rows], rows[0]._total
+    if skip > 0:
+        return [], query.order_by(None).count()
+    return [], 0
+
+
 class BaseService(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
     """
     Clase base para servicios CRUD.
@@ -26,6 +87,14 @@ class BaseService(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
     que pueden ser reutilizadas por servicios específicos.
     """
     
+    # Opciones de carga aplicadas a las lecturas genéricas (get_by_id, get_multi,
+    # get_paginated); p. ej. raiseload("*") para impedir cargas perezosas
+    query_options: tuple = ()
+    
+    # Opciones adicionales solo para los listados (get_multi, get_paginated);
+    # p. ej. defer() de columnas grandes que el esquema de listado no expone
+    list_options: tuple = ()
+    
     def __init__(self, model: Type[ModelType]):
         """
         Inicializar el servicio base.
@@ -35,18 +104,39 @@ class BaseService(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         """
         self.model = model
     
-    def get_by_id(self, db: Session, *, obj_id: int) -> Optional[ModelType]:
+    def _query(self, db: Session, *entities):
+        """
+        Construir una consulta sobre el modelo con las opciones de carga del servicio.
+        
+        Args:
+            db: Sesión de base de datos
+            *entities: Columnas o expresiones adicionales a seleccionar
+            
+        Returns:
+            Query: Consulta SQLAlchemy
+        """
+        return db.query(self.model, *entities).options(*self.query_options)
+    
+    def get_by_id(self, db: Session, *, obj_id: int, for_update: bool = False) -> Optional[ModelType]:
         """
         Obtener un objeto por su ID.
         
         Args:
             db: Sesión de base de datos
             obj_id: ID del objeto
+            for_update: Bloquear la fila (SELECT ... FOR UPDATE) hasta el commit
             
         Returns:
             Objeto encontrado o None si no existe
         """
-        return db.query(self.model).filter(self.model.id == obj_id).first()
+        # Session.get consulta primero el identity map y solo emite SQL si el
+        # objeto no está ya cargado en la sesión; con for_update siempre lo emite
+        return db.get(
+            self.model,
+            obj_id,
+            options=self.query_options,
+            with_for_update=True if for_update else None
+        )
     
     def get_multi(
         self, 
@@ -68,7 +158,7 @@ class BaseService(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         Returns:
             Lista de objetos
         """
-        query = db.query(self.model)
+        query = self._query(db).options(*self.list_options)
         
         if filters:
             query = query.filter(and_(*filters))
@@ -110,24 +200,21 @@ class BaseService(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
             skip: Número de registros a omitir
             limit: Número máximo de registros a devolver
             filters: Lista de filtros SQLAlchemy
+            order_by: Lista de criterios de ordenamiento
             
         Returns:
             Diccionario con datos paginados y metadatos
         """
-        # Obtener datos
-        items = self.get_multi(db=db, skip=skip, limit=limit, filters=filters)
+        query = self._query(db).options(*self.list_options)
+        
+        if filters:
+            query = query.filter(and_(*filters))
         
         # Aplicar ordenamiento si se especifica
-        if order_by:
-            query = db.query(self.model)
-            if filters:
-                query = query.filter(and_(*filters))
-            for order_field in order_by:
-                query = query.order_by(order_field)
-            items = query.offset(skip).limit(limit).all()
+        for order_field in order_by or []:
+            query = query.order_by(order_field)
         
-        # Contar total
-        total = self.get_count(db=db, filters=filters)
+        items, total = paginar_con_total(query, skip, limit)
         
         # Calcular metadatos de paginación
         total_pages = (total + limit - 1) // limit
@@ -194,7 +281,7 @@ class BaseService(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         if isinstance(obj_data, dict):
             update_data = obj_data
         else:
-            update_data = obj_data.dict(exclude_unset=True)
+            update_data = obj_data.model_dump(exclude_unset=True)
         
         for field, value in update_data.items():
             setattr(db_obj, field, value)
@@ -291,7 +378,7 @@ class BaseService(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         Returns:
             True si existe, False en caso contrario
         """
-        return db.query(self.model).filter(self.model.id == obj_id).first() is not None
+        return db.scalar(select(exists().where(self.model.id == obj_id)))
     
     def get_active(
         self,
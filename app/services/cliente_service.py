@@ -4,11 +4,11 @@ Servicio para gestión de clientes.
 Este módulo contiene la lógica de negocio específica para clientes.
 """
 
-from typing import List, Optional, Dict, Any
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, func
+from typing import Any, Dict, List, Optional, Union
+from sqlalchemy.orm import Session, defer, joinedload, raiseload
+from sqlalchemy import and_, exists, func, select, true, update
 
-from app.models import Cliente, Proyecto, Cotizacion
+from app.models import Cliente, Proyecto, Cotizacion, EstadoProyecto, EstadoCotizacion
 from app.schemas.cliente import ClienteCreate, ClienteUpdate
 from app.services.base_service import BaseService
 
@@ -18,9 +18,63 @@ class ClienteService(BaseService[Cliente, ClienteCreate, ClienteUpdate]):
     Servicio para operaciones específicas de clientes.
     """
     
+    # ClienteResponse no expone relaciones: cualquier carga perezosa durante
+    # la serialización sería un N+1 accidental, así que se prohíbe
+    query_options = (raiseload("*"),)
+    
+    # ClienteListResponse no incluye la dirección (Text): no se selecciona
+    list_options = (defer(Cliente.direccion, raiseload=True),)
+    
     def __init__(self):
         super().__init__(Cliente)
     
+    def update(
+        self,
+        db: Session,
+        *,
+        obj_id: int,
+        obj_data: Union[ClienteUpdate, Dict[str, Any]]
+    ) -> Optional[Cliente]:
+        """
+        Actualizar un cliente con una única sentencia UPDATE ... RETURNING.
+        
+        Evita el SELECT previo y el refresh posterior de la implementación base.
+        
+        Args:
+            db: Sesión de base de datos
+            obj_id: ID del cliente a actualizar
+            obj_data: Datos de actualización
+            
+        Returns:
+            Cliente actualizado o None si no existe
+            
+        Raises:
+            IntegrityError: Si el email o el NIT/RUC ya pertenecen a otro cliente
+        """
+        if isinstance(obj_data, dict):
+            update_data = obj_data
+        else:
+            update_data = obj_data.model_dump(exclude_unset=True)
+        
+        if not update_data:
+            return self.get_by_id(db=db, obj_id=obj_id)
+        
+        cliente = db.execute(
+            update(Cliente)
+            .where(Cliente.id == obj_id)
+            .values(**update_data)
+            .returning(Cliente),
+            execution_options={"synchronize_session": False}
+        ).scalar_one_or_none()
+        
+        if cliente is not None:
+            # Desasociar antes del commit para conservar los valores devueltos
+            # por RETURNING sin que el commit los expire
+            db.expunge(cliente)
+        db.commit()
+        
+        return cliente
+    
     def get_by_email(self, db: Session, *, email: str) -> Optional[Cliente]:
         """
         Obtener cliente por email.
@@ -93,17 +147,15 @@ class ClienteService(BaseService[Cliente, ClienteCreate, ClienteUpdate]):
         Returns:
             Diccionario con información del cliente y sus proyectos
         """
-        cliente = self.get_by_id(db=db, obj_id=cliente_id)
+        # Una sola consulta: cliente + proyectos activos vía LEFT OUTER JOIN
+        cliente = db.query(Cliente).options(
+            joinedload(Cliente.proyectos.and_(Proyecto.activo == True))
+        ).filter(Cliente.id == cliente_id).first()
         
         if not cliente:
             return None
         
-        proyectos = db.query(Proyecto).filter(
-            and_(
-                Proyecto.cliente_id == cliente_id,
-                Proyecto.activo == True
-            )
-        ).all()
+        proyectos = cliente.proyectos
         
         return {
             "cliente": cliente,
@@ -122,54 +174,59 @@ class ClienteService(BaseService[Cliente, ClienteCreate, ClienteUpdate]):
         Returns:
             Diccionario con estadísticas del cliente
         """
-        cliente = self.get_by_id(db=db, obj_id=cliente_id)
-        
-        if not cliente:
-            return None
-        
-        # Estadísticas de proyectos
-        proyectos_stats = db.query(
+        # Agregados de proyectos y cotizaciones como subconsultas de una fila,
+        # combinados con el cliente en una sola sentencia
+        proyectos_stats = select(
             func.count(Proyecto.id).label("total_proyectos"),
-            func.count().filter(Proyecto.estado == "completado").label("proyectos_completados"),
-            func.count().filter(Proyecto.estado == "en_progreso").label("proyectos_en_progreso"),
+            func.count().filter(Proyecto.estado == EstadoProyecto.COMPLETADO).label("proyectos_completados"),
+            func.count().filter(Proyecto.estado == EstadoProyecto.EN_PROGRESO).label("proyectos_en_progreso"),
             func.sum(Proyecto.presupuesto).label("presupuesto_total"),
             func.sum(Proyecto.costo_real).label("costo_real_total")
-        ).filter(
+        ).where(
             and_(
                 Proyecto.cliente_id == cliente_id,
                 Proyecto.activo == True
             )
-        ).first()
+        ).subquery()
         
-        # Estadísticas de cotizaciones
-        cotizaciones_stats = db.query(
+        cotizaciones_stats = select(
             func.count(Cotizacion.id).label("total_cotizaciones"),
-            func.count().filter(Cotizacion.estado == "aprobada").label("cotizaciones_aprobadas"),
+            func.count().filter(Cotizacion.estado == EstadoCotizacion.APROBADA).label("cotizaciones_aprobadas"),
             func.sum(Cotizacion.total).label("valor_total_cotizaciones")
-        ).filter(
+        ).where(
             and_(
                 Cotizacion.cliente_id == cliente_id,
                 Cotizacion.activo == True
             )
+        ).subquery()
+        
+        stats = db.execute(
+            select(Cliente.id, Cliente.nombre, proyectos_stats, cotizaciones_stats)
+            .select_from(Cliente)
+            .join(proyectos_stats, true())
+            .join(cotizaciones_stats, true())
+            .where(Cliente.id == cliente_id)
         ).first()
         
+        if not stats:
+            return None
+        
         return {
             "cliente": {
-                "id": cliente.id,
-                "nombre": cliente.nombre,
-                "tipo_cliente": cliente.tipo_cliente
+                "id": stats.id,
+                "nombre": stats.nombre
             },
             "proyectos": {
-                "total": proyectos_stats.total_proyectos or 0,
-                "completados": proyectos_stats.proyectos_completados or 0,
-                "en_progreso": proyectos_stats.proyectos_en_progreso or 0,
-                "presupuesto_total": float(proyectos_stats.presupuesto_total or 0),
-                "costo_real_total": float(proyectos_stats.costo_real_total or 0)
+                "total": stats.total_proyectos or 0,
+                "completados": stats.proyectos_completados or 0,
+                "en_progreso": stats.proyectos_en_progreso or 0,
+                "presupuesto_total": float(stats.presupuesto_total or 0),
+                "costo_real_total": float(stats.costo_real_total or 0)
             },
             "cotizaciones": {
-                "total": cotizaciones_stats.total_cotizaciones or 0,
-                "aprobadas": cotizaciones_stats.cotizaciones_aprobadas or 0,
-                "valor_total": float(cotizaciones_stats.valor_total_cotizaciones or 0)
+                "total": stats.total_cotizaciones or 0,
+                "aprobadas": stats.cotizaciones_aprobadas or 0,
+                "valor_total": float(stats.valor_total_cotizaciones or 0)
             }
         }
     
@@ -237,13 +294,13 @@ class ClienteService(BaseService[Cliente, ClienteCreate, ClienteUpdate]):
         Returns:
             True si el email es único, False en caso contrario
         """
-        query = db.query(Cliente).filter(Cliente.email == email)
+        # SELECT EXISTS(...): no materializa columnas ni construye instancias
+        condicion = Cliente.email == email
         
         if exclude_id:
-            query = query.filter(Cliente.id != exclude_id)
+            condicion = and_(condicion, Cliente.id != exclude_id)
         
-        existing = query.first()
-        return existing is None
+        return not db.scalar(select(exists().where(condicion)))
 
 
 # Instancia del servicio
@@ -1,9 +1,11 @@
 from typing import List, Optional, Dict, Any
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, func
+from sqlalchemy.orm import Session, raiseload
+from sqlalchemy import and_, or_, func, String, cast, exists, select
 from fastapi import HTTPException, status
-from app.models import Colaborador, proyecto_colaborador
+from app.models import Colaborador, habilidades_minusculas, proyecto_colaborador
 from app.schemas.colaborador import ColaboradorCreate, ColaboradorUpdate, EstadisticasColaborador
+from app.services.base_service import ilike_contiene, normalizar_busqueda, paginar_con_total
+import json
 import logging
 
 logger = logging.getLogger(__name__)
@@ -12,14 +14,12 @@ logger = logging.getLogger(__name__)
 class ColaboradorService:
     """Servicio para operaciones CRUD de colaboradores."""
     
-    def __init__(self, db: Session):
-        self.db = db
-    
-    def create_colaborador(self, colaborador: ColaboradorCreate) -> Colaborador:
+    def create_colaborador(self, db: Session, colaborador: ColaboradorCreate) -> Colaborador:
         """
         Crear un nuevo colaborador.
         
         Args:
+            db: Sesión de base de datos
             colaborador: Datos del colaborador a crear
             
         Returns:
@@ -28,50 +28,57 @@ class ColaboradorService:
         Raises:
             HTTPException: Si el email ya existe
         """
-        # Verificar si el email ya existe
-        existing_colaborador = self.db.query(Colaborador).filter(
-            Colaborador.email == colaborador.email
-        ).first()
-        if existing_colaborador:
+        # Verificar si el email ya existe (SELECT EXISTS, sin cargar el colaborador)
+        email_existe = db.scalar(
+            select(exists().where(Colaborador.email == colaborador.email))
+        )
+        if email_existe:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f"Ya existe un colaborador con el email {colaborador.email}"
             )
         
-        db_colaborador = Colaborador(**colaborador.dict())
-        self.db.add(db_colaborador)
-        self.db.commit()
-        self.db.refresh(db_colaborador)
+        db_colaborador = Colaborador(**colaborador.model_dump())
+        db.add(db_colaborador)
+        db.commit()
+        db.refresh(db_colaborador)
         
         logger.info(f"Colaborador creado: {db_colaborador.email}")
         return db_colaborador
     
-    def get_colaborador(self, colaborador_id: int) -> Optional[Colaborador]:
+    def get_colaborador(self, db: Session, colaborador_id: int, for_update: bool = False) -> Optional[Colaborador]:
         """
         Obtener un colaborador por ID.
         
         Args:
+            db: Sesión de base de datos
             colaborador_id: ID del colaborador
+            for_update: Bloquear la fila (SELECT ... FOR UPDATE) hasta el commit
             
         Returns:
             Optional[Colaborador]: El colaborador o None si no existe
         """
-        return self.db.query(Colaborador).filter(Colaborador.id == colaborador_id).first()
+        query = db.query(Colaborador).filter(Colaborador.id == colaborador_id)
+        if for_update:
+            query = query.with_for_update()
+        return query.first()
     
-    def get_colaborador_by_email(self, email: str) -> Optional[Colaborador]:
+    def get_colaborador_by_email(self, db: Session, email: str) -> Optional[Colaborador]:
         """
         Obtener un colaborador por email.
         
         Args:
+            db: Sesión de base de datos
             email: Email del colaborador
             
         Returns:
             Optional[Colaborador]: El colaborador o None si no existe
         """
-        return self.db.query(Colaborador).filter(Colaborador.email == email).first()
+        return db.query(Colaborador).filter(Colaborador.email == email).first()
     
     def get_colaboradores(
         self,
+        db: Session,
         skip: int = 0,
         limit: int = 100,
         activo: Optional[bool] = None,
@@ -84,6 +91,7 @@ class ColaboradorService:
         Obtener lista de colaboradores con filtros y paginación.
         
         Args:
+            db: Sesión de base de datos
             skip: Número de registros a saltar
             limit: Número máximo de registros a retornar
             activo: Filtrar por estado activo/inactivo
@@ -95,7 +103,8 @@ class ColaboradorService:
         Returns:
             tuple: (lista_colaboradores, total_registros)
         """
-        query = self.db.query(Colaborador)
+        # ColaboradorResponse no expone relaciones: se prohíben las cargas perezosas
+        query = db.query(Colaborador).options(raiseload("*"))
         
         # Aplicar filtros
         if activo is not None:
@@ -110,26 +119,21 @@ class ColaboradorService:
         if departamento:
             query = query.filter(Colaborador.departamento == departamento)
         
+        search = normalizar_busqueda(search)
         if search:
-            search_term = f"%{search}%"
             query = query.filter(
                 or_(
-                    Colaborador.nombre.ilike(search_term),
-                    Colaborador.apellido.ilike(search_term),
-                    Colaborador.email.ilike(search_term)
+                    ilike_contiene(Colaborador.nombre, search),
+                    ilike_contiene(Colaborador.apellido, search),
+                    ilike_contiene(Colaborador.email, search)
                 )
             )
         
-        # Contar total de registros
-        total = query.count()
-        
-        # Aplicar paginación
-        colaboradores = query.offset(skip).limit(limit).all()
-        
-        return colaboradores, total
+        return paginar_con_total(query, skip, limit)
     
     def update_colaborador(
         self, 
+        db: Session,
         colaborador_id: int, 
         colaborador_update: ColaboradorUpdate
     ) -> Optional[Colaborador]:
@@ -137,6 +141,7 @@ class ColaboradorService:
         Actualizar un colaborador.
         
         Args:
+            db: Sesión de base de datos
             colaborador_id: ID del colaborador a actualizar
             colaborador_update: Datos actualizados del colaborador
             
@@ -146,85 +151,93 @@ class ColaboradorService:
         Raises:
             HTTPException: Si el email ya existe para otro colaborador
         """
-        db_colaborador = self.get_colaborador(colaborador_id)
+        # Lectura y escritura en la misma transacción, con la fila bloqueada
+        db_colaborador = self.get_colaborador(db, colaborador_id, for_update=True)
         if not db_colaborador:
             return None
         
         # Verificar email único si se está actualizando
         if colaborador_update.email and colaborador_update.email != db_colaborador.email:
-            existing_colaborador = self.db.query(Colaborador).filter(
-                and_(
-                    Colaborador.email == colaborador_update.email,
-                    Colaborador.id != colaborador_id
-                )
-            ).first()
-            if existing_colaborador:
+            email_existe = db.scalar(
+                select(exists().where(
+                    and_(
+                        Colaborador.email == colaborador_update.email,
+                        Colaborador.id != colaborador_id
+                    )
+                ))
+            )
+            if email_existe:
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST,
                     detail=f"Ya existe un colaborador con el email {colaborador_update.email}"
                 )
         
         # Actualizar campos
-        update_data = colaborador_update.dict(exclude_unset=True)
+        update_data = colaborador_update.model_dump(exclude_unset=True)
         for field, value in update_data.items():
             setattr(db_colaborador, field, value)
         
-        self.db.commit()
-        self.db.refresh(db_colaborador)
+        db.commit()
+        db.refresh(db_colaborador)
         
         logger.info(f"Colaborador actualizado: {db_colaborador.email}")
         return db_colaborador
     
-    def delete_colaborador(self, colaborador_id: int) -> bool:
+    def delete_colaborador(self, db: Session, colaborador_id: int) -> bool:
         """
         Eliminar (desactivar) un colaborador.
         
         Args:
+            db: Sesión de base de datos
             colaborador_id: ID del colaborador a eliminar
             
         Returns:
             bool: True si se eliminó exitosamente, False si no existe
         """
-        db_colaborador = self.get_colaborador(colaborador_id)
+        # Lectura y escritura en la misma transacción, con la fila bloqueada
+        db_colaborador = self.get_colaborador(db, colaborador_id, for_update=True)
         if not db_colaborador:
             return False
         
         # Soft delete - solo marcar como inactivo
         db_colaborador.activo = False
-        self.db.commit()
+        db.commit()
         
         logger.info(f"Colaborador desactivado: {db_colaborador.email}")
         return True
     
-    def get_estadisticas(self) -> EstadisticasColaborador:
+    def get_estadisticas(self, db: Session) -> EstadisticasColaborador:
         """
         Obtener estadísticas de colaboradores.
         
+        Args:
+            db: Sesión de base de datos
+            
         Returns:
             EstadisticasColaborador: Estadísticas de colaboradores
         """
         # Contar colaboradores
-        total_colaboradores = self.db.query(Colaborador).count()
-        colaboradores_activos = self.db.query(Colaborador).filter(
+        total_colaboradores = db.query(Colaborador).count()
+        colaboradores_activos = db.query(Colaborador).filter(
             Colaborador.activo == True
         ).count()
-        colaboradores_disponibles = self.db.query(Colaborador).filter(
+        colaboradores_disponibles = db.query(Colaborador).filter(
             and_(Colaborador.activo == True, Colaborador.disponible == True)
         ).count()
         
         # Calcular promedio de costo por hora
-        promedio_costo_hora = self.db.query(func.avg(Colaborador.costo_hora)).scalar() or 0.0
+        promedio_costo_hora = db.query(func.avg(Colaborador.costo_hora)).scalar() or 0.0
         
         # Agrupar por tipo
-        tipos_query = self.db.query(
+        tipos_query = db.query(
             Colaborador.tipo,
             func.count(Colaborador.id).label('count')
         ).filter(Colaborador.activo == True).group_by(Colaborador.tipo).all()
         
-        total_por_tipo = {str(tipo): count for tipo, count in tipos_query}
+        total_por_tipo = {tipo.value: count for tipo, count in tipos_query}
         
         # Agrupar por departamento
-        departamentos_query = self.db.query(
+        departamentos_query = db.query(
             Colaborador.departamento,
             func.count(Colaborador.id).label('count')
         ).filter(
@@ -242,71 +255,95 @@ class ColaboradorService:
             total_por_departamento=total_por_departamento
         )
     
-    def get_colaboradores_disponibles(self) -> List[Colaborador]:
+    def get_colaboradores_disponibles(self, db: Session) -> List[Colaborador]:
         """
         Obtener lista de colaboradores disponibles.
         
+        Args:
+            db: Sesión de base de datos
+            
         Returns:
             List[Colaborador]: Lista de colaboradores disponibles
         """
-        return self.db.query(Colaborador).filter(
+        return db.query(Colaborador).filter(
             and_(
                 Colaborador.activo == True,
                 Colaborador.disponible == True
             )
         ).all()
     
-    def buscar_colaboradores_por_habilidad(self, habilidad: str) -> List[Colaborador]:
+    def buscar_colaboradores_por_habilidad(self, db: Session, habilidad: str) -> List[Colaborador]:
         """
         Buscar colaboradores por habilidad.
         
+        La habilidad debe coincidir con un elemento completo de la lista, sin
+        distinguir mayúsculas ("python" encuentra "Python").
+        
         Args:
+            db: Sesión de base de datos
             habilidad: Habilidad a buscar
             
         Returns:
             List[Colaborador]: Lista de colaboradores con la habilidad
         """
-        return self.db.query(Colaborador).filter(
+        habilidad = habilidad.strip().lower()
+        if db.get_bind().dialect.name == "postgresql":
+            # Contención JSONB (@>) sobre las habilidades en minúsculas,
+            # resuelta con el índice GIN de la misma expresión
+            filtro_habilidad = habilidades_minusculas(Colaborador.habilidades).contains([habilidad])
+        else:
+            # Otros motores no tienen operador de contención: buscar el
+            # elemento serializado ("python") en el JSON, sin distinguir mayúsculas
+            filtro_habilidad = ilike_contiene(cast(Colaborador.habilidades, String), json.dumps(habilidad))
+        
+        return db.query(Colaborador).filter(
             and_(
                 Colaborador.activo == True,
-                Colaborador.habilidades.ilike(f"%{habilidad}%")
+                filtro_habilidad
             )
         ).all()
     
-    def get_colaboradores_por_departamento(self, departamento: str) -> List[Colaborador]:
+    def get_colaboradores_por_departamento(self, db: Session, departamento: str) -> List[Colaborador]:
         """
         Obtener colaboradores por departamento.
         
         Args:
+            db: Sesión de base de datos
             departamento: Nombre del departamento
             
         Returns:
             List[Colaborador]: Lista de colaboradores del departamento
         """
-        return self.db.query(Colaborador).filter(
+        return db.query(Colaborador).filter(
             and_(
                 Colaborador.activo == True,
                 Colaborador.departamento == departamento
             )
         ).all()
     
-    def activar_colaborador(self, colaborador_id: int) -> Optional[Colaborador]:
+    def activar_colaborador(self, db: Session, colaborador_id: int) -> Optional[Colaborador]:
         """
         Activar un colaborador.
         
         Args:
+            db: Sesión de base de datos
             colaborador_id: ID del colaborador a activar
             
         Returns:
             Optional[Colaborador]: El colaborador activado o None si no existe
         """
-        db_colaborador = self.get_colaborador(colaborador_id)
+        # Lectura y escritura en la misma transacción, con la fila bloqueada
+        db_colaborador = self.get_colaborador(db, colaborador_id, for_update=True)
         if not db_colaborador:
             return None
         
         db_colaborador.activo = True
-        self.db.commit()
-        self.db.refresh(db_colaborador)
+        db.commit()
+        db.refresh(db_colaborador)
         
         logger.info(f"Colaborador activado: {db_colaborador.email}")
         return db_colaborador
+
+
+# Instancia del servicio
+colaborador_service = ColaboradorService()
@@ -5,7 +5,7 @@ Este módulo contiene la lógica de negocio específica para costos rígidos.
 """
 
 from typing import List, Optional, Dict, Any
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, defer, raiseload
 from sqlalchemy import and_, func, extract
 from datetime import datetime, timedelta
 
@@ -19,6 +19,13 @@ class CostoRigidoService(BaseService[CostoRigido, CostoRigidoCreate, CostoRigido
     Servicio para operaciones específicas de costos rígidos.
     """
     
+    # CostoRigidoResponse no expone el proyecto: cualquier carga perezosa durante
+    # la serialización sería un N+1 accidental, así que se prohíbe
+    query_options = (raiseload("*"),)
+    
+    # CostoRigidoListResponse no incluye la descripción (Text): no se selecciona
+    list_options = (defer(CostoRigido.descripcion, raiseload=True),)
+    
     def __init__(self):
         super().__init__(CostoRigido)
     
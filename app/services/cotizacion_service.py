@@ -5,7 +5,7 @@ Este módulo contiene la lógica de negocio específica para cotizaciones.
 """
 
 from typing import List, Optional, Dict, Any
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, defer, raiseload
 from sqlalchemy import and_, func, extract
 from datetime import datetime
 
@@ -19,6 +19,17 @@ class CotizacionService(BaseService[Cotizacion, CotizacionCreate, CotizacionUpda
     Servicio para operaciones específicas de cotizaciones.
     """
     
+    # CotizacionResponse no expone items, cliente ni proyecto: cualquier carga
+    # perezosa durante la serialización sería un N+1 accidental, así que se prohíbe
+    query_options = (raiseload("*"),)
+    
+    # CotizacionListResponse no incluye las columnas Text: no se seleccionan
+    list_options = (
+        defer(Cotizacion.descripcion, raiseload=True),
+        defer(Cotizacion.terminos_condiciones, raiseload=True),
+        defer(Cotizacion.notas, raiseload=True),
+    )
+    
     def __init__(self):
         super().__init__(Cotizacion)
     
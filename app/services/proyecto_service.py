@@ -1,14 +1,24 @@
 from typing import List, Optional, Dict, Any
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, func
+from sqlalchemy.orm import Session, joinedload, raiseload, selectinload
+from sqlalchemy import and_, or_, func, exists, select, tuple_
 from fastapi import HTTPException, status
 from app.models import Proyecto, Cliente, Colaborador, proyecto_colaborador
 from app.schemas.proyecto import ProyectoCreate, ProyectoUpdate, EstadisticasProyecto
+from app.services.base_service import paginar_con_total
 from datetime import datetime, timedelta
 import logging
 
 logger = logging.getLogger(__name__)
 
+# ProyectoResponse serializa el cliente y los colaboradores: se cargan por
+# adelantado (JOIN y un SELECT ... IN) y cualquier otra relación queda
+# prohibida, de modo que un acceso no previsto falla en vez de ser un N+1
+_OPCIONES_RESPUESTA = (
+    joinedload(Proyecto.cliente),
+    selectinload(Proyecto.colaboradores),
+    raiseload("*"),
+)
+
 
 class ProyectoService:
     """Servicio para operaciones CRUD de proyectos."""
@@ -29,16 +39,18 @@ class ProyectoService:
         Raises:
             HTTPException: Si el cliente no existe
         """
-        # Verificar que el cliente existe
-        cliente = self.db.query(Cliente).filter(Cliente.id == proyecto.cliente_id).first()
-        if not cliente:
+        # Verificar que el cliente existe (SELECT EXISTS, sin cargar el cliente)
+        cliente_existe = self.db.scalar(
+            select(exists().where(Cliente.id == proyecto.cliente_id))
+        )
+        if not cliente_existe:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f"No existe un cliente con ID {proyecto.cliente_id}"
             )
         
         # Crear el proyecto
-        proyecto_data = proyecto.dict(exclude={'colaboradores_ids'})
+        proyecto_data = proyecto.model_dump(exclude={'colaboradores_ids'})
         db_proyecto = Proyecto(**proyecto_data)
         self.db.add(db_proyecto)
         self.db.flush()  # Para obtener el ID del proyecto
@@ -68,7 +80,9 @@ class ProyectoService:
         Returns:
             Optional[Proyecto]: El proyecto o None si no existe
         """
-        return self.db.query(Proyecto).filter(Proyecto.id == proyecto_id).first()
+        return self.db.query(Proyecto).options(*_OPCIONES_RESPUESTA).filter(
+            Proyecto.id == proyecto_id
+        ).first()
     
     def get_proyectos(
         self,
@@ -77,11 +91,17 @@ class ProyectoService:
         activo: Optional[bool] = None,
         estado: Optional[str] = None,
         cliente_id: Optional[int] = None,
-        search: Optional[str] = None
+        search: Optional[str] = None,
+        after_fecha: Optional[datetime] = None,
+        after_id: Optional[int] = None
     ) -> tuple[List[Proyecto], int]:
         """
         Obtener lista de proyectos con filtros y paginación.
         
+        Los proyectos se ordenan del más reciente al más antiguo. Con
+        after_fecha y after_id se continúa tras ese proyecto (paginación
+        keyset) en lugar de usar skip, y el total cuenta los restantes.
+        
         Args:
             skip: Número de registros a saltar
             limit: Número máximo de registros a retornar
@@ -89,33 +109,41 @@ class ProyectoService:
             estado: Filtrar por estado del proyecto
             cliente_id: Filtrar por cliente
             search: Buscar por nombre del proyecto
+            after_fecha: Cursor: fecha_creacion del último proyecto recibido
+            after_id: Cursor: ID del último proyecto recibido
             
         Returns:
             tuple: (lista_proyectos, total_registros)
         """
-        query = self.db.query(Proyecto)
+        filtros = []
         
         # Aplicar filtros
         if activo is not None:
-            query = query.filter(Proyecto.activo == activo)
+            filtros.append(Proyecto.activo == activo)
         
         if estado:
-            query = query.filter(Proyecto.estado == estado)
+            filtros.append(Proyecto.estado == estado)
         
         if cliente_id:
-            query = query.filter(Proyecto.cliente_id == cliente_id)
+            filtros.append(Proyecto.cliente_id == cliente_id)
         
         if search:
             search_term = f"%{search}%"
-            query = query.filter(Proyecto.nombre.ilike(search_term))
+            filtros.append(Proyecto.nombre.ilike(search_term))
         
-        # Contar total de registros
-        total = query.count()
-        
-        # Aplicar paginación
-        proyectos = query.offset(skip).limit(limit).all()
+        # Paginación keyset: continuar después de la última (fecha, id) recibida
+        if after_fecha is not None and after_id is not None:
+            filtros.append(
+                tuple_(Proyecto.fecha_creacion, Proyecto.id) < tuple_(after_fecha, after_id)
+            )
+            skip = 0
         
-        return proyectos, total
+        # El JOIN con cliente es muchos-a-uno y no altera el número de filas
+        # sobre el que se calcula el total
+        query = self.db.query(Proyecto).options(*_OPCIONES_RESPUESTA).filter(*filtros).order_by(
+            Proyecto.fecha_creacion.desc(), Proyecto.id.desc()  # id desempata fechas iguales
+        )
+        return paginar_con_total(query, skip, limit)
     
     def update_proyecto(
         self, 
@@ -141,17 +169,17 @@ class ProyectoService:
         
         # Verificar que el cliente existe si se está actualizando
         if proyecto_update.cliente_id:
-            cliente = self.db.query(Cliente).filter(
-                Cliente.id == proyecto_update.cliente_id
-            ).first()
-            if not cliente:
+            cliente_existe = self.db.scalar(
+                select(exists().where(Cliente.id == proyecto_update.cliente_id))
+            )
+            if not cliente_existe:
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST,
                     detail=f"No existe un cliente con ID {proyecto_update.cliente_id}"
                 )
         
         # Actualizar campos
-        update_data = proyecto_update.dict(exclude_unset=True, exclude={'colaboradores_ids'})
+        update_data = proyecto_update.model_dump(exclude_unset=True, exclude={'colaboradores_ids'})
         for field, value in update_data.items():
             setattr(db_proyecto, field, value)
         
@@ -226,7 +254,7 @@ class ProyectoService:
             func.count(Proyecto.id).label('count')
         ).filter(Proyecto.activo == True).group_by(Proyecto.estado).all()
         
-        proyectos_por_estado = {str(estado): count for estado, count in estados_query}
+        proyectos_por_estado = {estado.value: count for estado, count in estados_query}
         
         # Agrupar por cliente
         clientes_query = self.db.query(
@@ -346,7 +374,7 @@ class ProyectoService:
         Returns:
             List[Proyecto]: Lista de proyectos asignados
         """
-        return self.db.query(Proyecto).join(
+        return self.db.query(Proyecto).options(*_OPCIONES_RESPUESTA).join(
             proyecto_colaborador
         ).filter(
             proyecto_colaborador.c.colaborador_id == colaborador_id
@@ -362,7 +390,7 @@ class ProyectoService:
         Returns:
             List[Proyecto]: Lista de proyectos del cliente
         """
-        return self.db.query(Proyecto).filter(
+        return self.db.query(Proyecto).options(*_OPCIONES_RESPUESTA).filter(
             Proyecto.cliente_id == cliente_id
         ).all()
     
@@ -133,7 +133,7 @@ def create_sample_collaborators(db: Session):
             "departamento": "Desarrollo",
             "tipo": TipoColaborador.INTERNO,
             "costo_hora": 25000,
-            "habilidades": "Python, JavaScript, React, PostgreSQL"
+            "habilidades": ["Python", "JavaScript", "React", "PostgreSQL"]
         },
         {
             "nombre": "Sofia",
@@ -144,7 +144,7 @@ def create_sample_collaborators(db: Session):
             "departamento": "Diseño",
             "tipo": TipoColaborador.INTERNO,
             "costo_hora": 22000,
-            "habilidades": "Figma, Adobe XD, Photoshop, Illustrator"
+            "habilidades": ["Figma", "Adobe XD", "Photoshop", "Illustrator"]
         },
         {
             "nombre": "Carlos",
@@ -155,7 +155,7 @@ def create_sample_collaborators(db: Session):
             "departamento": "Infraestructura",
             "tipo": TipoColaborador.FREELANCE,
             "costo_hora": 35000,
-            "habilidades": "Docker, Kubernetes, AWS, Jenkins"
+            "habilidades": ["Docker", "Kubernetes", "AWS", "Jenkins"]
         },
         {
             "nombre": "Elena",
@@ -166,7 +166,7 @@ def create_sample_collaborators(db: Session):
             "departamento": "Análisis",
             "tipo": TipoColaborador.INTERNO,
             "costo_hora": 20000,
-            "habilidades": "SQL, Power BI, Excel, Python"
+            "habilidades": ["SQL", "Power BI", "Excel", "Python"]
         },
         {
             "nombre": "Miguel",
@@ -177,7 +177,7 @@ def create_sample_collaborators(db: Session):
             "departamento": "Seguridad",
             "tipo": TipoColaborador.EXTERNO,
             "costo_hora": 30000,
-            "habilidades": "Pentesting, OWASP, Kali Linux, Nessus"
+            "habilidades": ["Pentesting", "OWASP", "Kali Linux", "Nessus"]
         }
     ]
     
@@ -0,0 +1,102 @@
+"""
+Configuración de pytest.
+
+Las pruebas levantan la aplicación completa con TestClient sobre una base
+SQLite temporal. La configuración se lee al importar app.config, así que las
+variables de entorno se fijan aquí antes de importar la aplicación.
+"""
+
+import os
+import tempfile
+
+_DIRECTORIO_PRUEBAS = tempfile.mkdtemp(prefix="pruebas_api_")
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(_DIRECTORIO_PRUEBAS, "pruebas.db")
+os.environ["SECRET_KEY"] = "clave-solo-para-pruebas"
+os.environ["DEBUG"] = "false"
+os.environ["REDIS_URL"] = ""  # Caché en memoria del proceso
+os.environ["DB_POOL_WARMUP"] = "false"
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.cache import invalidate
+from app.database import Base, SessionLocal, engine
+from app.main import app
+from app.models import Usuario
+
+API = "/api/v1"
+
+
+@pytest.fixture(scope="session")
+def client():
+    """
+    Cliente HTTP autenticado como el administrador inicial.
+
+    El inicio de la aplicación crea las tablas y el administrador; se inicia
+    sesión una sola vez para no consumir el límite de intentos de login.
+    """
+    with TestClient(app) as cliente:
+        respuesta = cliente.post(
+            f"{API}/auth/login",
+            json={"email": "admin@sistema.com", "password": "Admin123!"}
+        )
+        assert respuesta.status_code == 200, respuesta.text
+        cliente.headers["Authorization"] = "Bearer " + respuesta.json()["access_token"]
+        yield cliente
+
+
+@pytest.fixture
+def db():
+    """
+    Sesión de base de datos para preparar o comprobar datos directamente.
+    """
+    sesion = SessionLocal()
+    try:
+        yield sesion
+    finally:
+        sesion.close()
+
+
+@pytest.fixture(autouse=True)
+def limpiar_datos(client):
+    """
+    Dejar la base y la caché vacías (salvo los usuarios) tras cada prueba.
+    """
+    yield
+    with engine.begin() as conn:
+        for tabla in reversed(Base.metadata.sorted_tables):
+            if tabla.name != Usuario.__tablename__:
+                conn.execute(tabla.delete())
+    invalidate("")
+
+
+@pytest.fixture
+def cliente_id(client):
+    """
+    ID de un cliente creado a través de la API.
+    """
+    respuesta = client.post(
+        f"{API}/clientes/clientes",
+        json={"nombre": "Acme", "email": "contacto@acme.com", "nit_ruc": "900100"}
+    )
+    assert respuesta.status_code == 201, respuesta.text
+    return respuesta.json()["id"]
+
+
+@pytest.fixture
+def colaborador_id(client):
+    """
+    ID de un colaborador creado a través de la API.
+    """
+    respuesta = client.post(
+        f"{API}/colaboradores/",
+        json={
+            "nombre": "Ana",
+            "apellido": "Pérez",
+            "email": "ana@acme.com",
+            "cargo": "Desarrolladora",
+            "costo_hora": 25
+        }
+    )
+    assert respuesta.status_code == 200, respuesta.text
+    return respuesta.json()["id"]
@@ -0,0 +1,64 @@
+"""
+Pruebas de autenticación.
+"""
+
+import pytest
+
+from app import auth
+from app.config import settings
+from tests.conftest import API
+
+LOGIN = f"{API}/auth/login"
+ADMIN = {"email": "admin@sistema.com", "password": "Admin123!"}
+
+
+@pytest.fixture(autouse=True)
+def limpiar_intentos_login():
+    """
+    Empezar cada prueba sin logins fallidos registrados.
+    """
+    auth._intentos_login.clear()
+    yield
+    auth._intentos_login.clear()
+
+
+def test_login_correcto(client):
+    respuesta = client.post(LOGIN, json=ADMIN)
+
+    assert respuesta.status_code == 200, respuesta.text
+    assert respuesta.json()["token_type"] == "bearer"
+
+
+def test_login_incorrecto(client):
+    respuesta = client.post(LOGIN, json={**ADMIN, "password": "Incorrecta1!"})
+
+    assert respuesta.status_code == 401
+
+
+def test_logins_correctos_no_cuentan_para_el_limite(client):
+    for _ in range(settings.LOGIN_RATE_LIMIT + 2):
+        assert client.post(LOGIN, json=ADMIN).status_code == 200
+
+
+def test_limite_de_logins_fallidos(client):
+    for _ in range(settings.LOGIN_RATE_LIMIT):
+        assert client.post(LOGIN, json={**ADMIN, "password": "Incorrecta1!"}).status_code == 401
+
+    # Agotado el límite se rechaza incluso la contraseña correcta
+    respuesta = client.post(LOGIN, json=ADMIN)
+    assert respuesta.status_code == 429
+    assert int(respuesta.headers["Retry-After"]) >= 1
+
+    # Otro email desde la misma IP no se ve afectado
+    respuesta = client.post(LOGIN, json={"email": "otro@sistema.com", "password": "Incorrecta1!"})
+    assert respuesta.status_code == 401
+
+
+def test_login_correcto_reinicia_el_contador(client):
+    for _ in range(settings.LOGIN_RATE_LIMIT - 1):
+        client.post(LOGIN, json={**ADMIN, "password": "Incorrecta1!"})
+    assert client.post(LOGIN, json=ADMIN).status_code == 200
+
+    for _ in range(settings.LOGIN_RATE_LIMIT - 1):
+        assert client.post(LOGIN, json={**ADMIN, "password": "Incorrecta1!"}).status_code == 401
+    assert client.post(LOGIN, json=ADMIN).status_code == 200
@@ -0,0 +1,43 @@
+"""
+Pruebas de los endpoints de clientes.
+"""
+
+import pytest
+
+from tests.conftest import API
+
+CLIENTES = f"{API}/clientes/clientes"
+
+
+@pytest.fixture
+def clientes(client):
+    """
+    Tres clientes, uno de ellos inactivo.
+    """
+    ids = []
+    for i in range(3):
+        respuesta = client.post(
+            CLIENTES,
+            json={"nombre": f"Cliente {i}", "email": f"cliente{i}@acme.com", "nit_ruc": f"90010{i}"}
+        )
+        assert respuesta.status_code == 201, respuesta.text
+        ids.append(respuesta.json()["id"])
+    assert client.delete(f"{CLIENTES}/{ids[-1]}").status_code == 200
+    return ids
+
+
+@pytest.mark.parametrize("skip, esperados", [(0, 2), (2, 1), (10, 0)])
+def test_total_en_cualquier_pagina(client, clientes, skip, esperados):
+    datos = client.get(CLIENTES, params={"skip": skip, "limit": 2}).json()
+
+    # El total no depende de que la página tenga filas
+    assert len(datos["items"]) == esperados
+    assert datos["total"] == 3
+    assert datos["pages"] == 2
+
+
+def test_total_con_filtros(client, clientes):
+    datos = client.get(CLIENTES, params={"activo": True, "skip": 10}).json()
+
+    assert datos["items"] == []
+    assert datos["total"] == 2
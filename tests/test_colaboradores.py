@@ -0,0 +1,66 @@
+"""
+Pruebas de los endpoints de colaboradores.
+"""
+
+import pytest
+
+from tests.conftest import API
+
+COLABORADORES = f"{API}/colaboradores"
+
+
+def _crear_colaborador(client, email, habilidades):
+    respuesta = client.post(
+        f"{COLABORADORES}/",
+        json={
+            "nombre": "Luis",
+            "apellido": "Gómez",
+            "email": email,
+            "cargo": "Consultor",
+            "costo_hora": 30,
+            "habilidades": habilidades
+        }
+    )
+    assert respuesta.status_code == 200, respuesta.text
+    return respuesta.json()
+
+
+def test_habilidades_se_devuelven_como_lista(client):
+    # El formato anterior (texto separado por comas) se sigue aceptando
+    colaborador = _crear_colaborador(client, "luis@acme.com", "Python, SQL")
+
+    assert colaborador["habilidades"] == ["Python", "SQL"]
+
+
+@pytest.mark.parametrize("busqueda", ["python", "Python", "PYTHON", " python "])
+def test_buscar_por_habilidad_sin_distinguir_mayusculas(client, busqueda):
+    con_python = _crear_colaborador(client, "luis@acme.com", ["Python", "SQL"])
+    _crear_colaborador(client, "marta@acme.com", ["CPython internals"])
+    _crear_colaborador(client, "eva@acme.com", ["Java"])
+
+    respuesta = client.get(f"{COLABORADORES}/por-habilidad/{busqueda}")
+
+    assert respuesta.status_code == 200, respuesta.text
+    # Coincide con un elemento completo, no con parte de otra habilidad
+    assert [c["id"] for c in respuesta.json()] == [con_python["id"]]
+
+
+def test_buscar_por_habilidad_con_comodines(client):
+    _crear_colaborador(client, "luis@acme.com", ["Python"])
+
+    respuesta = client.get(f"{COLABORADORES}/por-habilidad/%25")
+
+    assert respuesta.status_code == 200, respuesta.text
+    assert respuesta.json() == []
+
+
+@pytest.mark.parametrize("skip, esperados", [(0, 2), (2, 1), (10, 0)])
+def test_total_en_cualquier_pagina(client, skip, esperados):
+    for email in ("luis@acme.com", "marta@acme.com", "eva@acme.com"):
+        _crear_colaborador(client, email, ["Python"])
+
+    datos = client.get(f"{COLABORADORES}/", params={"skip": skip, "limit": 2}).json()
+
+    # El total no depende de que la página tenga filas
+    assert len(datos["colaboradores"]) == esperados
+    assert datos["total"] == 3
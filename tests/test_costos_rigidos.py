@@ -0,0 +1,52 @@
+"""
+Pruebas de los endpoints de costos rígidos.
+"""
+
+from tests.conftest import API
+
+COSTOS = f"{API}/costos-rigidos/costos-rigidos"
+
+
+def _crear_costo(client, nombre, **campos):
+    respuesta = client.post(COSTOS, json={"nombre": nombre, "valor": 100, **campos})
+    assert respuesta.status_code == 201, respuesta.text
+    return respuesta.json()
+
+
+def test_crear_sin_fecha_aplicacion_usa_la_actual(client):
+    costo = _crear_costo(client, "Hosting")
+
+    assert costo["fecha_aplicacion"] is not None
+
+
+def test_fecha_aplicacion_null_se_rechaza(client):
+    costo = _crear_costo(client, "Hosting", fecha_aplicacion="2024-01-01T00:00:00")
+
+    respuesta = client.post(COSTOS, json={"nombre": "Dominio", "valor": 10, "fecha_aplicacion": None})
+    assert respuesta.status_code == 422
+
+    respuesta = client.put(f"{COSTOS}/{costo['id']}", json={"fecha_aplicacion": None})
+    assert respuesta.status_code == 422
+    assert client.get(f"{COSTOS}/{costo['id']}").json()["fecha_aplicacion"] == "2024-01-01T00:00:00"
+
+
+def test_listar_con_cursor_incluye_costos_sin_fecha_explicita(client):
+    ids = [
+        _crear_costo(client, f"Costo {dia}", fecha_aplicacion=f"2024-01-0{dia}T00:00:00")["id"]
+        for dia in (1, 2, 3)
+    ]
+    # Creado sin fecha: toma la actual y va primero en el orden descendente
+    sin_fecha = _crear_costo(client, "Sin fecha")["id"]
+
+    vistos = []
+    params = {"limit": 2}
+    while True:
+        respuesta = client.get(COSTOS, params=params)
+        assert respuesta.status_code == 200, respuesta.text
+        pagina = respuesta.json()
+        vistos += [c["id"] for c in pagina["items"]]
+        if pagina["next_cursor"] is None:
+            break
+        params = {"limit": 2, **pagina["next_cursor"]}
+
+    assert vistos == [sin_fecha, ids[2], ids[1], ids[0]]
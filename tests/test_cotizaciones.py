@@ -0,0 +1,212 @@
+"""
+Pruebas de los endpoints de cotizaciones.
+"""
+
+from datetime import datetime
+
+import pytest
+from sqlalchemy import event, func, select
+
+from app.models import ContadorNumeracion, Cotizacion, ItemCotizacion
+from app.routers.cotizaciones import reservar_numeros_cotizacion
+from tests.conftest import API
+
+COTIZACIONES = f"{API}/cotizaciones/cotizaciones"
+
+
+def _prefijo_del_mes() -> str:
+    ahora = datetime.now()
+    return f"COT-{ahora.year:04d}{ahora.month:02d}"
+
+
+@pytest.fixture
+def cotizacion_id(client, cliente_id):
+    """
+    ID de una cotización en borrador con un item.
+    """
+    respuesta = client.post(
+        COTIZACIONES,
+        json={
+            "cliente_id": cliente_id,
+            "titulo": "Desarrollo web",
+            "items": [{"descripcion": "Horas", "cantidad": 10, "precio_unitario": 50}]
+        }
+    )
+    assert respuesta.status_code == 201, respuesta.text
+    return respuesta.json()["id"]
+
+
+def test_cambiar_estado(client, cotizacion_id):
+    respuesta = client.patch(f"{COTIZACIONES}/{cotizacion_id}/estado", params={"nuevo_estado": "enviada"})
+
+    assert respuesta.status_code == 200, respuesta.text
+    assert respuesta.json()["nuevo_estado"] == "enviada"
+    assert client.get(f"{COTIZACIONES}/{cotizacion_id}").json()["estado"] == "enviada"
+
+
+@pytest.mark.parametrize("estado", ["revisada", "cancelada", "BORRADOR"])
+def test_cambiar_estado_invalido(client, cotizacion_id, estado):
+    respuesta = client.patch(f"{COTIZACIONES}/{cotizacion_id}/estado", params={"nuevo_estado": estado})
+
+    assert respuesta.status_code == 422
+
+
+def test_cambiar_estado_cotizacion_inexistente(client):
+    respuesta = client.patch(f"{COTIZACIONES}/999999/estado", params={"nuevo_estado": "enviada"})
+
+    assert respuesta.status_code == 404
+
+
+def test_actualizar_solo_en_borrador(client, cotizacion_id):
+    respuesta = client.put(f"{COTIZACIONES}/{cotizacion_id}", json={"titulo": "Portal"})
+    assert respuesta.status_code == 200, respuesta.text
+    assert respuesta.json()["titulo"] == "Portal"
+
+    client.patch(f"{COTIZACIONES}/{cotizacion_id}/estado", params={"nuevo_estado": "aprobada"})
+    respuesta = client.put(f"{COTIZACIONES}/{cotizacion_id}", json={"titulo": "Otro"})
+    assert respuesta.status_code == 400
+
+
+def test_reservar_primer_bloque_del_mes(db):
+    prefijo = _prefijo_del_mes()
+
+    numeros = reservar_numeros_cotizacion(db, 3)
+    db.commit()
+
+    assert numeros == [f"{prefijo}-0001", f"{prefijo}-0002", f"{prefijo}-0003"]
+    assert db.get(ContadorNumeracion, prefijo).ultimo == 3
+
+
+def test_reservar_continua_desde_numeros_existentes(db, cliente_id):
+    # Cotizaciones numeradas antes de existir el contador del mes
+    prefijo = _prefijo_del_mes()
+    db.add(Cotizacion(numero=f"{prefijo}-0041", cliente_id=cliente_id, titulo="Importada"))
+    db.commit()
+
+    numeros = reservar_numeros_cotizacion(db, 2)
+    db.commit()
+
+    assert numeros == [f"{prefijo}-0042", f"{prefijo}-0043"]
+    assert db.get(ContadorNumeracion, prefijo).ultimo == 43
+
+
+def test_reservar_bloques_consecutivos(db):
+    prefijo = _prefijo_del_mes()
+
+    primero = reservar_numeros_cotizacion(db, 2)
+    segundo = reservar_numeros_cotizacion(db, 3)
+    db.commit()
+
+    assert primero + segundo == [f"{prefijo}-{n:04d}" for n in range(1, 6)]
+    assert db.get(ContadorNumeracion, prefijo).ultimo == 5
+
+
+def test_reservar_en_el_cambio_de_año(db, monkeypatch):
+    # El reloj avanza entre lecturas: el prefijo debe ser de un único instante
+    lecturas = iter([datetime(2025, 12, 31, 23, 59, 59), datetime(2026, 1, 1, 0, 0, 0)])
+
+    class RelojQueAvanza(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return next(lecturas)
+
+    monkeypatch.setattr("app.routers.cotizaciones.datetime", RelojQueAvanza)
+
+    assert reservar_numeros_cotizacion(db, 1) == ["COT-202512-0001"]
+
+
+def test_reservar_con_contador_creado_entretanto(db):
+    # Otra petición crea el contador del mes después de que el UPDATE no
+    # encuentre fila y antes del INSERT: debe aplicarse ON CONFLICT DO UPDATE
+    prefijo = _prefijo_del_mes()
+    conexion = db.connection()
+    creado = []
+
+    def crear_contador_concurrente(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith("INSERT INTO contadores_numeracion") and not creado:
+            creado.append(True)
+            conn.connection.cursor().execute(
+                "INSERT INTO contadores_numeracion (prefijo, ultimo) VALUES (?, ?)", (prefijo, 7)
+            )
+
+    event.listen(conexion, "before_cursor_execute", crear_contador_concurrente)
+    try:
+        numeros = reservar_numeros_cotizacion(db, 3)
+    finally:
+        event.remove(conexion, "before_cursor_execute", crear_contador_concurrente)
+    db.commit()
+
+    assert creado
+    assert numeros == [f"{prefijo}-0008", f"{prefijo}-0009", f"{prefijo}-0010"]
+    assert db.get(ContadorNumeracion, prefijo).ultimo == 10
+
+
+def test_crear_en_bloque(client, db, cliente_id):
+    prefijo = _prefijo_del_mes()
+    item = {"descripcion": "Horas", "cantidad": 2, "precio_unitario": 100}
+    cuerpo = [
+        {"cliente_id": cliente_id, "titulo": f"Importada {i}", "items": [item] * i}
+        for i in range(3)
+    ]
+
+    respuesta = client.post(f"{COTIZACIONES}/bulk", json=cuerpo)
+
+    assert respuesta.status_code == 201, respuesta.text
+    creadas = respuesta.json()
+    # Mismo orden que la petición y números consecutivos
+    assert [c["titulo"] for c in creadas] == ["Importada 0", "Importada 1", "Importada 2"]
+    assert [c["numero"] for c in creadas] == [f"{prefijo}-{n:04d}" for n in range(1, 4)]
+    assert [c["subtotal"] for c in creadas] == [0, 200, 400]
+    assert all(c["estado"] == "borrador" for c in creadas)
+
+    items = db.execute(
+        select(ItemCotizacion.cotizacion_id, ItemCotizacion.orden).order_by(ItemCotizacion.id)
+    ).all()
+    assert items == [(creadas[1]["id"], 1), (creadas[2]["id"], 1), (creadas[2]["id"], 2)]
+
+    # Una creación individual continúa la numeración del bloque
+    respuesta = client.post(COTIZACIONES, json={"cliente_id": cliente_id, "titulo": "Suelta"})
+    assert respuesta.json()["numero"] == f"{prefijo}-0004"
+
+
+def test_crear_en_bloque_con_referencia_inexistente(client, db, cliente_id):
+    cuerpo = [
+        {"cliente_id": cliente_id, "titulo": "Válida"},
+        {"cliente_id": 999999, "titulo": "Sin cliente"}
+    ]
+
+    respuesta = client.post(f"{COTIZACIONES}/bulk", json=cuerpo)
+
+    assert respuesta.status_code == 404
+    assert "999999" in respuesta.json()["detail"]
+    # No se crea ninguna cotización ni se consumen números
+    assert db.scalar(select(func.count()).select_from(Cotizacion)) == 0
+    assert db.get(ContadorNumeracion, _prefijo_del_mes()) is None
+
+
+def test_crear_en_bloque_vacio(client):
+    respuesta = client.post(f"{COTIZACIONES}/bulk", json=[])
+
+    assert respuesta.status_code == 201
+    assert respuesta.json() == []
+
+
+def test_listar_con_cursor(client, db, cliente_id):
+    creadas = client.post(
+        f"{COTIZACIONES}/bulk",
+        json=[{"cliente_id": cliente_id, "titulo": f"Cotización {i}"} for i in range(3)]
+    ).json()
+    ids = [c["id"] for c in creadas]
+    # Fechas distintas, en el mismo orden que los IDs
+    for dia, cotizacion_id in enumerate(ids, start=1):
+        db.get(Cotizacion, cotizacion_id).fecha_creacion = datetime(2024, 1, dia)
+    db.commit()
+
+    primera = client.get(COTIZACIONES, params={"limit": 2}).json()
+    assert [c["id"] for c in primera["items"]] == [ids[2], ids[1]]
+    assert primera["total"] == 3
+
+    segunda = client.get(COTIZACIONES, params={"limit": 2, **primera["next_cursor"]}).json()
+    assert [c["id"] for c in segunda["items"]] == [ids[0]]
+    assert segunda["total"] == 1
+    assert segunda.get("next_cursor") is None
@@ -0,0 +1,50 @@
+"""
+Pruebas del middleware de ETag y GET condicional.
+"""
+
+from tests.conftest import API
+
+COLABORADORES = f"{API}/colaboradores/"
+
+
+def test_get_incluye_etag(client):
+    respuesta = client.get(COLABORADORES)
+
+    assert respuesta.status_code == 200
+    assert respuesta.headers["etag"].startswith('W/"')
+
+
+def test_misma_version_responde_304_sin_cuerpo(client):
+    etag = client.get(COLABORADORES).headers["etag"]
+
+    respuesta = client.get(COLABORADORES, headers={"If-None-Match": etag})
+
+    assert respuesta.status_code == 304
+    assert respuesta.content == b""
+    assert respuesta.headers["etag"] == etag
+
+
+def test_if_none_match_con_varios_etags(client):
+    etag = client.get(COLABORADORES).headers["etag"]
+
+    # Comparación débil: se ignora el prefijo W/
+    respuesta = client.get(COLABORADORES, headers={"If-None-Match": f'"otro", {etag.removeprefix("W/")}'})
+
+    assert respuesta.status_code == 304
+
+
+def test_datos_modificados_responden_200(client, colaborador_id):
+    etag = client.get(COLABORADORES).headers["etag"]
+    client.put(f"{COLABORADORES}{colaborador_id}", json={"cargo": "Arquitecta"})
+
+    respuesta = client.get(COLABORADORES, headers={"If-None-Match": etag})
+
+    assert respuesta.status_code == 200
+    assert respuesta.headers["etag"] != etag
+    assert respuesta.json()["colaboradores"][0]["cargo"] == "Arquitecta"
+
+
+def test_sin_etag_fuera_de_get_o_en_errores(client):
+    assert "etag" not in client.get(f"{COLABORADORES}999999").headers
+    respuesta = client.post(f"{API}/auth/login", json={"email": "admin@sistema.com", "password": "Admin123!"})
+    assert "etag" not in respuesta.headers
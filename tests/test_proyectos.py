@@ -0,0 +1,111 @@
+"""
+Pruebas de los endpoints de proyectos.
+"""
+
+from datetime import datetime
+
+import pytest
+
+from app.models import Proyecto
+from tests.conftest import API
+
+
+@pytest.fixture
+def proyectos(client, db, cliente_id, colaborador_id):
+    """
+    Tres proyectos del mismo cliente; el primero con un colaborador asignado.
+
+    Cada uno con una fecha de creación distinta, en el mismo orden que los
+    IDs, para que el orden del listado no dependa del reloj.
+    """
+    ids = []
+    for i in range(3):
+        respuesta = client.post(
+            f"{API}/proyectos/",
+            json={
+                "nombre": f"Proyecto {i}",
+                "cliente_id": cliente_id,
+                "presupuesto": 1000 * (i + 1),
+                "colaboradores_ids": [colaborador_id] if i == 0 else []
+            }
+        )
+        assert respuesta.status_code == 200, respuesta.text
+        ids.append(respuesta.json()["id"])
+
+    for dia, proyecto_id in enumerate(ids, start=1):
+        db.get(Proyecto, proyecto_id).fecha_creacion = datetime(2024, 1, dia)
+    db.commit()
+    return ids
+
+
+def test_crear_proyecto_incluye_cliente_y_colaboradores(client, cliente_id, colaborador_id):
+    respuesta = client.post(
+        f"{API}/proyectos/",
+        json={
+            "nombre": "Portal",
+            "cliente_id": cliente_id,
+            "presupuesto": 500,
+            "colaboradores_ids": [colaborador_id]
+        }
+    )
+
+    assert respuesta.status_code == 200, respuesta.text
+    proyecto = respuesta.json()
+    assert proyecto["cliente"] == {"id": cliente_id, "nombre": "Acme", "email": "contacto@acme.com"}
+    assert [c["id"] for c in proyecto["colaboradores"]] == [colaborador_id]
+
+
+def test_listar_proyectos(client, proyectos):
+    respuesta = client.get(f"{API}/proyectos/")
+
+    assert respuesta.status_code == 200, respuesta.text
+    datos = respuesta.json()
+    assert datos["total"] == 3
+    # Orden: más recientes primero (fecha_creacion desc, id desc)
+    assert [p["id"] for p in datos["proyectos"]] == sorted(proyectos, reverse=True)
+    assert all(p["cliente"]["nombre"] == "Acme" for p in datos["proyectos"])
+    assert datos["next_cursor"] is None
+
+
+def test_listar_proyectos_con_cursor(client, proyectos):
+    primera = client.get(f"{API}/proyectos/", params={"limit": 2}).json()
+    assert [p["id"] for p in primera["proyectos"]] == sorted(proyectos, reverse=True)[:2]
+    assert primera["next_cursor"] is not None
+
+    segunda = client.get(f"{API}/proyectos/", params={"limit": 2, **primera["next_cursor"]}).json()
+
+    assert [p["id"] for p in segunda["proyectos"]] == [min(proyectos)]
+    assert segunda["next_cursor"] is None
+
+
+def test_obtener_proyecto(client, proyectos, colaborador_id):
+    respuesta = client.get(f"{API}/proyectos/{proyectos[0]}")
+
+    assert respuesta.status_code == 200, respuesta.text
+    proyecto = respuesta.json()
+    assert proyecto["nombre"] == "Proyecto 0"
+    assert proyecto["colaboradores"][0]["id"] == colaborador_id
+
+
+def test_obtener_proyecto_inexistente(client):
+    assert client.get(f"{API}/proyectos/999999").status_code == 404
+
+
+def test_proyectos_por_cliente_y_por_colaborador(client, proyectos, cliente_id, colaborador_id):
+    por_cliente = client.get(f"{API}/proyectos/por-cliente/{cliente_id}")
+    por_colaborador = client.get(f"{API}/proyectos/por-colaborador/{colaborador_id}")
+
+    assert por_cliente.status_code == 200, por_cliente.text
+    assert sorted(p["id"] for p in por_cliente.json()) == sorted(proyectos)
+    assert por_colaborador.status_code == 200, por_colaborador.text
+    assert [p["id"] for p in por_colaborador.json()] == [proyectos[0]]
+
+
+@pytest.mark.parametrize("skip, esperados", [(0, 2), (2, 1), (10, 0)])
+def test_total_en_cualquier_pagina(client, proyectos, skip, esperados):
+    datos = client.get(f"{API}/proyectos/", params={"skip": skip, "limit": 2}).json()
+
+    # El total no depende de que la página tenga filas
+    assert len(datos["proyectos"]) == esperados
+    assert datos["total"] == 3
+    assert datos["total_paginas"] == 2
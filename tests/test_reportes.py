@@ -0,0 +1,83 @@
+"""
+Pruebas de los endpoints de reportes.
+"""
+
+from tests.conftest import API
+
+REPORTES = f"{API}/reportes"
+
+
+def test_resumen_financiero(client, cliente_id, db):
+    from app.models import CostoRigido
+
+    cotizacion = client.post(
+        f"{API}/cotizaciones/cotizaciones",
+        json={
+            "cliente_id": cliente_id,
+            "titulo": "Portal",
+            "items": [{"descripcion": "Horas", "cantidad": 10, "precio_unitario": 100}]
+        }
+    ).json()
+    client.patch(f"{API}/cotizaciones/cotizaciones/{cotizacion['id']}/estado", params={"nuevo_estado": "aprobada"})
+    db.add(CostoRigido(nombre="Servidor", valor=190))
+    db.commit()
+
+    respuesta = client.get(f"{REPORTES}/resumen-financiero")
+
+    assert respuesta.status_code == 200, respuesta.text
+    assert respuesta.json() == {
+        "ingresos_cotizaciones": 1190.0,
+        "gastos_costos_rigidos": 190.0,
+        "margen_bruto": 1000.0,
+        "porcentaje_margen": 1000.0 / 1190.0 * 100
+    }
+
+
+def test_escrituras_invalidan_la_cache_de_reportes(client, cliente_id, colaborador_id):
+    dashboard = client.get(f"{REPORTES}/dashboard").json()
+    assert dashboard["cotizaciones"]["total"] == 0
+    assert dashboard["proyectos"]["total"] == 0
+
+    cotizacion = client.post(
+        f"{API}/cotizaciones/cotizaciones", json={"cliente_id": cliente_id, "titulo": "Portal"}
+    ).json()
+    client.post(f"{API}/proyectos/", json={"nombre": "Portal", "cliente_id": cliente_id, "presupuesto": 10})
+    client.delete(f"{API}/colaboradores/{colaborador_id}")
+
+    dashboard = client.get(f"{REPORTES}/dashboard").json()
+    assert dashboard["cotizaciones"]["total"] == 1
+    assert dashboard["proyectos"]["total"] == 1
+    assert dashboard["colaboradores"]["activos"] == 0
+
+    client.patch(
+        f"{API}/cotizaciones/cotizaciones/{cotizacion['id']}/estado", params={"nuevo_estado": "aprobada"}
+    )
+    assert client.get(f"{REPORTES}/dashboard").json()["cotizaciones"]["aprobadas"] == 1
+
+
+def test_cotizaciones_por_mes_de_un_año_cerrado(client, cliente_id, db):
+    from datetime import datetime
+
+    from app.models import Cotizacion
+
+    cotizacion = client.post(
+        f"{API}/cotizaciones/cotizaciones",
+        json={
+            "cliente_id": cliente_id,
+            "titulo": "Portal",
+            "items": [{"descripcion": "Horas", "cantidad": 1, "precio_unitario": 100}]
+        }
+    ).json()
+    db.get(Cotizacion, cotizacion["id"]).fecha_creacion = datetime(2020, 3, 1)
+    db.commit()
+
+    antes = client.get(f"{REPORTES}/cotizaciones-por-mes", params={"año": 2020}).json()
+    assert antes == [{"mes": "Marzo", "numero_mes": 3, "cantidad": 1, "valor_total": 119.0}]
+
+    # Editar un borrador de un año cerrado cambia su total y debe verse en el reporte
+    client.put(
+        f"{API}/cotizaciones/cotizaciones/{cotizacion['id']}",
+        json={"items": [{"descripcion": "Horas", "cantidad": 2, "precio_unitario": 100}]}
+    )
+    despues = client.get(f"{REPORTES}/cotizaciones-por-mes", params={"año": 2020}).json()
+    assert despues[0]["valor_total"] == 238.0